@@ -3,16 +3,23 @@ Streamlit UI for the HITL Salary Management System.
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 import sys
+import uuid
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.workflow import graph
 from src.state import WorkflowState
+from src.nodes import state_employees
+from src.data_store import get_store
+from src.tenants import set_tenant, tenant_ids, tenant_source, tenant_thread_id
+from src.history import get_history_store
+from src.decisions import decision_service, DecisionConflict
+from src.proposal_cache import proposal_cache, run_analysis
+from src.employee import employees_to_frame
+from src.search import search_employees
 
 # Page configuration
 st.set_page_config(
@@ -74,29 +81,78 @@ if 'workflow_state' not in st.session_state:
     st.session_state.workflow_state = None
 if 'thread_id' not in st.session_state:
     st.session_state.thread_id = "thread_1"
-if 'workflow_history' not in st.session_state:
-    st.session_state.workflow_history = []
+if 'history_cursors' not in st.session_state:
+    st.session_state.history_cursors = [None]
 
 # Load data
 @st.cache_data
-def load_salary_data():
-    """Load the salary data from Excel."""
-    data_path = Path(__file__).parent / "data" / "salary_data.xlsx"
-    if not data_path.exists():
-        return None
-    return pd.read_excel(data_path)
+def load_department_summary(version, _store):
+    """Department aggregates, cached per data version."""
+    return _store.summary()
+
+
+def submit_decision(decision, modification=None):
+    """Apply a decision once; repeated clicks replay the stored result."""
+    checkpoint_id = st.session_state.get('checkpoint_id')
+    try:
+        result, replayed = decision_service.submit(
+            st.session_state.thread_id,
+            decision,
+            modification,
+            idempotency_key=f"{checkpoint_id}:{decision}",
+            expected_checkpoint=checkpoint_id
+        )
+    except DecisionConflict as e:
+        st.session_state.decision_error = str(e)
+        if e.state.get('final_status'):
+            st.session_state.workflow_state = e.state
+        return
+    
+    st.session_state.workflow_state = result
+    if not replayed:
+        get_history_store().record(result, thread_id=st.session_state.thread_id,
+                                   reviewer=st.session_state.get('reviewer'))
+
+
+def salary_box_plot(summary):
+    """Build the salary box plot from precomputed quantiles."""
+    fig = go.Figure()
+    for row in summary.to_dict('records'):
+        fig.add_trace(go.Box(
+            name=row['Department'],
+            x=[row['Department']],
+            q1=[row['Q1']],
+            median=[row['Median']],
+            q3=[row['Q3']],
+            lowerfence=[row['Min Salary']],
+            upperfence=[row['Max Salary']],
+            mean=[row['Avg Salary']],
+        ))
+    fig.update_layout(title='Salary Distribution', yaxis_title='Salary (₹)',
+                      showlegend=False, height=400)
+    return fig
 
 # Main app
 st.markdown('<div class="main-header">💼 HITL Salary Management System</div>', unsafe_allow_html=True)
 st.markdown("**Human-in-the-Loop Workflow powered by LangGraph**")
 
-# Load data
-df = load_salary_data()
+# Dataset (tenant) this session works on; switching drops the paused workflow
+tenant = set_tenant(st.sidebar.selectbox("Dataset", tenant_ids(), key='tenant'))
+if st.session_state.get('workflow_tenant', tenant) != tenant:
+    st.session_state.workflow_state = None
+    st.session_state.show_modify_form = False
+st.session_state.workflow_tenant = tenant
 
-if df is None:
+# Load data
+if not tenant_source(tenant).exists():
     st.error("❌ Salary data not found. Please run `python generate_data.py` first.")
     st.stop()
 
+store = get_store()
+store.refresh()
+df = store.frame
+summary = load_department_summary(store.version, store)
+
 # Tabs
 tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Overview", "🔍 Department Analysis", "✅ Approval Interface", "📋 Workflow History"])
 
@@ -106,31 +162,41 @@ tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Overview", "🔍 Department Analysi
 with tab1:
     st.markdown('<div class="sub-header">Employee Data Overview</div>', unsafe_allow_html=True)
     
+    total_employees = int(summary['Employees'].sum())
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Employees", len(df))
+        st.metric("Total Employees", total_employees)
     with col2:
-        st.metric("Departments", df['Department'].nunique())
+        st.metric("Departments", len(summary))
     with col3:
-        st.metric("Avg Salary", f"₹{df['Current_Salary'].mean():,.0f}")
+        avg_salary = (summary['Avg Salary'] * summary['Employees']).sum() / total_employees
+        st.metric("Avg Salary", f"₹{avg_salary:,.0f}")
+    
+    st.markdown("### 🔎 Find an Employee")
+    query = st.text_input("Name, position or employee ID", placeholder="e.g. Sharma, engineer, 1003")
+    if query:
+        matches = search_employees(query)
+        if matches.empty:
+            st.info("No matching employees")
+        else:
+            st.dataframe(matches, use_container_width=True, hide_index=True)
     
     st.markdown("### 📋 All Employees")
-    st.dataframe(df, use_container_width=True, height=400)
+    page_col, size_col = st.columns([3, 1])
+    with size_col:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+    num_pages = max(1, -(-total_employees // page_size))
+    with page_col:
+        page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1)
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size], use_container_width=True, height=400, hide_index=True)
     
     st.markdown("### 📊 Salary Distribution by Department")
-    fig = px.box(df, x='Department', y='Current_Salary', color='Department',
-                 title='Salary Distribution',
-                 labels={'Current_Salary': 'Salary (₹)'})
-    fig.update_layout(showlegend=False, height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(salary_box_plot(summary), use_container_width=True)
     
     st.markdown("### 📈 Department Statistics")
-    dept_stats = df.groupby('Department').agg({
-        'Current_Salary': ['count', 'mean', 'min', 'max']
-    }).round(0)
-    dept_stats.columns = ['Employees', 'Avg Salary', 'Min Salary', 'Max Salary']
-    dept_stats = dept_stats.reset_index()
-    st.dataframe(dept_stats, use_container_width=True)
+    st.dataframe(summary[['Department', 'Employees', 'Avg Salary', 'Min Salary', 'Max Salary']],
+                 use_container_width=True)
 
 # =========================
 # TAB 2: Department Analysis
@@ -139,26 +205,20 @@ with tab2:
     st.markdown('<div class="sub-header">Analyze Department</div>', unsafe_allow_html=True)
     
     # Department selection
-    departments = sorted(df['Department'].unique())
+    departments = summary['Department'].tolist()
     selected_dept = st.selectbox("Select Department to Analyze", departments)
     
     if st.button("🔍 Analyze Department", type="primary", use_container_width=True):
-        # Initialize workflow
-        config = {"configurable": {"thread_id": st.session_state.thread_id}}
-        initial_state = {
-            "department": selected_dept,
-            "employees": [],
-            "execution_log": []
-        }
+        # Each analysis gets its own thread so cached proposals can seed it
+        st.session_state.thread_id = tenant_thread_id(f"thread_{uuid.uuid4().hex}")
         
         # Run workflow until interrupt
         try:
             with st.spinner("Analyzing department..."):
-                result = None
-                for event in graph.stream(initial_state, config, stream_mode="values"):
-                    result = event
+                result, _ = run_analysis(st.session_state.thread_id, selected_dept)
                 
                 st.session_state.workflow_state = result
+                st.session_state.checkpoint_id = decision_service.checkpoint_id(st.session_state.thread_id)
                 st.success("✅ Analysis complete! See proposal below.")
         except Exception as e:
             st.error(f"❌ Error during analysis: {str(e)}")
@@ -173,13 +233,17 @@ with tab2:
             st.markdown("### 👤 Highest-Paid Employee")
             col1, col2 = st.columns(2)
             with col1:
-                st.info(f"**Name:** {highest['Name']}")
-                st.info(f"**Position:** {highest['Position']}")
-                st.info(f"**Current Salary:** ₹{highest['Current_Salary']:,}")
+                st.info(f"**Name:** {highest.name}")
+                st.info(f"**Position:** {highest.position}")
+                st.info(f"**Current Salary:** ₹{highest.current_salary:,}")
             with col2:
-                st.info(f"**Department:** {highest['Department']}")
-                st.info(f"**Manager:** {highest['Manager']}")
-                st.info(f"**Join Date:** {highest['Join_Date']}")
+                st.info(f"**Department:** {highest.department}")
+                st.info(f"**Manager:** {highest.manager}")
+                st.info(f"**Join Date:** {highest.join_date}")
+            
+            employees = state_employees(state)
+            with st.expander(f"👥 {len(employees)} employees in {state['department']}"):
+                st.dataframe(employees_to_frame(employees), hide_index=True, use_container_width=True)
             
             # Show proposal
             if state.get('proposal_details'):
@@ -213,6 +277,9 @@ with tab2:
 with tab3:
     st.markdown('<div class="sub-header">Human-in-the-Loop Approval</div>', unsafe_allow_html=True)
     
+    if st.session_state.get('decision_error'):
+        st.error(f"❌ Decision not applied: {st.session_state.pop('decision_error')}")
+    
     if not st.session_state.workflow_state:
         st.warning("⚠️ No active proposal. Please analyze a department first in the **Department Analysis** tab.")
     elif st.session_state.workflow_state.get('final_status'):
@@ -257,40 +324,12 @@ with tab3:
         
         with col1:
             if st.button("✅ Approve", type="primary", use_container_width=True):
-                config = {"configurable": {"thread_id": st.session_state.thread_id}}
-                
-                # Update state with approval
-                graph.update_state(
-                    config,
-                    {"human_decision": "approve"}
-                )
-                
-                # Continue workflow
-                result = None
-                for event in graph.stream(None, config, stream_mode="values"):
-                    result = event
-                
-                st.session_state.workflow_state = result
-                st.session_state.workflow_history.append(result)
+                submit_decision("approve")
                 st.rerun()
         
         with col2:
             if st.button("❌ Reject", type="secondary", use_container_width=True):
-                config = {"configurable": {"thread_id": st.session_state.thread_id}}
-                
-                # Update state with rejection
-                graph.update_state(
-                    config,
-                    {"human_decision": "reject"}
-                )
-                
-                # Continue workflow
-                result = None
-                for event in graph.stream(None, config, stream_mode="values"):
-                    result = event
-                
-                st.session_state.workflow_state = result
-                st.session_state.workflow_history.append(result)
+                submit_decision("reject")
                 st.rerun()
         
         with col3:
@@ -312,12 +351,14 @@ with tab3:
                     )
                     modification_details = {'modified_salary': int(modified_salary)}
                 else:
-                    # Get list of potential managers
-                    dept_employees = [e['Name'] for e in state['employees'] 
-                                    if e['Employee_ID'] != proposal['employee_id']]
+                    # Potential managers with their report counts, excluding the employee's own reports
+                    options = get_store().hierarchy().manager_options(state_employees(state), state['highest_paid'])
+                    reports = {o['name']: o['reports'] for o in options}
+                    dept_employees = list(reports)
                     modified_manager = st.selectbox(
                         "Select New Manager",
                         options=dept_employees,
+                        format_func=lambda name: f"{name} ({reports[name]} reports)",
                         index=dept_employees.index(proposal['proposed_manager']) 
                             if proposal['proposed_manager'] in dept_employees else 0
                     )
@@ -326,24 +367,7 @@ with tab3:
                 submit_modify = st.form_submit_button("Submit Modification", type="primary")
                 
                 if submit_modify:
-                    config = {"configurable": {"thread_id": st.session_state.thread_id}}
-                    
-                    # Update state with modification
-                    graph.update_state(
-                        config,
-                        {
-                            "human_decision": "modify",
-                            "modification_details": modification_details
-                        }
-                    )
-                    
-                    # Continue workflow
-                    result = None
-                    for event in graph.stream(None, config, stream_mode="values"):
-                        result = event
-                    
-                    st.session_state.workflow_state = result
-                    st.session_state.workflow_history.append(result)
+                    submit_decision("modify", modification_details)
                     st.session_state.show_modify_form = False
                     st.rerun()
 
@@ -353,19 +377,47 @@ with tab3:
 with tab4:
     st.markdown('<div class="sub-header">Workflow Execution History</div>', unsafe_allow_html=True)
     
-    if not st.session_state.workflow_history:
+    history = get_history_store()
+    filter_col1, filter_col2 = st.columns(2)
+    with filter_col1:
+        history_dept = st.selectbox("Department", ["All"] + departments, key="history_department")
+    with filter_col2:
+        history_status = st.selectbox("Status", ["All", "approved", "rejected", "modified"],
+                                      key="history_status")
+    
+    department_filter = None if history_dept == "All" else history_dept
+    status_filter = None if history_status == "All" else history_status
+    filters = (tenant, department_filter, status_filter)
+    if st.session_state.get('history_filters') != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_cursors = [None]
+    
+    page = history.query(department=department_filter, status=status_filter,
+                         cursor=st.session_state.history_cursors[-1], limit=20, tenant=tenant)
+    
+    if not page['items']:
         st.info("No workflow history yet. Process some proposals to see history here.")
     else:
-        for idx, workflow in enumerate(reversed(st.session_state.workflow_history), 1):
-            with st.expander(f"Workflow #{len(st.session_state.workflow_history) - idx + 1} - {workflow.get('final_status', 'unknown').upper()}"):
-                st.markdown(f"**Department:** {workflow.get('department', 'N/A')}")
-                st.markdown(f"**Status:** {workflow.get('final_status', 'N/A')}")
-                st.markdown(f"**Result:** {workflow.get('final_message', 'N/A')}")
-                
-                if workflow.get('execution_log'):
-                    st.markdown("**Execution Log:**")
-                    for log_entry in workflow['execution_log']:
-                        st.text(f"  • {log_entry}")
+        st.caption(f"{history.count(department_filter, status_filter, tenant=tenant):,} decisions recorded")
+        for entry in page['items']:
+            decided_at = pd.Timestamp(entry['decided_at'], unit='s').strftime('%Y-%m-%d %H:%M')
+            with st.expander(f"Workflow #{entry['id']} - {(entry['status'] or 'unknown').upper()}"):
+                st.markdown(f"**Department:** {entry['department']}")
+                st.markdown(f"**Employee:** {entry['employee_name'] or 'N/A'}")
+                st.markdown(f"**Status:** {entry['status'] or 'N/A'}")
+                st.markdown(f"**Reviewer:** {entry['reviewer'] or 'N/A'}")
+                st.markdown(f"**Decided:** {decided_at}")
+                st.markdown(f"**Result:** {entry['message'] or 'N/A'}")
+    
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if len(st.session_state.history_cursors) > 1 and st.button("⬅️ Newer", use_container_width=True):
+            st.session_state.history_cursors.pop()
+            st.rerun()
+    with next_col:
+        if page['next_cursor'] is not None and st.button("Older ➡️", use_container_width=True):
+            st.session_state.history_cursors.append(page['next_cursor'])
+            st.rerun()
     
     # Current workflow log
     if st.session_state.workflow_state and st.session_state.workflow_state.get('execution_log'):
@@ -391,6 +443,9 @@ with st.sidebar:
     5. Processes the decision (approve/reject/modify)
     """)
     
+    st.markdown("### 👤 Reviewer")
+    st.text_input("Your name", key="reviewer")
+    
     st.markdown("### 🔄 System Status")
     if st.session_state.workflow_state:
         if st.session_state.workflow_state.get('final_status'):
@@ -400,8 +455,11 @@ with st.sidebar:
     else:
         st.info("No Active Workflow")
     
+    cache = proposal_cache.stats()
+    st.caption(f"Proposal cache: {cache['hits']} hits / {cache['misses']} misses ({cache['size']}/{cache['max_entries']})")
+    
     if st.button("🔄 Reset Workflow", use_container_width=True):
         st.session_state.workflow_state = None
-        st.session_state.thread_id = f"thread_{pd.Timestamp.now().timestamp()}"
+        st.session_state.thread_id = tenant_thread_id(f"thread_{pd.Timestamp.now().timestamp()}")
         st.session_state.show_modify_form = False
         st.rerun()
@@ -10,7 +10,25 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.workflow import graph
 from src.state import WorkflowState
-import pandas as pd
+from src.nodes import state_employees
+from src.history import get_history_store
+from src.decisions import decision_service, DecisionConflict, WorkflowNotFound
+from src.proposal_cache import run_analysis
+from src.data_store import get_store
+from src.outbox import get_outbox
+from src.profiling import profiled
+from src.tenants import UnknownTenant, current_tenant, tenant_source, tenant_thread_id, use_tenant
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import contextlib
+import csv
+import getpass
+import json
+import os
+import threading
+import uuid
+
+DECISIONS = ('approve', 'reject', 'modify')
 
 
 def print_header(text):
@@ -26,24 +44,24 @@ def print_section(text):
 
 
 def load_salary_data():
-    """Load salary data from Excel."""
-    data_path = Path(__file__).parent / "data" / "salary_data.xlsx"
+    """Load the current tenant's salary data from Excel."""
+    data_path = tenant_source(current_tenant())
     if not data_path.exists():
         print(f"❌ Error: Data file not found at {data_path}")
         print("Please run: python generate_data.py")
         sys.exit(1)
-    return pd.read_excel(data_path)
+    return get_store().frame
 
 
 def display_employee(employee, label="Employee"):
     """Display employee details."""
     print(f"\n{label}:")
-    print(f"  Name: {employee['Name']}")
-    print(f"  Position: {employee['Position']}")
-    print(f"  Department: {employee['Department']}")
-    print(f"  Current Salary: ₹{employee['Current_Salary']:,}")
-    print(f"  Manager: {employee['Manager']}")
-    print(f"  Join Date: {employee['Join_Date']}")
+    print(f"  Name: {employee.name}")
+    print(f"  Position: {employee.position}")
+    print(f"  Department: {employee.department}")
+    print(f"  Current Salary: ₹{employee.current_salary:,}")
+    print(f"  Manager: {employee.manager}")
+    print(f"  Join Date: {employee.join_date}")
 
 
 def display_proposal(proposal_type, proposal_details):
@@ -113,8 +131,8 @@ def get_modification(proposal_type, proposal_details, employees):
         proposed_manager = proposal_details['proposed_manager']
         
         # Get list of potential managers from employees
-        potential_managers = [e['Name'] for e in employees 
-                            if e['Employee_ID'] != proposal_details['employee_id']]
+        potential_managers = [e.name for e in employees 
+                            if e.employee_id != proposal_details['employee_id']]
         
         print(f"Current Manager: {current_manager}")
         print(f"Proposed Manager: {proposed_manager}")
@@ -193,9 +211,10 @@ def main():
     print_section(f"Analyzing {selected_dept} Department")
     print("🔄 Running workflow...")
     
-    config = {"configurable": {"thread_id": "cli_demo_thread"}}
+    config = {"configurable": {"thread_id": tenant_thread_id("cli_demo_thread")}}
     initial_state = {
         "department": selected_dept,
+        "tenant": current_tenant(),
         "employees": [],
         "execution_log": []
     }
@@ -221,7 +240,7 @@ def main():
         mod_details = get_modification(
             result['proposal_type'],
             result['proposal_details'],
-            result['employees']
+            state_employees(result)
         )
     
     # Update state with decision
@@ -242,6 +261,8 @@ def main():
     
     # Display results
     if final_result:
+        get_history_store().record(final_result, thread_id=config["configurable"]["thread_id"],
+                                   reviewer=getpass.getuser())
         display_result(final_result.get('final_status'), final_result.get('final_message'))
         display_execution_log(final_result.get('execution_log', []))
     
@@ -249,14 +270,213 @@ def main():
     print("\n✅ Thank you for using the HITL Salary Management System!\n")
 
 
-if __name__ == "__main__":
+def read_batch_rows(source, fmt=None):
+    """Yield raw decision rows from a JSONL or CSV file, or stdin for '-'."""
+    fmt = fmt or ('csv' if str(source).lower().endswith('.csv') else 'jsonl')
+    stream = sys.stdin if source == '-' else open(source, newline='', encoding='utf-8')
+    try:
+        if fmt == 'csv':
+            for row in csv.DictReader(stream):
+                yield {k: v for k, v in row.items() if v not in (None, '')}
+        else:
+            for line in stream:
+                if line.strip():
+                    yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def parse_batch_row(raw):
+    """Validate one decision row; raises ValueError when it is unusable."""
+    try:
+        row = json.loads(raw) if isinstance(raw, str) else dict(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"not valid JSON ({e.msg})")
+    if not isinstance(row, dict):
+        raise ValueError("expected a JSON object")
+    
+    decision = str(row.get('decision', '')).strip().lower()
+    if decision not in DECISIONS:
+        raise ValueError(f"decision must be one of {', '.join(DECISIONS)}")
+    if not row.get('thread_id') and not row.get('department'):
+        raise ValueError("thread_id or department is required")
+    
+    modification = row.get('modification') or {}
+    if isinstance(modification, str):
+        modification = json.loads(modification)
+    if row.get('modified_salary') not in (None, ''):
+        modification['modified_salary'] = int(row['modified_salary'])
+    if row.get('modified_manager'):
+        modification['modified_manager'] = row['modified_manager']
+    if decision == 'modify' and not modification:
+        raise ValueError("modify needs modified_salary or modified_manager")
+    
+    return {
+        'thread_id': row.get('thread_id'),
+        'department': row.get('department'),
+        'decision': decision,
+        'modification': modification or None,
+        'seed': int(row['seed']) if row.get('seed') not in (None, '') else None,
+        'idempotency_key': row.get('idempotency_key'),
+    }
+
+
+def run_batch(source, fmt=None, workers=8, reviewer=None, out=None):
+    """
+    Apply a file of decisions without prompting.
+
+    Rows naming a department are analyzed into a new thread first (all
+    analyses finish before any decision is applied); rows naming only a
+    thread decide that existing thread. Decisions then run on a worker
+    pool and one JSON result per row is written to ``out`` as it
+    completes. Returns the number of failed rows.
+    """
+    out = out or sys.stdout
+    out_lock = threading.Lock()
+    failures = 0
+    
+    def emit(record):
+        nonlocal failures
+        with out_lock:
+            if not record.get('success'):
+                failures += 1
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+    
+    # Node progress messages go to stderr so stdout stays valid JSONL
+    with contextlib.redirect_stdout(sys.stderr):
+        rows = []
+        for line_no, raw in enumerate(read_batch_rows(source, fmt), 1):
+            try:
+                rows.append((line_no, parse_batch_row(raw)))
+            except (ValueError, TypeError) as e:
+                emit({'line': line_no, 'success': False, 'error': f"Invalid row: {e}"})
+        
+        # Phase 1: analyses (or look up the existing thread)
+        groups = {}
+        for line_no, row in rows:
+            error_record = {'line': line_no, 'thread_id': row['thread_id'],
+                            'department': row['department'], 'success': False}
+            if row['department']:
+                row['thread_id'] = error_record['thread_id'] = row['thread_id'] or tenant_thread_id(f"batch_{uuid.uuid4().hex}")
+                try:
+                    state, _ = run_analysis(row['thread_id'], row['department'], seed=row['seed'])
+                except Exception as e:
+                    emit({**error_record, 'error': f"Analysis failed: {e}"})
+                    continue
+            else:
+                state = graph.get_state({"configurable": {"thread_id": row['thread_id']}}).values
+                if not state:
+                    emit({**error_record, 'error': 'No workflow for this thread'})
+                    continue
+            
+            details = (state or {}).get('proposal_details')
+            if not details:
+                emit({**error_record, 'error': (state or {}).get('final_message') or 'No proposal'})
+                continue
+            needed = 'modified_salary' if state['proposal_type'] == 'salary_hike' else 'modified_manager'
+            if row['decision'] == 'modify' and needed not in row['modification']:
+                emit({**error_record, 'error': f"{state['proposal_type']} proposals are modified with {needed}"})
+                continue
+            # Decisions on the same employee run in file order so a later one sees the earlier write
+            groups.setdefault(details['employee_id'], []).append((line_no, row))
+        
+        # Phase 2: decisions, concurrently across employees
+        def decide(line_no, row):
+            record = {'line': line_no, 'thread_id': row['thread_id'],
+                      'department': row['department'], 'decision': row['decision']}
+            try:
+                final_state, replayed = decision_service.submit(
+                    row['thread_id'], row['decision'], row['modification'],
+                    idempotency_key=row['idempotency_key']
+                )
+            except WorkflowNotFound:
+                return {**record, 'success': False, 'error': 'No workflow for this thread'}
+            except DecisionConflict as e:
+                return {**record, 'success': False, 'error': str(e)}
+            except Exception as e:
+                # e.g. the employee was deleted by a reload; the rest of the file still runs
+                return {**record, 'success': False, 'error': f"Decision failed: {e!r}"}
+            if not replayed:
+                try:
+                    get_history_store().record(final_state, thread_id=row['thread_id'], reviewer=reviewer)
+                except Exception as e:
+                    return {**record, 'success': False, 'status': final_state.get('final_status'),
+                            'error': f"Decision applied but not recorded in history: {e!r}"}
+            details = final_state.get('proposal_details') or {}
+            return {
+                **record,
+                'department': final_state.get('department'),
+                'success': True,
+                'employee_id': details.get('employee_id'),
+                'proposal_type': final_state.get('proposal_type'),
+                'status': final_state.get('final_status'),
+                'message': final_state.get('final_message'),
+                'replayed': replayed,
+            }
+        
+        def decide_group(group):
+            for line_no, row in group:
+                emit(decide(line_no, row))
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for future in as_completed([pool.submit(decide_group, g) for g in groups.values()]):
+                future.result()
+    
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HITL Salary Management System - CLI")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="apply decisions from a JSONL or CSV file ('-' reads stdin) "
+                             "and print JSONL results")
+    parser.add_argument('--format', choices=('jsonl', 'csv'),
+                        help="batch input format (default: from the file extension, else jsonl)")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent decisions in batch mode")
+    parser.add_argument('--reviewer', default=getpass.getuser(), help="reviewer recorded in history")
+    parser.add_argument('--tenant', default=os.environ.get('HITL_TENANT'),
+                        help="dataset to work on (default: the default tenant; also HITL_TENANT)")
+    parser.add_argument('--profile', action='store_true', default=os.environ.get('HITL_PROFILE') == '1',
+                        help="save a cProfile/tracemalloc artifact of this run (also HITL_PROFILE=1)")
+    return parser.parse_args(argv)
+
+
+def run_cli(args) -> int:
+    """Run batch or interactive mode on the chosen tenant; returns the exit code."""
+    try:
+        with use_tenant(args.tenant):
+            return _run_mode(args)
+    except UnknownTenant as e:
+        print(f"❌ {e.args[0]}")
+        return 2
+    finally:
+        # Deliver this run's side effects before the worker threads exit with the process
+        get_outbox().drain()
+
+
+def _run_mode(args) -> int:
+    if args.batch:
+        failures = run_batch(args.batch, fmt=args.format, workers=args.workers, reviewer=args.reviewer)
+        return 1 if failures else 0
     try:
         main()
     except KeyboardInterrupt:
         print("\n\n❌ Workflow cancelled by user.")
-        sys.exit(0)
     except Exception as e:
         print(f"\n\n❌ Error: {str(e)}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.profile:
+        sys.exit(run_cli(args))
+    with profiled('cli') as run:
+        code = run_cli(args)
+    print(f"Profile saved to {run.path}", file=sys.stderr)
+    sys.exit(code)
@@ -5,6 +5,7 @@ import pandas as pd
 from pathlib import Path
 import random
 from datetime import datetime, timedelta
+from src.bands import SALARY_RANGES as salary_ranges
 
 # Set random seed for reproducibility
 random.seed(42)
@@ -42,30 +43,6 @@ last_names = [
     'Sethi', 'Shetty', 'Bansal', 'Jain', 'Yadav', 'Chawla', 'Naidu'
 ]
 
-# Salary ranges by position in Indian Rupees (₹)
-salary_ranges = {
-    'Software Engineer': (5800000, 7500000),
-    'Senior Software Engineer': (7900000, 10000000),
-    'Tech Lead': (10400000, 12500000),
-    'Engineering Manager': (11600000, 14100000),
-    'Sales Representative': (4200000, 5800000),
-    'Senior Sales Rep': (6200000, 7900000),
-    'Sales Manager': (7500000, 10000000),
-    'VP Sales': (10800000, 13300000),
-    'Marketing Specialist': (4600000, 6200000),
-    'Marketing Manager': (6600000, 8700000),
-    'Content Creator': (5000000, 6600000),
-    'Marketing Director': (9100000, 11600000),
-    'HR Specialist': (4600000, 5800000),
-    'HR Manager': (6200000, 7900000),
-    'Recruiter': (4800000, 6200000),
-    'HR Director': (8300000, 10800000),
-    'Financial Analyst': (5400000, 7100000),
-    'Senior Analyst': (7500000, 9500000),
-    'Finance Manager': (8700000, 11200000),
-    'CFO': (12500000, 16600000)
-}
-
 def generate_random_date(start_year=2018, end_year=2023):
     """Generate a random join date."""
     start_date = datetime(start_year, 1, 1)
@@ -0,0 +1,153 @@
+"""
+Admission control for expensive workflow executions.
+
+At most ``max_concurrent`` executions run at once and at most
+``max_waiting`` more wait for a slot, each for up to ``wait_timeout``
+seconds. Anything beyond that is refused immediately with ``Saturated``,
+carrying a retry hint derived from the recent execution time, so a burst
+turns into fast rejections instead of a pile of slow requests.
+
+Concurrent calls with the same key share one execution: the first caller
+runs it and the others wait for its result without taking a slot.
+"""
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+MAX_CONCURRENT = int(os.environ.get('HITL_ANALYZE_CONCURRENCY', 2))
+MAX_WAITING = int(os.environ.get('HITL_ANALYZE_QUEUE', 8))
+WAIT_TIMEOUT = float(os.environ.get('HITL_ANALYZE_WAIT_SECONDS', 10))
+
+
+class Saturated(Exception):
+    """Raised when an execution cannot be admitted in time."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Call:
+    """One execution shared by every caller with the same key."""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class AdmissionController:
+    """Bounded, coalescing execution of keyed calls."""
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_waiting: int = MAX_WAITING,
+                 wait_timeout: float = WAIT_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._waiting = 0
+        self._running = 0
+        self._avg_seconds = 1.0  # moving average of execution time
+        self.admitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = self._waiting + self._running
+        return max(1, math.ceil(self._avg_seconds * backlog / self.max_concurrent))
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` under admission control, sharing it with callers of the same key.
+
+        Returns ``(value, shared)`` where ``shared`` is True when the value
+        came from another caller's execution. Raises ``Saturated`` if no
+        slot frees up in time, and re-raises whatever ``fn`` raised.
+        """
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if not leader:
+                self.coalesced += 1
+            else:
+                acquired = self._slots.acquire(blocking=False)
+                if not acquired:
+                    if self._waiting >= self.max_waiting:
+                        self.rejected += 1
+                        raise Saturated("Too many analyses in progress", self.retry_after())
+                    self._waiting += 1
+                call = _Call()
+                self._inflight[key] = call
+
+        if not leader:
+            return self._follow(call), True
+
+        if not acquired:
+            acquired = self._slots.acquire(timeout=self.wait_timeout)
+            with self._lock:
+                self._waiting -= 1
+                if not acquired:
+                    self.timed_out += 1
+            if not acquired:
+                error = Saturated("Timed out waiting for an analysis slot", self.retry_after())
+                self._finish(key, call, error=error)
+                raise error
+
+        with self._lock:
+            self._running += 1
+            self.admitted += 1
+        started = time.monotonic()
+        try:
+            value = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        finally:
+            self._slots.release()
+            with self._lock:
+                self._running -= 1
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - started)
+        self._finish(key, call, value=value)
+        return value, False
+
+    def _follow(self, call: _Call) -> Any:
+        if not call.done.wait(self.wait_timeout):
+            with self._lock:
+                self.timed_out += 1
+            raise Saturated("Timed out waiting for an identical analysis", self.retry_after())
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def _finish(self, key: Hashable, call: _Call, value: Any = None,
+                error: Optional[BaseException] = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        call.value, call.error = value, error
+        call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'running': self._running,
+                'waiting': self._waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_waiting': self.max_waiting,
+                'admitted': self.admitted,
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_seconds': round(self._avg_seconds, 3),
+            }
+
+
+# Shared instance guarding /analyze
+analysis_admission = AdmissionController()
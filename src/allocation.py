@@ -0,0 +1,129 @@
+"""
+Budget-constrained allocation of salary raises across departments.
+"""
+import uuid
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from .bands import band_columns
+from .data_store import get_store
+from .tenants import tenant_thread_id
+from .policy import ProposalPolicy, get_policy, whole_percentage
+from .workflow import start_paused_thread
+
+SCORES = ('band_gap', 'tenure', 'band_gap_tenure')
+
+
+def candidate_scores(frame: pd.DataFrame, score: str = 'band_gap',
+                     as_of: Optional[pd.Timestamp] = None) -> pd.Series:
+    """
+    Score employees for a raise; higher means more deserving.
+
+    ``band_gap`` is the relative distance below the band midpoint (0 at or
+    above it), ``tenure`` is years of service and ``band_gap_tenure`` is
+    their product.
+    """
+    if score not in SCORES:
+        raise ValueError(f"Unknown score '{score}'; expected one of {', '.join(SCORES)}")
+    as_of = as_of or pd.Timestamp.now().normalize()
+    band_mid = band_columns(frame['Position'])['band_mid']
+    band_gap = ((band_mid - frame['Current_Salary']) / band_mid).clip(lower=0).fillna(0)
+    tenure = ((as_of - pd.to_datetime(frame['Join_Date'])).dt.days / 365.25).clip(lower=0)
+    if score == 'band_gap':
+        return band_gap
+    if score == 'tenure':
+        return tenure
+    return band_gap * tenure
+
+
+def allocate_raises(frame: pd.DataFrame, total_budget: float,
+                    department_caps: Optional[Dict[str, float]] = None,
+                    score: str = 'band_gap',
+                    policy: Optional[ProposalPolicy] = None) -> pd.DataFrame:
+    """
+    Choose which policy-eligible raises to fund within the budget.
+
+    Candidates and their raise amounts come from the hike policy. They are
+    ranked by score per rupee and funded greedily in that order: a
+    candidate is funded if its cost fits both what is left of its
+    department's cap and of ``total_budget``; one that does not fit is
+    skipped and lower-ranked, cheaper ones are still considered. The
+    ranking is vectorized and the pass is one loop over plain lists, so
+    100k candidates take well under a second.
+
+    Returns the funded raises in rank order.
+    """
+    policy = policy or get_policy()
+    proposals = policy.evaluate(frame)
+    candidates = frame.loc[proposals.index, ['Employee_ID', 'Name', 'Department', 'Position']].copy()
+    candidates['current_salary'] = proposals['current_salary']
+    candidates['proposed_salary'] = proposals['proposed_salary']
+    candidates['increase_percentage'] = proposals['increase_percentage']
+    candidates['cost'] = proposals['proposed_salary'] - proposals['current_salary']
+    candidates['score'] = candidate_scores(frame.loc[proposals.index], score)
+    candidates['reason'] = proposals['reason']
+    candidates = candidates[(candidates['cost'] > 0) & (candidates['score'] > 0)]
+
+    # Best value first: score per rupee, ties broken by higher score
+    value = candidates['score'] / candidates['cost']
+    order = np.lexsort((-candidates['score'].to_numpy(), -value.to_numpy()))
+    ranked = candidates.iloc[order]
+
+    ranked = ranked[_fund_greedily(ranked, total_budget, department_caps or {})].copy()
+    ranked['rank'] = np.arange(1, len(ranked) + 1)
+    return ranked.reset_index(drop=True)
+
+
+def _fund_greedily(ranked: pd.DataFrame, total_budget: float,
+                   department_caps: Dict[str, float]) -> np.ndarray:
+    """Mask of the ranked candidates funded in one pass down the ranking."""
+    costs = ranked['cost'].to_numpy(dtype=float)
+    codes, departments = pd.factorize(ranked['Department'])
+    cap_left = [float(department_caps.get(str(d), np.inf)) for d in departments]
+    # Nothing further down can be funded once the budget is below the cheapest remaining cost
+    cheapest_left = np.minimum.accumulate(costs[::-1])[::-1].tolist()
+    budget_left = float(total_budget)
+    funded = np.zeros(len(costs), dtype=bool)
+    for i, (cost, code) in enumerate(zip(costs.tolist(), codes.tolist())):
+        if budget_left < cheapest_left[i]:
+            break
+        if cost <= budget_left and cost <= cap_left[code]:
+            funded[i] = True
+            budget_left -= cost
+            cap_left[code] -= cost
+    return funded
+
+
+def seed_proposals(ranked: pd.DataFrame, limit: int = 100,
+                   policy: Optional[ProposalPolicy] = None) -> List[str]:
+    """
+    Start a paused HITL thread for each of the top ``limit`` funded raises.
+
+    Returns the new thread ids in rank order.
+    """
+    policy = policy or get_policy()
+    store = get_store()
+    thread_ids = []
+    for row in ranked.head(limit).to_dict('records'):
+        employee = store.employee(row['Employee_ID'])
+        thread_id = tenant_thread_id(f"alloc_{uuid.uuid4().hex}", store.tenant)
+        start_paused_thread(thread_id, {
+            "department": row['Department'],
+            "employees": [employee],
+            "highest_paid": employee,
+            "proposal_type": "salary_hike",
+            "proposal_details": {
+                'employee_id': row['Employee_ID'],
+                'employee_name': row['Name'],
+                'current_salary': int(row['current_salary']),
+                'proposed_salary': int(row['proposed_salary']),
+                'increase_percentage': whole_percentage(row['increase_percentage']),
+                'reason': row['reason'],
+                'allocation_rank': int(row['rank']),
+                'allocation_score': float(row['score'])
+            },
+            "policy_version": policy.version,
+            "execution_log": [f"Budget allocation ranked {row['Name']} #{row['rank']}"]
+        })
+        thread_ids.append(thread_id)
+    return thread_ids
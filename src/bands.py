@@ -0,0 +1,41 @@
+"""
+Salary bands by position.
+"""
+import numpy as np
+import pandas as pd
+
+# Salary ranges by position in Indian Rupees (₹)
+SALARY_RANGES = {
+    'Software Engineer': (5800000, 7500000),
+    'Senior Software Engineer': (7900000, 10000000),
+    'Tech Lead': (10400000, 12500000),
+    'Engineering Manager': (11600000, 14100000),
+    'Sales Representative': (4200000, 5800000),
+    'Senior Sales Rep': (6200000, 7900000),
+    'Sales Manager': (7500000, 10000000),
+    'VP Sales': (10800000, 13300000),
+    'Marketing Specialist': (4600000, 6200000),
+    'Marketing Manager': (6600000, 8700000),
+    'Content Creator': (5000000, 6600000),
+    'Marketing Director': (9100000, 11600000),
+    'HR Specialist': (4600000, 5800000),
+    'HR Manager': (6200000, 7900000),
+    'Recruiter': (4800000, 6200000),
+    'HR Director': (8300000, 10800000),
+    'Financial Analyst': (5400000, 7100000),
+    'Senior Analyst': (7500000, 9500000),
+    'Finance Manager': (8700000, 11200000),
+    'CFO': (12500000, 16600000)
+}
+
+_BAND_TABLE = pd.DataFrame.from_dict(SALARY_RANGES, orient='index', columns=['band_min', 'band_max'])
+_BAND_TABLE['band_mid'] = (_BAND_TABLE['band_min'] + _BAND_TABLE['band_max']) / 2
+
+
+def band_columns(positions: pd.Series) -> pd.DataFrame:
+    """Look up band min/max/midpoint for a column of positions (NaN if unknown)."""
+    # Look up each distinct position once, then broadcast by code
+    codes, uniques = pd.factorize(positions)
+    table = _BAND_TABLE.reindex(uniques).to_numpy()
+    table = np.vstack([table, np.full((1, table.shape[1]), np.nan)])
+    return pd.DataFrame(table[codes], index=positions.index, columns=_BAND_TABLE.columns)
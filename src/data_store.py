@@ -0,0 +1,576 @@
+"""
+Data access helpers for the salary dataset.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+import pandas as pd
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+from .employee import Employee, employees_from_frame
+from .hierarchy import HierarchyIndex
+from .schema import assign, normalize, summarize
+from .tenants import DEFAULT_TENANT, current_tenant, tenant_source
+
+DATA_PATH = tenant_source(DEFAULT_TENANT)
+
+# Approved changes are appended here and folded into the workbook on compaction
+COMPACT_THRESHOLD = 200
+
+# Loaded tenant stores are evicted least recently used first beyond these
+STORE_MEMORY_BYTES = int(os.environ.get('HITL_STORE_MEMORY_MB', 2048)) * 1024 * 1024
+MAX_STORES = int(os.environ.get('HITL_MAX_STORES', 32))
+INDEX_OVERHEAD = 2  # frame plus the indexes built over it
+
+
+def read_workbook(path: Path = DATA_PATH):
+    """Validated, typed rows of a salary workbook and the report of rejected rows."""
+    frame, issues = normalize(pd.read_excel(path))
+    if len(issues):
+        print(f"[Store] Rejected {issues['row'].nunique()} rows of {Path(path).name}:\n{summarize(issues)}")
+    return frame, issues
+
+
+def load_salary_data(path: Path = DATA_PATH) -> pd.DataFrame:
+    """Load the valid rows of the salary workbook into a typed DataFrame."""
+    return read_workbook(path)[0]
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """Return a short content hash identifying this version of the dataset."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def department_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-department salary aggregates in a single grouped pass.
+
+    Besides count/mean/min/max this includes the quartiles needed to draw a
+    box plot, so charts never have to ship every salary to the browser.
+    """
+    grouped = df.groupby('Department', observed=True)['Current_Salary']
+    summary = grouped.agg(['count', 'mean', 'min', 'max'])
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack().reindex(columns=[0.25, 0.5, 0.75])
+    summary['q1'] = quartiles[0.25]
+    summary['median'] = quartiles[0.5]
+    summary['q3'] = quartiles[0.75]
+    summary = summary.round(0).reset_index()
+    summary.columns = [
+        'Department', 'Employees', 'Avg Salary', 'Min Salary', 'Max Salary',
+        'Q1', 'Median', 'Q3'
+    ]
+    return summary
+
+
+def row_fingerprints(frame: pd.DataFrame) -> pd.Series:
+    """Hash every row of a frame indexed by Employee_ID."""
+    return pd.Series(
+        pd.util.hash_pandas_object(frame, index=False).values,
+        index=frame.index
+    )
+
+
+def _json_value(value):
+    """Convert numpy scalars to plain Python values for the delta log."""
+    return value.item() if hasattr(value, 'item') else value
+
+
+class SalaryDataStore:
+    """
+    In-memory view of the salary workbook with write-back of approved changes.
+
+    Changes are first appended to a delta log next to the workbook (one JSON
+    line per change) and then applied to the loaded frame, the department
+    aggregates and the top-earner index in place. Once the log grows past
+    ``compact_threshold`` entries it is folded into the workbook in a single
+    rewrite on a background thread, so neither the approval that crossed
+    the threshold nor concurrent readers wait for it. On startup the log is replayed over the workbook, so approved
+    changes survive restarts without rewriting the workbook each time.
+
+    When a new workbook is dropped in place, ``refresh`` diffs it row by row
+    (fingerprinted per Employee_ID) against what is loaded and rebuilds only
+    the departments that actually changed. Paused workflow threads register
+    the employee their proposal is about with ``watch``; if that employee
+    changes underneath them the thread is flagged as stale.
+
+    Workbook rows that fail the schema checks in ``schema.normalize`` are
+    left out; the latest report of them is kept in ``issues``.
+
+    Indexes derived elsewhere (search, equity) are kept in ``cache`` so
+    they are dropped together with the store.
+    """
+
+    def __init__(self, path: Path = DATA_PATH, delta_path: Optional[Path] = None,
+                 compact_threshold: int = COMPACT_THRESHOLD, tenant: str = DEFAULT_TENANT):
+        self.tenant = tenant
+        self.cache: Dict[str, Any] = {}
+        self.path = Path(path)
+        self.delta_path = Path(delta_path) if delta_path else self.path.with_suffix('.delta.jsonl')
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._watched: Dict[str, Any] = {}
+        self._watchers: Dict[Any, set] = {}
+        self._stale: set = set()
+        self._compactor: Optional[threading.Thread] = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _file_stamp(self):
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        df, self.issues = read_workbook(self.path)
+        self._base_version = data_version(df)
+        self._file_signature = self._file_stamp()
+        self.frame = df.set_index('Employee_ID', drop=False)
+        self._seq = 0
+        self._pending = 0
+        self._build_indexes()
+        self._hashes = row_fingerprints(self.frame)
+        self.nbytes = int(self.frame.memory_usage(deep=True).sum()) * INDEX_OVERHEAD
+        for entry in self._read_delta_log():
+            self._apply(entry['employee_id'], entry['changes'])
+            self._seq += 1
+            self._pending += 1
+
+    def _read_delta_log(self) -> List[Dict[str, Any]]:
+        if not self.delta_path.exists():
+            return []
+        entries = []
+        with open(self.delta_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; it was never acknowledged
+                    break
+        return entries
+
+    def _build_indexes(self):
+        self._dept_ids = {}
+        self._summary = department_summary(self.frame.iloc[0:0]).set_index('Department', drop=False)
+        self._top = {}
+        self._refresh_departments(set(self.frame['Department']))
+        self._hierarchy = HierarchyIndex(self.frame)
+
+    def _refresh_departments(self, departments: set):
+        """Rebuild partitions, aggregates and top earners for some departments."""
+        subset = self.frame[self.frame['Department'].isin(departments)]
+        groups = subset.groupby('Department', observed=True).groups
+        summary = department_summary(subset).set_index('Department', drop=False)
+        for dept in departments:
+            if dept in groups:
+                self._dept_ids[dept] = groups[dept]
+                self._summary.loc[dept] = summary.loc[dept]
+                self._refresh_top(dept)
+            else:
+                self._dept_ids.pop(dept, None)
+                self._top.pop(dept, None)
+                self._summary = self._summary.drop(index=dept, errors='ignore')
+
+    def _refresh_top(self, dept: str):
+        salaries = self.frame.loc[self._dept_ids[dept], 'Current_Salary']
+        top_id = salaries.idxmax()
+        self._top[dept] = (salaries[top_id], top_id)
+
+    def _refresh_summary(self, dept: str):
+        dept_frame = self.frame.loc[self._dept_ids[dept]]
+        row = department_summary(dept_frame).set_index('Department', drop=False)
+        self._summary.loc[dept] = row.loc[dept]
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Pick up a new workbook by applying only the rows that changed.
+
+        Returns None when the file is unchanged, otherwise the inserted,
+        updated and deleted Employee_IDs and the departments refreshed.
+        """
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._file_signature:
+                return None
+
+            df, issues = read_workbook(self.path)
+            incoming = df.set_index('Employee_ID', drop=False)
+            entries = self._read_delta_log()
+            for entry in entries:
+                # Approved changes not yet compacted still apply on top of the new file
+                if entry['employee_id'] in incoming.index:
+                    for column, value in entry['changes'].items():
+                        assign(incoming, entry['employee_id'], column, value)
+
+            new_hashes = row_fingerprints(incoming)
+            old_hashes = self._hashes
+            inserted = new_hashes.index.difference(old_hashes.index)
+            deleted = old_hashes.index.difference(new_hashes.index)
+            common = new_hashes.index.intersection(old_hashes.index)
+            updated = common[new_hashes[common].values != old_hashes[common].values]
+
+            departments = (
+                set(incoming.loc[inserted.union(updated), 'Department'])
+                | set(self.frame.loc[deleted.union(updated), 'Department'])
+            )
+
+            self.frame = incoming
+            self.issues = issues
+            self._hashes = new_hashes
+            self._base_version = data_version(df)
+            self._file_signature = stamp
+            self._seq = len(entries)
+            self._pending = len(entries)
+            self._refresh_departments(departments)
+            if departments:
+                self._hierarchy = HierarchyIndex(self.frame)
+            self.nbytes = int(self.frame.memory_usage(deep=True).sum()) * INDEX_OVERHEAD
+            self._flag_stale(set(updated) | set(deleted))
+
+            changes = {
+                'inserted': inserted.tolist(),
+                'updated': updated.tolist(),
+                'deleted': deleted.tolist(),
+                'departments': sorted(departments),
+            }
+            print(
+                f"[Store] Reloaded {self.path.name}: {len(inserted)} inserted, "
+                f"{len(updated)} updated, {len(deleted)} deleted"
+            )
+            return changes
+
+    # ------------------------------------------------------------------
+    # In-flight proposal tracking
+    # ------------------------------------------------------------------
+
+    def watch(self, thread_id: str, employee_id):
+        """Remember that a paused thread's proposal is about this employee."""
+        employee_id = _json_value(employee_id)
+        with self._lock:
+            self.unwatch(thread_id)
+            self._watched[thread_id] = employee_id
+            self._watchers.setdefault(employee_id, set()).add(thread_id)
+
+    def unwatch(self, thread_id: str):
+        with self._lock:
+            employee_id = self._watched.pop(thread_id, None)
+            if employee_id is not None:
+                self._watchers.get(employee_id, set()).discard(thread_id)
+            self._stale.discard(thread_id)
+
+    def watches(self) -> Dict[str, Any]:
+        """Watched threads and stale flags, to carry over a reload."""
+        with self._lock:
+            return {'watched': dict(self._watched), 'stale': set(self._stale)}
+
+    def restore_watches(self, state: Optional[Dict[str, Any]]):
+        if not state:
+            return
+        with self._lock:
+            for thread_id, employee_id in state['watched'].items():
+                self.watch(thread_id, employee_id)
+            self._stale |= state['stale'] & set(self._watched)
+
+    def is_stale(self, thread_id: str) -> bool:
+        """True if the employee behind a paused proposal changed since analysis."""
+        with self._lock:
+            return thread_id in self._stale
+
+    def _flag_stale(self, employee_ids, exclude: Optional[str] = None):
+        for employee_id in employee_ids:
+            for thread_id in self._watchers.get(employee_id, ()):
+                if thread_id != exclude:
+                    self._stale.add(thread_id)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @property
+    def version(self) -> str:
+        """Identifies the current contents: workbook hash plus applied changes."""
+        return f"{self._base_version}.{self._seq}"
+
+    def departments(self) -> List[str]:
+        with self._lock:
+            return sorted(self._dept_ids)
+
+    def summary(self) -> pd.DataFrame:
+        """Department aggregates, kept up to date as changes are applied."""
+        with self._lock:
+            return self._summary.sort_index().reset_index(drop=True)
+
+    def department_employees(self, department: str) -> pd.DataFrame:
+        with self._lock:
+            ids = self._dept_ids.get(department)
+            if ids is None:
+                return self.frame.iloc[0:0]
+            return self.frame.loc[ids]
+
+    def department_size(self, department: str) -> int:
+        with self._lock:
+            return len(self._dept_ids.get(department, ()))
+
+    def department_slice(self, department: str, start: int = 0, stop: Optional[int] = None,
+                         columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows ``start:stop`` of a department, optionally only some columns."""
+        with self._lock:
+            columns = list(self.frame.columns) if columns is None else columns
+            ids = self._dept_ids.get(department)
+            if ids is None:
+                return self.frame.iloc[0:0][columns]
+            return self.frame.loc[ids[start:stop], columns]
+
+    def department_records(self, department: str) -> List[Employee]:
+        """Employees of a department as compact records."""
+        return employees_from_frame(self.department_employees(department))
+
+    def employee(self, employee_id) -> Optional[Employee]:
+        with self._lock:
+            if employee_id not in self.frame.index:
+                return None
+            return Employee.from_dict(self.frame.loc[employee_id])
+
+    def hierarchy(self) -> HierarchyIndex:
+        """Reporting hierarchy of the current data, updated as changes are applied."""
+        with self._lock:
+            return self._hierarchy
+
+    def top_earner(self, department: str) -> Optional[Employee]:
+        """Return the highest-paid employee of a department from the index."""
+        with self._lock:
+            if department not in self._top:
+                return None
+            _, employee_id = self._top[department]
+            return Employee.from_dict(self.frame.loc[employee_id])
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _apply(self, employee_id, changes: Dict[str, Any]):
+        if employee_id not in self.frame.index:
+            return
+        dept = self.frame.at[employee_id, 'Department']
+        for column, value in changes.items():
+            assign(self.frame, employee_id, column, value)
+        self._hashes[employee_id] = row_fingerprints(self.frame.loc[[employee_id]]).iloc[0]
+        if 'Current_Salary' in changes:
+            salary = changes['Current_Salary']
+            top_salary, top_id = self._top[dept]
+            if salary >= top_salary:
+                self._top[dept] = (salary, employee_id)
+            elif top_id == employee_id:
+                self._refresh_top(dept)
+            self._refresh_summary(dept)
+        if 'Name' in changes or ('Manager' in changes and
+                                 not self._hierarchy.move(employee_id, changes['Manager'])):
+            self._hierarchy = HierarchyIndex(self.frame)
+
+    def apply_changes(self, employee_id, changes: Dict[str, Any],
+                      thread_id: Optional[str] = None) -> str:
+        """
+        Durably apply changes to one employee and return the new data version.
+
+        The delta log entry is written and fsynced before anything in memory
+        changes, so a failed write leaves the store untouched.
+        """
+        employee_id = _json_value(employee_id)
+        changes = {column: _json_value(value) for column, value in changes.items()}
+        with self._lock:
+            if employee_id not in self.frame.index:
+                raise KeyError(f"Unknown employee: {employee_id}")
+            entry = {
+                'seq': self._seq + 1,
+                'employee_id': employee_id,
+                'changes': changes,
+                'thread_id': thread_id,
+                'applied_at': time.time(),
+            }
+            with open(self.delta_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(employee_id, changes)
+            self._flag_stale([employee_id], exclude=thread_id)
+            self._seq += 1
+            self._pending += 1
+            if self._pending >= self.compact_threshold:
+                self._start_compaction()
+            return self.version
+
+    def _start_compaction(self):
+        """Compact on a background thread unless one is already running."""
+        def run():
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"[Store] Compaction of {self.path.name} failed: {e}")
+
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=run, name="salary-data-compactor", daemon=True)
+                self._compactor.start()
+
+    def compact(self):
+        """
+        Fold the delta log into the workbook and drop the folded entries.
+
+        The workbook is written from a snapshot without holding the lock;
+        changes applied meanwhile stay in the log. If the workbook was
+        replaced in the meantime, the compaction is abandoned.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            snapshot = self.frame.copy()
+            folded = self._pending
+            signature = self._file_signature
+        tmp_path = self.path.with_suffix('.compacting.xlsx')
+        snapshot.to_excel(tmp_path, index=False, sheet_name='Employees')
+        with self._lock:
+            if self._file_signature != signature or self._pending < folded:
+                tmp_path.unlink(missing_ok=True)
+                return
+            # Workbook first: a crash before the log is trimmed only replays folded entries
+            os.replace(tmp_path, self.path)
+            with open(self.delta_path, encoding='utf-8') as f:
+                remaining = f.readlines()[folded:]
+            tmp_log = self.delta_path.with_suffix('.compacting')
+            with open(tmp_log, 'w', encoding='utf-8') as f:
+                f.writelines(remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_log, self.delta_path)
+            self._file_signature = self._file_stamp()
+            self._pending -= folded
+
+
+class StoreRegistry:
+    """
+    Per-tenant stores, loaded on first use and held in an LRU.
+
+    Stores beyond ``max_bytes`` of estimated memory or ``max_stores`` in
+    number are evicted least recently used first (never the one just
+    requested). An evicted tenant is reloaded from its workbook and delta
+    log on next use; its watched threads are carried over. While anything
+    still holds an evicted store (a decision being written, a compaction),
+    the next use takes that store back instead, so only one live store
+    ever appends to and compacts a tenant's delta log. Callbacks
+    registered with ``on_load`` run for every store as it is loaded, e.g.
+    to start building derived indexes in the background.
+    """
+
+    def __init__(self, max_bytes: int = STORE_MEMORY_BYTES, max_stores: int = MAX_STORES):
+        self.max_bytes = max_bytes
+        self.max_stores = max_stores
+        self._stores: "OrderedDict[str, SalaryDataStore]" = OrderedDict()
+        self._evicted: "weakref.WeakValueDictionary[str, SalaryDataStore]" = weakref.WeakValueDictionary()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._watches: Dict[str, Dict[str, Any]] = {}
+        self._on_load: List[Callable[[SalaryDataStore], None]] = []
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant: str) -> SalaryDataStore:
+        with self._lock:
+            store = self._stores.get(tenant)
+            if store is not None:
+                self._stores.move_to_end(tenant)
+                return store
+            store = self._evicted.pop(tenant, None)
+            if store is not None:
+                # Still in use since eviction; its own watches are current
+                self._watches.pop(tenant, None)
+                self._stores[tenant] = store
+                self._evict(keep=tenant)
+                return store
+            loading = self._loading.setdefault(tenant, threading.Lock())
+        # Load outside the registry lock so other tenants stay available
+        with loading:
+            with self._lock:
+                store = self._stores.get(tenant)
+                if store is not None:
+                    return store
+            store = SalaryDataStore(tenant_source(tenant), tenant=tenant)
+            with self._lock:
+                store.restore_watches(self._watches.pop(tenant, None))
+                self._stores[tenant] = store
+                self.loads += 1
+                self._evict(keep=tenant)
+                callbacks = list(self._on_load)
+            for callback in callbacks:
+                callback(store)
+            return store
+
+    def on_load(self, callback: Callable[[SalaryDataStore], None]):
+        """Call ``callback(store)`` for each store loaded from now on and each already loaded."""
+        with self._lock:
+            self._on_load.append(callback)
+            loaded = list(self._stores.values())
+        for store in loaded:
+            callback(store)
+
+    def _evict(self, keep: str):
+        while len(self._stores) > 1 and (
+            len(self._stores) > self.max_stores
+            or sum(s.nbytes for s in self._stores.values()) > self.max_bytes
+        ):
+            tenant = next(t for t in self._stores if t != keep)
+            store = self._stores.pop(tenant)
+            self._watches[tenant] = store.watches()
+            self._evicted[tenant] = store
+            self.evictions += 1
+            print(f"[Store] Evicted tenant {tenant}")
+
+    def loaded(self) -> List[SalaryDataStore]:
+        with self._lock:
+            return list(self._stores.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'loaded': {t: {'employees': len(s.frame), 'bytes': s.nbytes, 'version': s.version}
+                           for t, s in self._stores.items()},
+                'bytes': sum(s.nbytes for s in self._stores.values()),
+                'max_bytes': self.max_bytes,
+                'max_stores': self.max_stores,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
+
+
+stores = StoreRegistry()
+_poller: Optional[threading.Thread] = None
+_poller_lock = threading.Lock()
+
+
+def get_store(tenant: Optional[str] = None) -> SalaryDataStore:
+    """Return a tenant's data store (the current tenant's by default), loading it on first use."""
+    return stores.get(tenant or current_tenant())
+
+
+def start_polling(interval: float = 30.0):
+    """Check every loaded tenant's workbook for changes every ``interval`` seconds."""
+    global _poller
+
+    def poll():
+        while True:
+            time.sleep(interval)
+            for store in stores.loaded():
+                try:
+                    store.refresh()
+                except Exception as e:
+                    print(f"[Store] Refresh of {store.tenant} failed: {e}")
+
+    with _poller_lock:
+        if _poller is None:
+            _poller = threading.Thread(target=poll, name="salary-data-poller", daemon=True)
+            _poller.start()
@@ -0,0 +1,145 @@
+"""
+Idempotent submission of human decisions to paused workflow threads.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from .workflow import graph as default_graph
+from .data_store import get_store
+from .review_queue import LeaseError, review_queue
+from .tenants import thread_tenant
+
+MAX_CACHED_RESULTS = 10000
+LOCK_STRIPES = 64
+
+
+class WorkflowNotFound(LookupError):
+    """Raised when a thread has no paused or finished workflow."""
+
+
+class DecisionConflict(Exception):
+    """Raised when a decision does not match the thread's current checkpoint."""
+
+    def __init__(self, message: str, state: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.state = state or {}
+
+
+class DecisionService:
+    """
+    Applies decisions with idempotency keys and checkpoint compare-and-set.
+
+    Decisions for the same thread are serialized on a striped lock. Inside
+    the lock the latest checkpoint id is compared with the one the reviewer
+    saw (``expected_checkpoint``) before ``update_state`` runs, so only one
+    of several concurrent submissions resumes the graph. Repeated
+    submissions (same idempotency key, or the same decision on a finished
+    thread) return the stored final state without re-running any node.
+    Approving or modifying a proposal whose employee changed since analysis
+    is refused; it can still be rejected.
+    """
+
+    def __init__(self, graph=default_graph, max_cached: int = MAX_CACHED_RESULTS):
+        self._graph = graph
+        self._max_cached = max_cached
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock_for(self, thread_id: str) -> threading.Lock:
+        return self._stripes[zlib.crc32(thread_id.encode()) % LOCK_STRIPES]
+
+    def _cached(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        with self._results_lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def _remember(self, key: Optional[str], result: Dict[str, Any]):
+        if key is None:
+            return
+        with self._results_lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self._max_cached:
+                self._results.popitem(last=False)
+
+    def checkpoint_id(self, thread_id: str) -> Optional[str]:
+        """Return the id of the latest checkpoint of a thread."""
+        snapshot = self._graph.get_state({"configurable": {"thread_id": thread_id}})
+        return snapshot.config.get("configurable", {}).get("checkpoint_id")
+
+    def submit(self, thread_id: str, decision: str,
+               modification: Optional[Dict[str, Any]] = None,
+               idempotency_key: Optional[str] = None,
+               expected_checkpoint: Optional[str] = None,
+               lease: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Apply a decision and resume the workflow.
+
+        A thread another reviewer has leased from the review queue can only
+        be decided with that lease.
+
+        Returns ``(final_state, replayed)`` where ``replayed`` is True when
+        the result came from an earlier submission rather than a new run.
+        """
+        key = f"{thread_id}:{idempotency_key}" if idempotency_key else None
+        cached = self._cached(key)
+        if cached is not None:
+            return cached, True
+
+        config = {"configurable": {"thread_id": thread_id}}
+        with self._lock_for(thread_id):
+            cached = self._cached(key)
+            if cached is not None:
+                return cached, True
+
+            snapshot = self._graph.get_state(config)
+            values = snapshot.values or {}
+            if not values:
+                raise WorkflowNotFound(f"No workflow for thread {thread_id}")
+
+            if values.get('final_status') and not snapshot.next:
+                # Already decided: a duplicate of that decision replays its result
+                review_queue.complete(thread_id)
+                if values.get('human_decision') == decision:
+                    self._remember(key, values)
+                    return values, True
+                raise DecisionConflict("Workflow was already decided", values)
+
+            current = snapshot.config["configurable"].get("checkpoint_id")
+            if expected_checkpoint and expected_checkpoint != current:
+                raise DecisionConflict("Workflow changed since it was loaded")
+            if "human_approval" not in snapshot.next:
+                raise DecisionConflict("Workflow is not awaiting a decision")
+            try:
+                review_queue.check_decision(thread_id, lease)
+            except LeaseError as e:
+                raise DecisionConflict(str(e))
+            if decision != "reject" and get_store(thread_tenant(thread_id)).is_stale(thread_id):
+                raise DecisionConflict(
+                    "Employee record changed since this proposal was made; re-run the analysis"
+                )
+
+            update_data = {"human_decision": decision}
+            if modification:
+                update_data["modification_details"] = modification
+            # Explicit as_node so threads seeded via start_paused_thread resume the same way
+            self._graph.update_state(snapshot.config, update_data, as_node="analyze_department")
+
+            final_result = None
+            for event in self._graph.stream(None, config, stream_mode="values"):
+                final_result = event
+
+            get_store(thread_tenant(thread_id)).unwatch(thread_id)
+            review_queue.complete(thread_id)
+            self._remember(key, final_result)
+            return final_result, False
+
+
+# Shared instance used by the UIs
+decision_service = DecisionService()
@@ -0,0 +1,89 @@
+"""
+Compact employee record passed through workflow state.
+
+``Employee`` uses ``__slots__`` and holds plain Python scalars, so a
+record costs a fraction of the equivalent seven-key dict of boxed numpy
+values and its fields are read as attributes. ``to_dict`` gives the
+original column-keyed form for JSON responses and UI tables. Join dates
+are carried as ``YYYY-MM-DD`` strings.
+"""
+from typing import Any, Dict, Iterable, List, Mapping
+import pandas as pd
+
+# Spreadsheet columns and the matching record attributes, in order
+COLUMNS = ('Employee_ID', 'Name', 'Department', 'Position', 'Current_Salary', 'Manager', 'Join_Date')
+FIELDS = ('employee_id', 'name', 'department', 'position', 'current_salary', 'manager', 'join_date')
+
+
+class Employee:
+    """A single employee row."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, employee_id: int, name: str, department: str, position: str,
+                 current_salary: int, manager: str, join_date: str):
+        self.employee_id = employee_id
+        self.name = name
+        self.department = department
+        self.position = position
+        self.current_salary = current_salary
+        self.manager = manager
+        self.join_date = join_date
+
+    @classmethod
+    def from_dict(cls, row: Mapping[str, Any]) -> "Employee":
+        """Build from a column-keyed mapping such as a DataFrame row."""
+        return cls(
+            int(row['Employee_ID']), str(row['Name']), str(row['Department']),
+            str(row['Position']), int(row['Current_Salary']), str(row['Manager']),
+            _date_string(row['Join_Date'])
+        )
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, f) for f in FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Column-keyed dict, as used by the JSON API and UI tables."""
+        return dict(zip(COLUMNS, self.values()))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Employee) and self.values() == other.values()
+
+    def __hash__(self):
+        return hash(self.employee_id)
+
+    def __repr__(self) -> str:
+        return f"Employee({self.employee_id}, {self.name!r}, {self.department!r})"
+
+
+def _date_string(value) -> str:
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+
+def _shared_strings(column: pd.Series) -> List[str]:
+    # Repeated values (departments, managers, dates) share one str object
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    if pd.api.types.is_datetime64_any_dtype(uniques):
+        uniques = uniques.strftime('%Y-%m-%d').tolist()
+    else:
+        uniques = [str(value) for value in uniques.tolist()]
+    return [uniques[code] for code in codes.tolist()]
+
+
+def employees_from_frame(frame: pd.DataFrame) -> List[Employee]:
+    """Convert a salary frame to records, one column conversion per field."""
+    columns = [
+        frame[c].tolist() if c in ('Employee_ID', 'Current_Salary') else _shared_strings(frame[c])
+        for c in COLUMNS
+    ]
+    return [Employee(*row) for row in zip(*columns)]
+
+
+def employees_to_records(employees: Iterable[Employee]) -> List[Dict[str, Any]]:
+    """Column-keyed dicts for JSON serialization."""
+    return [dict(zip(COLUMNS, e.values())) for e in employees]
+
+
+def employees_to_frame(employees: Iterable[Employee]) -> pd.DataFrame:
+    """DataFrame with the spreadsheet columns, for display."""
+    return pd.DataFrame([e.values() for e in employees], columns=list(COLUMNS))
@@ -0,0 +1,167 @@
+"""
+Fast JSON encoding for responses built from numpy/pandas-typed state.
+
+``dumps`` natively handles numpy scalars and arrays, pandas Timestamps,
+NaT/NA and NaN (as null), Series, DataFrames (as records) and
+``Employee`` records, so nothing has to be converted by hand before it is
+returned. It uses orjson when it is installed (numpy arrays are then
+serialized in C) and the standard library otherwise.
+
+A ``Fragment`` is JSON that was encoded earlier; ``dumps`` splices it in
+verbatim. ``employees_fragment`` keeps one per department and data
+version in the store's cache, so the employee list of an ``/analyze``
+response is encoded once per version instead of once per request.
+"""
+import datetime
+import json
+import math
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, List, Optional
+from .employee import Employee, employees_to_records
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+NATIVE_FRAGMENTS = orjson is not None and hasattr(orjson, 'Fragment')  # orjson >= 3.9.13
+
+
+class Fragment:
+    """Pre-encoded JSON inserted as is."""
+
+    __slots__ = ('data', 'native')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.native = orjson.Fragment(data) if NATIVE_FRAGMENTS else None
+
+
+def default(obj: Any) -> Any:
+    """JSON-compatible form of values the encoders do not handle natively."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        value = float(obj)
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, pd.Timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, Employee):
+        return obj.to_dict()
+    if isinstance(obj, pd.DataFrame):
+        return records(obj)
+    if isinstance(obj, pd.Series):
+        return obj.astype(object).where(obj.notna(), None).tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, Fragment):
+        return obj.native
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def records(frame: pd.DataFrame) -> List[dict]:
+    """Rows as JSON-safe dicts: plain Python scalars, dates as ISO strings, NaN as None."""
+    frame = frame.copy(deep=False)
+    for column in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = frame[column].dt.strftime('%Y-%m-%d')
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+class _StdlibEncoder(json.JSONEncoder):
+    def default(self, obj):
+        return default(obj)
+
+    def iterencode(self, obj, _one_shot=False):
+        # Float NaN is not JSON; the C encoder only calls default() for unknown types
+        return super().iterencode(_clean_floats(obj), _one_shot)
+
+
+def _clean_floats(obj):
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return None
+    if isinstance(obj, dict):
+        return {k: _clean_floats(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_clean_floats(v) for v in obj]
+    return obj
+
+
+_encoder = _StdlibEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+def _has_fragment(obj) -> bool:
+    if isinstance(obj, Fragment):
+        return True
+    if isinstance(obj, dict):
+        return any(_has_fragment(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_has_fragment(v) for v in obj)
+    return False
+
+
+def _dumps_spliced(obj) -> bytes:
+    """Standard library encoding with fragments spliced in."""
+    if isinstance(obj, Fragment):
+        return obj.data
+    if isinstance(obj, dict) and _has_fragment(obj):
+        return b'{' + b','.join(
+            _encoder.encode(str(k)).encode() + b':' + _dumps_spliced(v) for k, v in obj.items()
+        ) + b'}'
+    if isinstance(obj, list) and _has_fragment(obj):
+        return b'[' + b','.join(_dumps_spliced(v) for v in obj) + b']'
+    return _encoder.encode(obj).encode()
+
+
+def _orjson_dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON of ``obj``."""
+    if NATIVE_FRAGMENTS:
+        return _orjson_dumps(obj)
+    # Without native fragments, payloads holding one are spliced together here
+    if orjson is not None and not _has_fragment(obj):
+        return _orjson_dumps(obj)
+    return _dumps_spliced(obj)
+
+
+def loads(data) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+_fragment_lock = threading.Lock()
+
+
+def employees_fragment(store, department: str, employees: List[Employee],
+                       data_version: Optional[str]) -> Any:
+    """
+    The department's employee records as a cached fragment.
+
+    Used only when ``employees`` were loaded at the store's current
+    version; otherwise the list is returned to be encoded as usual.
+    """
+    version = store.version
+    if data_version != version or len(employees) != store.department_size(department):
+        return employees_to_records(employees)
+    key = ('employees_json', department)
+    with _fragment_lock:
+        cached = store.cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    fragment = Fragment(dumps(employees_to_records(employees)))
+    with _fragment_lock:
+        store.cache[key] = (version, fragment)
+    return fragment
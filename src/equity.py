@@ -0,0 +1,243 @@
+"""
+Pay-equity analytics over the whole salary dataset.
+
+Employees are compared within their (Department, Position) peer group:
+
+- ``z_score`` and ``percentile`` of salary among peers
+- ``compa_ratio`` (salary / band midpoint) and ``band_flag``
+  (``below_band``, ``within_band``, ``above_band`` or ``unbanded``)
+- ``tenure_adjusted_z``: how far salary sits from the peer group's
+  salary-vs-tenure line, in residual standard deviations
+
+Per group, ``spread_ratio`` is the salary range over the band width and
+``tenure_slope`` the rupees per year of tenure; a narrow spread or a
+non-positive slope marks the group as ``compressed``.
+
+Groups are factorized to integer codes once and every statistic is a
+``np.bincount`` or a cython groupby over those codes, so millions of rows
+take seconds. Results are cached per data version and day, in the
+tenant store's cache.
+"""
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from .bands import band_columns
+from .data_store import get_store
+from .policy import whole_percentage
+from .tenants import tenant_thread_id
+from .workflow import start_paused_thread
+
+Z_THRESHOLD = 2.0
+MIN_GROUP_SIZE = 3  # smaller peer groups get no z-scores or compression flag
+COMPRESSED_SPREAD = 0.25
+FLAGS = ('below_band', 'within_band', 'above_band', 'unbanded')
+
+
+def _group_stats(values: np.ndarray, codes: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-group mean and sample standard deviation (NaN below MIN_GROUP_SIZE)."""
+    sums = np.bincount(codes, weights=values, minlength=len(counts))
+    squares = np.bincount(codes, weights=values * values, minlength=len(counts))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+        var = (squares - counts * mean * mean) / (counts - 1)
+        std = np.sqrt(np.clip(var, 0, None))
+    std[(counts < MIN_GROUP_SIZE) | (std == 0)] = np.nan
+    return mean, std
+
+
+def equity_metrics(frame: pd.DataFrame,
+                   as_of: Optional[pd.Timestamp] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute per-employee and per-group equity metrics in one pass.
+
+    Returns ``(employees, groups)``: the first is indexed like ``frame``,
+    the second has one row per (Department, Position).
+    """
+    as_of = as_of or pd.Timestamp.now().normalize()
+    salary = frame['Current_Salary'].to_numpy(dtype=float)
+    tenure = ((as_of - pd.to_datetime(frame['Join_Date'])).dt.days / 365.25).clip(lower=0).to_numpy()
+
+    # One integer code per (Department, Position) peer group
+    dept_codes, departments = pd.factorize(frame['Department'])
+    pos_codes, positions = pd.factorize(frame['Position'])
+    codes, combos = pd.factorize(dept_codes.astype('int64') * max(len(positions), 1) + pos_codes)
+    counts = np.bincount(codes, minlength=len(combos)).astype(float)
+
+    mean, std = _group_stats(salary, codes, counts)
+    z_score = (salary - mean[codes]) / std[codes]
+    percentile = pd.Series(salary).groupby(codes).rank(pct=True).to_numpy()
+
+    # Least-squares salary-vs-tenure line per group
+    t_mean, _ = _group_stats(tenure, codes, counts)
+    t_centered = tenure - t_mean[codes]
+    s_centered = salary - mean[codes]
+    cov = np.bincount(codes, weights=t_centered * s_centered, minlength=len(combos))
+    t_var = np.bincount(codes, weights=t_centered * t_centered, minlength=len(combos))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(t_var > 0, cov / t_var, 0.0)
+    expected = mean[codes] + slope[codes] * t_centered
+    residual = salary - expected
+    _, resid_std = _group_stats(residual, codes, counts)
+    tenure_adjusted_z = residual / resid_std[codes]
+
+    bands = band_columns(frame['Position'])
+    band_min = bands['band_min'].to_numpy()
+    band_max = bands['band_max'].to_numpy()
+    band_flag = np.select(
+        [np.isnan(band_min), salary < band_min, salary > band_max],
+        ['unbanded', 'below_band', 'above_band'],
+        default='within_band'
+    )
+
+    employees = pd.DataFrame({
+        'Employee_ID': frame['Employee_ID'].to_numpy(),
+        'Name': frame['Name'].to_numpy(),
+        'Department': frame['Department'].to_numpy(),
+        'Position': frame['Position'].to_numpy(),
+        'Current_Salary': frame['Current_Salary'].to_numpy(),
+        'tenure_years': tenure.round(2),
+        'z_score': z_score.round(3),
+        'percentile': percentile.round(4),
+        'compa_ratio': (salary / bands['band_mid'].to_numpy()).round(3),
+        'band_flag': pd.Categorical(band_flag, categories=FLAGS),
+        'expected_salary': np.round(expected),
+        'tenure_adjusted_z': tenure_adjusted_z.round(3),
+    }, index=frame.index)
+    employees['outlier'] = (np.abs(z_score) >= Z_THRESHOLD) | (band_flag == 'below_band') | (band_flag == 'above_band')
+
+    # Group table, built from the same codes
+    minimum = pd.Series(salary).groupby(codes).min().reindex(range(len(combos))).to_numpy()
+    maximum = pd.Series(salary).groupby(codes).max().reindex(range(len(combos))).to_numpy()
+    group_dept = departments.take(combos // max(len(positions), 1))
+    group_pos = positions.take(combos % max(len(positions), 1))
+    group_bands = band_columns(pd.Series(group_pos))
+    width = (group_bands['band_max'] - group_bands['band_min']).to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spread_ratio = (maximum - minimum) / width
+    groups = pd.DataFrame({
+        'Department': group_dept,
+        'Position': group_pos,
+        'employees': counts.astype(int),
+        'mean_salary': mean.round(0),
+        'std_salary': std.round(0),
+        'band_min': group_bands['band_min'].to_numpy(),
+        'band_max': group_bands['band_max'].to_numpy(),
+        'spread_ratio': spread_ratio.round(3),
+        'tenure_slope': slope.round(0),
+        'below_band': np.bincount(codes, weights=band_flag == 'below_band', minlength=len(combos)).astype(int),
+        'above_band': np.bincount(codes, weights=band_flag == 'above_band', minlength=len(combos)).astype(int),
+    })
+    groups['compressed'] = (groups['employees'] >= MIN_GROUP_SIZE) & (
+        (groups['spread_ratio'] < COMPRESSED_SPREAD) | (groups['tenure_slope'] <= 0)
+    )
+    groups = groups.sort_values(['Department', 'Position'], ignore_index=True)
+    return employees, groups
+
+
+_cache_lock = threading.Lock()
+
+
+def get_equity() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Equity metrics for the current data, computed once per data version and day."""
+    store = get_store()
+    as_of = pd.Timestamp.now().normalize()
+    key = (store.version, as_of)
+    with _cache_lock:
+        if store.cache.get('equity_key') == key:
+            return store.cache['equity']
+    value = equity_metrics(store.frame, as_of)
+    with _cache_lock:
+        store.cache['equity_key'], store.cache['equity'] = key, value
+    return value
+
+
+def equity_report(department: Optional[str] = None, flag: Optional[str] = None,
+                  outliers_only: bool = True, limit: int = 100) -> Dict[str, Any]:
+    """
+    Group table plus the employees most out of line with their peers.
+
+    Employees are ordered by absolute tenure-adjusted z-score, largest first.
+    """
+    if flag and flag not in FLAGS:
+        raise ValueError(f"Unknown band flag '{flag}'; expected one of {', '.join(FLAGS)}")
+    employees, groups = get_equity()
+    if department:
+        employees = employees[employees['Department'] == department]
+        groups = groups[groups['Department'] == department]
+    if flag:
+        employees = employees[employees['band_flag'] == flag]
+    if outliers_only:
+        employees = employees[employees['outlier']]
+    order = np.argsort(-np.nan_to_num(np.abs(employees['tenure_adjusted_z'].to_numpy())), kind='stable')
+    return {
+        'data_version': get_store().version,
+        'groups': groups,
+        'employees': employees.iloc[order[:limit]],
+        'matching': len(employees),
+    }
+
+
+def equity_candidates(department: Optional[str] = None) -> pd.DataFrame:
+    """
+    Underpaid employees with the raise that would close their gap.
+
+    Anyone below their band is raised to the band minimum; anyone within
+    it but ``Z_THRESHOLD`` residual deviations below their peers'
+    salary-vs-tenure line is raised to that expected salary.
+    """
+    employees, _ = get_equity()
+    if department:
+        employees = employees[employees['Department'] == department]
+    bands = band_columns(employees['Position'])
+    below_band = employees['band_flag'] == 'below_band'
+    below_peers = (employees['band_flag'] == 'within_band') & (employees['tenure_adjusted_z'] <= -Z_THRESHOLD)
+
+    candidates = employees[below_band | below_peers].copy()
+    candidates['rule'] = np.where(below_band[candidates.index], 'equity_below_band', 'equity_below_peers')
+    candidates['proposed_salary'] = np.where(
+        below_band[candidates.index],
+        bands.loc[candidates.index, 'band_min'],
+        candidates['expected_salary']
+    ).astype('int64')
+    candidates = candidates[candidates['proposed_salary'] > candidates['Current_Salary']]
+    candidates['gap'] = candidates['proposed_salary'] - candidates['Current_Salary']
+    return candidates.sort_values('gap', ascending=False)
+
+
+def seed_equity_proposals(department: Optional[str] = None, limit: int = 100) -> List[str]:
+    """Start a paused HITL thread for each of the ``limit`` largest equity gaps."""
+    store = get_store()
+    thread_ids = []
+    for row in equity_candidates(department).head(limit).to_dict('records'):
+        employee = store.employee(row['Employee_ID'])
+        if employee is None:
+            continue
+        current = int(row['Current_Salary'])
+        proposed = int(row['proposed_salary'])
+        if row['rule'] == 'equity_below_band':
+            reason = f"Paid below the {row['Position']} band minimum"
+        else:
+            reason = (f"Paid ₹{proposed - current:,} below the tenure-adjusted peer level "
+                      f"for {row['Position']} in {row['Department']}")
+        thread_id = tenant_thread_id(f"equity_{uuid.uuid4().hex}", store.tenant)
+        start_paused_thread(thread_id, {
+            "department": row['Department'],
+            "employees": [employee],
+            "highest_paid": employee,
+            "proposal_type": "salary_hike",
+            "proposal_details": {
+                'employee_id': int(row['Employee_ID']),
+                'employee_name': row['Name'],
+                'current_salary': current,
+                'proposed_salary': proposed,
+                'increase_percentage': whole_percentage(round((proposed / current - 1) * 100, 2)),
+                'reason': reason,
+                'policy_rule': row['rule'],
+                'equity_z_score': None if pd.isna(row['tenure_adjusted_z']) else float(row['tenure_adjusted_z']),
+            },
+            "execution_log": [f"Equity analysis flagged {row['Name']} ({row['rule']})"]
+        })
+        thread_ids.append(thread_id)
+    return thread_ids
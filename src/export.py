@@ -0,0 +1,144 @@
+"""
+Streaming CSV and XLSX export of recorded proposals and decisions.
+
+Rows come from ``HistoryStore.iter_rows`` one keyset batch at a time and
+are encoded as they arrive, so memory stays flat however many rows are
+exported. XLSX uses openpyxl's write-only mode, which spools rows to a
+temporary file; the finished workbook is then read back in chunks, so
+its first byte arrives only once every row is written. Installing lxml
+makes openpyxl's writer considerably faster.
+
+Command line::
+
+    python -m src.export decisions --format xlsx -o decisions.xlsx
+    python -m src.export proposals --department Finance > proposals.csv
+    python -m src.export decisions --tenant acme > acme_decisions.csv
+"""
+import argparse
+import csv
+import io
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, List, Optional
+from openpyxl import Workbook
+from .history import TABLES, get_history_store
+from .tenants import current_tenant
+
+FORMATS = ('csv', 'xlsx')
+MIME_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+CHUNK_ROWS = 500
+CHUNK_BYTES = 64 * 1024
+SHEET_MAX_ROWS = 1048576  # Excel's per-sheet limit, header included
+TIME_COLUMNS = {'decided_at', 'created_at'}
+
+
+def _timestamp_formatter(columns: List[str]):
+    positions = [i for i, c in enumerate(columns) if c in TIME_COLUMNS]
+
+    def format_row(row: List[Any]) -> List[Any]:
+        for i in positions:
+            if row[i] is not None:
+                row[i] = datetime.fromtimestamp(row[i], tz=timezone.utc).isoformat(timespec='seconds')
+        return row
+    return format_row
+
+
+def iter_csv(columns: List[str], rows: Iterable[List[Any]]) -> Iterator[str]:
+    """Yield CSV text in chunks of ``CHUNK_ROWS`` rows, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    format_row = _timestamp_formatter(columns)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(format_row(row))
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_xlsx(columns: List[str], rows: Iterable[List[Any]], title: str = 'Export') -> Iterator[bytes]:
+    """Build a write-only workbook and yield its bytes in chunks."""
+    workbook = Workbook(write_only=True)
+    format_row = _timestamp_formatter(columns)
+    sheet, sheet_rows, sheets = None, SHEET_MAX_ROWS, 0
+    for row in rows:
+        # Continue on a new sheet once Excel's row limit is reached
+        if sheet_rows == SHEET_MAX_ROWS:
+            sheets += 1
+            sheet = workbook.create_sheet(title=title if sheets == 1 else f"{title} {sheets}")
+            sheet.append(columns)
+            sheet_rows = 1
+        sheet.append(format_row(row))
+        sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet(title=title).append(columns)
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+
+def export_chunks(table: str, fmt: str = 'csv', department: Optional[str] = None,
+                  status: Optional[str] = None, since: Optional[float] = None,
+                  until: Optional[float] = None, tenant: Optional[str] = None) -> Iterator:
+    """Stream one tenant's ``table`` ('proposals' or 'decisions') as CSV text or XLSX bytes."""
+    if table not in TABLES:
+        raise ValueError(f"Unknown export '{table}'; expected one of {', '.join(TABLES)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'; expected one of {', '.join(FORMATS)}")
+    columns = TABLES[table][0]
+    if status and 'status' not in columns:
+        raise ValueError(f"{table} cannot be filtered by status")
+    # Resolved now: the rows are read after a web request has returned
+    rows = get_history_store().iter_rows(table, department=department, status=status,
+                                         since=since, until=until, tenant=tenant or current_tenant())
+    if fmt == 'csv':
+        return iter_csv(columns, rows)
+    return iter_xlsx(columns, rows, title=table.capitalize())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export recorded proposals or decisions")
+    parser.add_argument('table', choices=sorted(TABLES))
+    parser.add_argument('--format', '-f', choices=FORMATS, default='csv')
+    parser.add_argument('--output', '-o', help="output file (default: stdout)")
+    parser.add_argument('--tenant', help="dataset whose history to export (default: the default tenant)")
+    parser.add_argument('--department')
+    parser.add_argument('--status', help="decision status (decisions only)")
+    parser.add_argument('--since', type=float, help="UNIX timestamp, inclusive")
+    parser.add_argument('--until', type=float, help="UNIX timestamp, exclusive")
+    args = parser.parse_args(argv)
+
+    if args.format == 'xlsx' and not args.output and sys.stdout.isatty():
+        parser.error("refusing to write xlsx to a terminal; use --output")
+    # Validated here, before the output file is opened
+    try:
+        chunks = export_chunks(args.table, args.format, department=args.department,
+                               status=args.status, since=args.since, until=args.until,
+                               tenant=args.tenant)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format == 'csv':
+        out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    else:
+        out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
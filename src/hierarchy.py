@@ -0,0 +1,252 @@
+"""
+Reporting hierarchy derived from the free-text ``Manager`` column.
+
+Every distinct name in ``Name`` or ``Manager`` becomes a node. A node
+resolves to the first employee with that name; managers who are not
+employees themselves are external roots. The index holds:
+
+- ``span``: direct reports per node (O(1) lookup)
+- ``total``: everyone below a node, transitively
+- ``depth``: chain length from the node up to its root
+- a CSR adjacency of employee rows grouped by manager
+
+Everything is built with numpy in one pass per data version. An approved
+manager change is applied with ``move``, which touches only the moved
+subtree and the two chains above it. Nodes on a reporting cycle get
+depth -1 and are left out of the transitive counts.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+def _gather(values: np.ndarray, offsets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Concatenate ``values[offsets[n]:offsets[n + 1]]`` for each node, without a Python loop."""
+    starts, lengths = offsets[nodes], offsets[nodes + 1] - offsets[nodes]
+    total = int(lengths.sum())
+    if not total:
+        return values[:0]
+    shift = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return values[np.arange(total) + shift]
+
+
+class HierarchyIndex:
+    """Manager → reports index over one version of the dataset."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self._lock = threading.RLock()
+        ids = frame['Employee_ID'].to_numpy(dtype='int64')
+        names = frame['Name'].to_numpy(dtype=object)
+        managers = frame['Manager'].to_numpy(dtype=object)
+
+        codes, uniques = pd.factorize(np.concatenate([names, managers]), use_na_sentinel=True)
+        self._names: List[str] = list(uniques)
+        self._codes: Dict[str, int] = {name: i for i, name in enumerate(self._names)}
+        n_nodes, n_rows = len(self._names), len(ids)
+        self._row_ids = ids
+        self._row_node = codes[:n_rows].astype('int64')
+        self._row_manager = codes[n_rows:].astype('int64')  # -1 when blank
+        self._rows = dict(zip(ids.tolist(), range(n_rows)))
+
+        # Each node is represented by the first employee carrying its name
+        self._node_row = np.full(n_nodes, -1, dtype='int64')
+        first = np.unique(self._row_node, return_index=True)
+        self._node_row[first[0]] = first[1]
+        self._parent = np.full(n_nodes, -1, dtype='int64')
+        employees = self._node_row >= 0
+        self._parent[employees] = self._row_manager[self._node_row[employees]]
+
+        # CSR adjacency: employee rows grouped by manager
+        managed = np.flatnonzero(self._row_manager >= 0)
+        self._child_rows = managed[np.argsort(self._row_manager[managed], kind='stable')]
+        self._span = np.bincount(self._row_manager[managed], minlength=n_nodes).astype('int64')
+        self._offsets = np.concatenate(([0], np.cumsum(self._span)))
+        self._added: Dict[int, List[int]] = {}  # rows moved under a node since the build
+
+        self._depth, self._total = self._levels()
+
+    def _levels(self):
+        """Depth and transitive report count of every node, one tree level at a time."""
+        n_nodes = len(self._names)
+        parent = self._parent
+        has_parent = np.flatnonzero(parent >= 0)
+        child_nodes = has_parent[np.argsort(parent[has_parent], kind='stable')]
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(parent[has_parent], minlength=n_nodes))))
+
+        depth = np.full(n_nodes, -1, dtype='int64')
+        level, levels = np.flatnonzero(parent < 0), []
+        while level.size:
+            depth[level] = len(levels)
+            levels.append(level)
+            level = _gather(child_nodes, offsets, level)
+
+        total = np.zeros(n_nodes, dtype='int64')
+        for level in reversed(levels[1:]):
+            total += np.bincount(parent[level], weights=1 + total[level], minlength=n_nodes).astype('int64')
+        return depth, total
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _children(self, node: int) -> np.ndarray:
+        """Rows currently reporting to ``node``."""
+        rows = self._child_rows[self._offsets[node]:self._offsets[node + 1]]
+        if node in self._added:
+            rows = np.unique(np.concatenate([rows, self._added[node]]))
+        return rows[self._row_manager[rows] == node]
+
+    def employee_id(self, name: str) -> Optional[int]:
+        """Employee_ID behind a name, or None for unknown or external managers."""
+        node = self._codes.get(name)
+        if node is None or self._node_row[node] < 0:
+            return None
+        return int(self._row_ids[self._node_row[node]])
+
+    def report_count(self, name: str) -> int:
+        """Number of direct reports."""
+        node = self._codes.get(name)
+        return 0 if node is None else int(self._span[node])
+
+    def total_reports(self, name: str) -> int:
+        """Number of people below ``name`` in the hierarchy."""
+        node = self._codes.get(name)
+        return 0 if node is None else int(self._total[node])
+
+    def depth(self, name: str) -> Optional[int]:
+        """Levels between ``name`` and the top of its chain; None if unknown or on a cycle."""
+        node = self._codes.get(name)
+        if node is None or self._depth[node] < 0:
+            return None
+        return int(self._depth[node])
+
+    def direct_reports(self, name: str) -> List[int]:
+        """Employee_IDs reporting directly to ``name``."""
+        node = self._codes.get(name)
+        if node is None:
+            return []
+        with self._lock:
+            return self._row_ids[self._children(node)].tolist()
+
+    def chain(self, employee_id) -> List[str]:
+        """Managers above an employee, nearest first."""
+        with self._lock:
+            row = self._rows.get(employee_id)
+            if row is None:
+                return []
+            chain, node = [], int(self._row_manager[row])
+            while node >= 0 and len(chain) <= len(self._names):
+                chain.append(self._names[node])
+                node = int(self._parent[node])
+            return chain
+
+    def reports_to(self, name: str, manager: str) -> bool:
+        """True if ``name`` is somewhere below ``manager``."""
+        node, target = self._codes.get(name), self._codes.get(manager)
+        if node is None or target is None:
+            return False
+        with self._lock:
+            for _ in range(len(self._names)):
+                node = int(self._parent[node])
+                if node < 0:
+                    return False
+                if node == target:
+                    return True
+        return False
+
+    def subordinates(self, name: str) -> Set[str]:
+        """Names of everyone below ``name``, walking only that subtree."""
+        node = self._codes.get(name)
+        if node is None or not self._total[node]:
+            return set()
+        found: Set[int] = set()
+        with self._lock:
+            level = [node]
+            while level:
+                rows = np.concatenate([self._children(n) for n in level])
+                level = [n for n in set(self._row_node[rows].tolist()) if n not in found and n != node]
+                found.update(level)
+        return {self._names[n] for n in found}
+
+    def manager_options(self, employees: Iterable, employee) -> List[Dict[str, Any]]:
+        """
+        Candidate managers for ``employee`` with their report counts.
+
+        Excludes the employee and anyone who reports to them, since either
+        would put a cycle in the hierarchy.
+        """
+        below = self.subordinates(employee.name)
+        return [
+            {'name': e.name, 'reports': self.report_count(e.name)}
+            for e in employees
+            if e.employee_id != employee.employee_id and e.name not in below
+        ]
+
+    def span_of_control(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Managers with the most direct reports."""
+        with self._lock:
+            top = np.argsort(-self._span, kind='stable')[:limit]
+            return [
+                {
+                    'manager': self._names[node],
+                    'employee_id': self.employee_id(self._names[node]),
+                    'direct_reports': int(self._span[node]),
+                    'total_reports': int(self._total[node]),
+                    'depth': self.depth(self._names[node]),
+                }
+                for node in top if self._span[node] > 0
+            ]
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def move(self, employee_id, manager: str) -> bool:
+        """
+        Re-parent one employee under ``manager`` in place.
+
+        Returns False when the change cannot be applied incrementally (a
+        new manager name, a duplicate employee name, or a cycle); the
+        caller should rebuild the index then.
+        """
+        with self._lock:
+            row = self._rows.get(employee_id)
+            new = self._codes.get(manager)
+            if row is None or new is None:
+                return False
+            node = int(self._row_node[row])
+            old = int(self._row_manager[row])
+            if old == new:
+                return True
+            if self._node_row[node] != row or self._depth[node] < 0 or self._depth[new] < 0:
+                return False
+            if new == node or self.reports_to(manager, self._names[node]):
+                return False
+
+            moved = 1 + self._total[node]
+            if old >= 0:
+                self._span[old] -= 1
+                ancestor = old
+                while ancestor >= 0:
+                    self._total[ancestor] -= moved
+                    ancestor = int(self._parent[ancestor])
+            self._span[new] += 1
+            ancestor = new
+            while ancestor >= 0:
+                self._total[ancestor] += moved
+                ancestor = int(self._parent[ancestor])
+
+            # Shift the depth of the moved subtree
+            shift = self._depth[new] + 1 - self._depth[node]
+            level = np.array([node])
+            while level.size:
+                self._depth[level] += shift
+                rows = np.concatenate([self._children(n) for n in level.tolist()])
+                # Only rows that represent their name's node carry the subtree further
+                level = self._row_node[rows][self._node_row[self._row_node[rows]] == rows]
+
+            self._parent[node] = new
+            self._row_manager[row] = new
+            self._added.setdefault(new, []).append(row)
+            return True
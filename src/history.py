@@ -0,0 +1,296 @@
+"""
+Persistent, append-only decision and proposal history backed by SQLite.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+from .tenants import current_tenant
+
+HISTORY_PATH = Path(__file__).parent.parent / "data" / "history.db"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL DEFAULT 'default',
+    thread_id TEXT,
+    department TEXT NOT NULL,
+    employee_id INTEGER,
+    employee_name TEXT,
+    proposal_type TEXT,
+    decision TEXT,
+    status TEXT,
+    current_salary INTEGER,
+    proposed_salary INTEGER,
+    final_salary INTEGER,
+    current_manager TEXT,
+    proposed_manager TEXT,
+    final_manager TEXT,
+    message TEXT,
+    reviewer TEXT,
+    decided_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_tenant ON decisions (tenant, id);
+CREATE INDEX IF NOT EXISTS idx_decisions_tenant_department ON decisions (tenant, department, id);
+CREATE INDEX IF NOT EXISTS idx_decisions_tenant_status ON decisions (tenant, status, id);
+CREATE INDEX IF NOT EXISTS idx_decisions_tenant_decided_at ON decisions (tenant, decided_at);
+CREATE TRIGGER IF NOT EXISTS decisions_no_update BEFORE UPDATE ON decisions
+BEGIN SELECT RAISE(ABORT, 'decision history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS decisions_no_delete BEFORE DELETE ON decisions
+BEGIN SELECT RAISE(ABORT, 'decision history is append-only'); END;
+
+CREATE TABLE IF NOT EXISTS proposals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL DEFAULT 'default',
+    thread_id TEXT UNIQUE,
+    department TEXT NOT NULL,
+    employee_id INTEGER,
+    employee_name TEXT,
+    proposal_type TEXT,
+    current_salary INTEGER,
+    proposed_salary INTEGER,
+    increase_percentage REAL,
+    current_manager TEXT,
+    proposed_manager TEXT,
+    reason TEXT,
+    policy_rule TEXT,
+    policy_version TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_proposals_tenant ON proposals (tenant, id);
+CREATE INDEX IF NOT EXISTS idx_proposals_tenant_department ON proposals (tenant, department, id);
+CREATE INDEX IF NOT EXISTS idx_proposals_tenant_created_at ON proposals (tenant, created_at);
+CREATE TRIGGER IF NOT EXISTS proposals_no_update BEFORE UPDATE ON proposals
+BEGIN SELECT RAISE(ABORT, 'proposal history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS proposals_no_delete BEFORE DELETE ON proposals
+BEGIN SELECT RAISE(ABORT, 'proposal history is append-only'); END;
+"""
+
+_COLUMNS = [
+    'id', 'tenant', 'thread_id', 'department', 'employee_id', 'employee_name', 'proposal_type',
+    'decision', 'status', 'current_salary', 'proposed_salary', 'final_salary',
+    'current_manager', 'proposed_manager', 'final_manager', 'message', 'reviewer',
+    'decided_at'
+]
+
+PROPOSAL_COLUMNS = [
+    'id', 'tenant', 'thread_id', 'department', 'employee_id', 'employee_name', 'proposal_type',
+    'current_salary', 'proposed_salary', 'increase_percentage', 'current_manager',
+    'proposed_manager', 'reason', 'policy_rule', 'policy_version', 'created_at'
+]
+
+# Exportable tables: columns and the timestamp used for since/until filters
+TABLES = {
+    'decisions': (_COLUMNS, 'decided_at'),
+    'proposals': (PROPOSAL_COLUMNS, 'created_at'),
+}
+
+
+def _as_int(value) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def decision_row(state: Dict[str, Any], thread_id: Optional[str] = None,
+                 reviewer: Optional[str] = None) -> Dict[str, Any]:
+    """Flatten a finished workflow state into a history row."""
+    details = state.get('proposal_details') or {}
+    modification = state.get('modification_details') or {}
+    status = state.get('final_status')
+
+    final_salary = final_manager = None
+    if status in ('approved', 'modified'):
+        if state.get('proposal_type') == 'salary_hike':
+            final_salary = details.get('proposed_salary')
+            if status == 'modified':
+                final_salary = modification.get('modified_salary', final_salary)
+        else:
+            final_manager = details.get('proposed_manager')
+            if status == 'modified':
+                final_manager = modification.get('modified_manager', final_manager)
+
+    return {
+        'tenant': state.get('tenant'),
+        'thread_id': thread_id,
+        'department': state.get('department'),
+        'employee_id': _as_int(details.get('employee_id')),
+        'employee_name': details.get('employee_name'),
+        'proposal_type': state.get('proposal_type'),
+        'decision': state.get('human_decision'),
+        'status': status,
+        'current_salary': _as_int(details.get('current_salary')),
+        'proposed_salary': _as_int(details.get('proposed_salary')),
+        'final_salary': _as_int(final_salary),
+        'current_manager': details.get('current_manager'),
+        'proposed_manager': details.get('proposed_manager'),
+        'final_manager': final_manager,
+        'message': state.get('final_message'),
+        'reviewer': reviewer,
+        'decided_at': time.time(),
+    }
+
+
+def proposal_row(state: Dict[str, Any], thread_id: Optional[str] = None) -> Dict[str, Any]:
+    """Flatten a workflow state paused for approval into a proposal row."""
+    details = state.get('proposal_details') or {}
+    increase = details.get('increase_percentage')
+    return {
+        'tenant': state.get('tenant'),
+        'thread_id': thread_id,
+        'department': state.get('department'),
+        'employee_id': _as_int(details.get('employee_id')),
+        'employee_name': details.get('employee_name'),
+        'proposal_type': state.get('proposal_type'),
+        'current_salary': _as_int(details.get('current_salary')),
+        'proposed_salary': _as_int(details.get('proposed_salary')),
+        'increase_percentage': float(increase) if increase is not None else None,
+        'current_manager': details.get('current_manager'),
+        'proposed_manager': details.get('proposed_manager'),
+        'reason': details.get('reason'),
+        'policy_rule': details.get('policy_rule'),
+        'policy_version': state.get('policy_version'),
+        'created_at': time.time(),
+    }
+
+
+class HistoryStore:
+    """
+    Append-only store of proposals and reviewer decisions.
+
+    Rows are never updated or deleted (enforced by triggers). Queries use
+    keyset pagination on the row id, so fetching any page costs the same
+    regardless of how many decisions have been recorded. Rows belong to
+    the tenant they were recorded under, and every query and export only
+    sees one tenant (the current one unless ``tenant`` is passed).
+    """
+
+    def __init__(self, path: Path = HISTORY_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _insert(self, table: str, row: Dict[str, Any], verb: str = "INSERT") -> int:
+        row = {**row, 'tenant': row.get('tenant') or current_tenant()}
+        columns = [c for c in TABLES[table][0] if c != 'id']
+        placeholders = ', '.join('?' for _ in columns)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                [row.get(c) for c in columns]
+            )
+        return cursor.lastrowid
+
+    def append(self, row: Dict[str, Any]) -> int:
+        """Append one decision row and return its id."""
+        return self._insert('decisions', row)
+
+    def record(self, state: Dict[str, Any], thread_id: Optional[str] = None,
+               reviewer: Optional[str] = None) -> int:
+        """Record a finished workflow state."""
+        return self.append(decision_row(state, thread_id=thread_id, reviewer=reviewer))
+
+    def record_proposal(self, state: Dict[str, Any], thread_id: Optional[str] = None):
+        """Record a proposal once per thread; later calls for the thread are ignored."""
+        if state.get('proposal_details'):
+            self._insert('proposals', proposal_row(state, thread_id=thread_id), verb="INSERT OR IGNORE")
+
+    def _where(self, tenant, department, status, since, until, cursor,
+               time_column: str = 'decided_at', after: bool = False):
+        clauses, params = ["tenant = ?"], [tenant or current_tenant()]
+        if department:
+            clauses.append("department = ?")
+            params.append(department)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append(f"{time_column} >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append(f"{time_column} < ?")
+            params.append(until)
+        if cursor is not None:
+            clauses.append("id > ?" if after else "id < ?")
+            params.append(cursor)
+        return f"WHERE {' AND '.join(clauses)}", params
+
+    def query(self, department: Optional[str] = None, status: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+              tenant: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return one page of decisions, newest first.
+
+        Pass the returned ``next_cursor`` back as ``cursor`` to fetch the
+        following page; it is None once the history is exhausted.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where, params = self._where(tenant, department, status, since, until, cursor)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM decisions {where} ORDER BY id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        items = [dict(r) for r in rows[:limit]]
+        next_cursor = items[-1]['id'] if len(rows) > limit else None
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def count(self, department: Optional[str] = None, status: Optional[str] = None,
+              tenant: Optional[str] = None) -> int:
+        """Count decisions matching the given filters."""
+        where, params = self._where(tenant, department, status, None, None, None)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM decisions {where}", params).fetchone()[0]
+
+    def iter_rows(self, table: str = 'decisions', department: Optional[str] = None,
+                  status: Optional[str] = None, since: Optional[float] = None,
+                  until: Optional[float] = None, tenant: Optional[str] = None,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Any]]:
+        """
+        Yield every matching row of ``table`` as a list, oldest first.
+
+        Rows are read in keyset batches on a separate connection, so an
+        export of any size holds one batch in memory and never blocks
+        writers for longer than a batch.
+        """
+        columns, time_column = TABLES[table]
+        if status and 'status' not in columns:
+            raise ValueError(f"{table} cannot be filtered by status")
+        conn = sqlite3.connect(str(self.path))
+        try:
+            cursor = None
+            while True:
+                where, params = self._where(tenant, department, status, since, until, cursor,
+                                            time_column=time_column, after=True)
+                rows = conn.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY id LIMIT ?",
+                    params + [batch_size]
+                ).fetchall()
+                yield from (list(r) for r in rows)
+                if len(rows) < batch_size:
+                    return
+                cursor = rows[-1][0]
+        finally:
+            conn.close()
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """Return the process-wide history store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
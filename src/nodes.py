@@ -1,95 +1,301 @@
 """
 Workflow node functions for the HITL salary management system.
 """
-import pandas as pd
+import heapq
+import multiprocessing
+import os
 import random
-from pathlib import Path
-from typing import Dict, Any
+import threading
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+from langchain_core.runnables import RunnableConfig
 from .state import WorkflowState
+from .data_store import get_store
+from .employee import Employee
+from .history import get_history_store
+from .outbox import get_outbox
+from .policy import ProposalPolicy, get_policy, whole_percentage
+from .review_queue import review_queue
+
+# Departments at least this large are analyzed as parallel shards
+SHARD_THRESHOLD = int(os.environ.get("HITL_SHARD_THRESHOLD", 50000))
+# "thread" runs shards on LangGraph's thread pool, "process" in worker processes
+SHARD_BACKEND = os.environ.get("HITL_SHARD_BACKEND", "thread")
+MIN_SHARD_ROWS = 10000
+TOP_K = 5
+
+# Columns a shard needs: ids and salaries, plus what policy rules can test
+SHARD_COLUMNS = ['Employee_ID', 'Department', 'Position', 'Current_Salary', 'Join_Date']
+
+_shard_pool: Optional[ProcessPoolExecutor] = None
+_shard_pool_lock = threading.Lock()
+_worker_policies: Dict[str, ProposalPolicy] = {}
 
 
 def load_data_node(state: WorkflowState) -> Dict[str, Any]:
     """Load employee data and filter by department."""
     print(f"[Node] Loading data for department: {state['department']}")
     
-    # Load Excel data
-    data_path = Path(__file__).parent.parent / "data" / "salary_data.xlsx"
-    df = pd.read_excel(data_path)
-    
-    # Filter by department
-    dept_df = df[df['Department'] == state['department']]
-    employees = dept_df.to_dict('records')
+    # Department slice from the shared store (includes approved changes)
+    store = get_store(state.get('tenant'))
+    store.refresh()
+    size = store.department_size(state['department'])
+    # Sharded departments are read from the store by the shards; no records are built for them
+    employees = store.department_records(state['department']) if size < SHARD_THRESHOLD else []
     
-    log_entry = f"Loaded {len(employees)} employees from {state['department']} department"
+    log_entry = f"Loaded {size} employees from {state['department']} department"
     
     return {
         "employees": employees,
+        "department_size": size,
+        "data_version": store.version,
         "execution_log": state.get("execution_log", []) + [log_entry]
     }
 
 
-def analyze_department_node(state: WorkflowState) -> Dict[str, Any]:
+def plan_shards(department: str, size: int, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Split a department into contiguous row ranges, about one per core."""
+    count = max(1, min(os.cpu_count() or 1, size // MIN_SHARD_ROWS))
+    bounds = np.linspace(0, size, count + 1).astype(int)
+    version = get_store(tenant).version
+    policy_version = get_policy().version
+    as_of = pd.Timestamp.now().normalize().isoformat()
+    return [
+        {"department": department, "tenant": tenant, "data_version": version, "policy_version": policy_version,
+         "as_of": as_of, "shard": i, "start": int(start), "stop": int(stop)}
+        for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))
+    ]
+
+
+def summarize_shard(frame: pd.DataFrame, policy: ProposalPolicy, as_of: pd.Timestamp) -> Dict[str, Any]:
+    """Top-K, salary aggregates and policy hikes for one shard's rows."""
+    hikes = policy.evaluate(frame, as_of)
+    values = frame['Current_Salary'].to_numpy()
+    ids = frame['Employee_ID'].to_numpy()
+    k = min(TOP_K, len(values))
+    top = np.argpartition(values, len(values) - k)[len(values) - k:] if k else []
+    top_ids = [int(ids[i]) for i in top]
+    top_hikes = hikes.loc[hikes.index.intersection(top_ids)]
+    return {
+        'employees': len(values),
+        'total_salary': int(values.sum()),
+        'min_salary': int(values.min()) if k else None,
+        'max_salary': int(values.max()) if k else None,
+        'top': [(int(values[i]), int(ids[i])) for i in top],
+        'eligible': len(hikes),
+        'hikes': [
+            {'employee_id': int(employee_id), 'rule': row['rule'],
+             'increase_percentage': float(row['increase_percentage']),
+             'proposed_salary': int(row['proposed_salary']), 'reason': row['reason']}
+            for employee_id, row in top_hikes.iterrows()
+        ],
+    }
+
+
+def _summarize_in_worker(frame: pd.DataFrame, rules: List[Dict[str, Any]], version: str,
+                         as_of: pd.Timestamp) -> Dict[str, Any]:
+    # Workers compile each policy version once
+    policy = _worker_policies.get(version)
+    if policy is None:
+        policy = _worker_policies[version] = ProposalPolicy(rules)
+    return summarize_shard(frame, policy, as_of)
+
+
+def shard_pool() -> ProcessPoolExecutor:
+    """Worker processes for the "process" shard backend, started on first use."""
+    global _shard_pool
+    with _shard_pool_lock:
+        if _shard_pool is None:
+            # forkserver: forking this multi-threaded process could copy a held lock
+            _shard_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                              mp_context=multiprocessing.get_context("forkserver"))
+        return _shard_pool
+
+
+def analyze_shard_node(shard: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-K, salary aggregates and policy hikes for one shard of a department."""
+    store = get_store(shard.get('tenant'))
+    version = store.version
+    frame = store.department_slice(shard['department'], shard['start'], shard['stop'], columns=SHARD_COLUMNS)
+    policy = get_policy()
+    as_of = pd.Timestamp(shard['as_of'])
+    if SHARD_BACKEND == "process":
+        # Only the slice's columns travel; the summary that comes back is a few small lists
+        summary = shard_pool().submit(_summarize_in_worker, frame, policy.rules, policy.version, as_of).result()
+    else:
+        summary = summarize_shard(frame, policy, as_of)
+    return {
+        "shard_results": [{
+            'shard': shard['shard'],
+            'data_version': version,
+            'planned_version': shard['data_version'],
+            'policy_version': shard['policy_version'],
+            **summary,
+        }]
+    }
+
+
+def reduce_shards_node(state: WorkflowState) -> Dict[str, Any]:
+    """Merge shard results into department statistics and the top earner."""
+    results = sorted(state.get('shard_results', []), key=lambda r: r['shard'])
+    print(f"[Node] Reducing {len(results)} shards")
+    
+    employees = sum(r['employees'] for r in results)
+    total_salary = sum(r['total_salary'] for r in results)
+    top = heapq.nlargest(TOP_K, (pair for r in results for pair in r['top']))
+    top_ids = {employee_id for _, employee_id in top}
+    stats = {
+        'employees': employees,
+        'total_salary': total_salary,
+        'avg_salary': total_salary / employees if employees else None,
+        'min_salary': min((r['min_salary'] for r in results if r['employees']), default=None),
+        'max_salary': max((r['max_salary'] for r in results if r['employees']), default=None),
+        'top_earners': [employee_id for _, employee_id in top],
+        'eligible': sum(r['eligible'] for r in results),
+        'top_hikes': [h for r in results for h in r['hikes'] if h['employee_id'] in top_ids],
+        'policy_version': results[0]['policy_version'] if results else None,
+        'shards': len(results),
+    }
+    update = {
+        "department_stats": stats,
+        "execution_log": state.get("execution_log", []) + [
+            f"Analyzed {employees:,} employees in {len(results)} parallel shards"
+        ]
+    }
+    
+    # Shards that saw different data cannot be merged; analysis falls back to the index
+    versions = {v for r in results for v in (r['data_version'], r['planned_version'])}
+    if len(versions) == 1 and top:
+        update["highest_paid"] = get_store(state.get('tenant')).employee(top[0][1])
+    else:
+        stats['policy_version'] = None
+    return update
+
+
+def eligible_managers(frame: pd.DataFrame, employee: Employee, hierarchy) -> np.ndarray:
+    """Names of anyone in a department frame except the employee and their own reports."""
+    keep = frame['Employee_ID'].to_numpy() != employee.employee_id
+    below = hierarchy.subordinates(employee.name)
+    if below:
+        keep &= ~frame['Name'].isin(below).to_numpy()
+    return frame['Name'].to_numpy(dtype=object)[keep]
+
+
+def state_employees(state: Dict[str, Any]) -> List[Employee]:
+    """The analyzed department's records; sharded departments carry none and read them from the store."""
+    if state.get('employees') or not state.get('department_size'):
+        return state.get('employees') or []
+    return get_store(state.get('tenant')).department_records(state['department'])
+
+
+def proposal_options(hike_eligible: bool, has_managers: bool) -> List[str]:
+    """Proposal types to choose between, in the order the seeded choice indexes them."""
+    options = []
+    if hike_eligible:
+        options.append('salary_hike')
+    if has_managers:
+        options.append('manager_change')
+    return options
+
+
+def analyze_department_node(state: WorkflowState, config: RunnableConfig) -> Dict[str, Any]:
     """Identify highest-paid employee and generate a proposal."""
     print("[Node] Analyzing department data")
     
     employees = state['employees']
+    size = state.get('department_size', len(employees))
     
-    if not employees:
+    if not size:
         return {
             "final_status": "no_data",
             "final_message": "No employees found in this department",
             "execution_log": state.get("execution_log", []) + ["No employees found"]
         }
     
-    # Find highest-paid employee
-    highest_paid = max(employees, key=lambda x: x['Current_Salary'])
+    department = state['department']
+    store = get_store(state.get('tenant'))
+    
+    # Highest-paid employee from the shard reduce, else the store's top-earner index
+    highest_paid = state.get('highest_paid') or store.top_earner(department)
+    if highest_paid is None and employees:
+        highest_paid = max(employees, key=lambda e: e.current_salary)
+    
+    # Hike policy results from the shards, else one vectorized pass over the department
+    policy = get_policy()
+    stats = state.get('department_stats')
+    if stats and stats.get('policy_version') == policy.version:
+        eligible = stats['eligible']
+        hike = next((h for h in stats['top_hikes'] if h['employee_id'] == highest_paid.employee_id), None)
+    else:
+        hikes = policy.evaluate(store.department_employees(department))
+        eligible = len(hikes)
+        hike = hikes.loc[highest_paid.employee_id] if highest_paid.employee_id in hikes.index else None
     
     # Generate proposal (alternating between salary hike and manager change)
-    proposal_type = random.choice(['salary_hike', 'manager_change'])
+    hierarchy = store.hierarchy()
+    potential_managers = eligible_managers(
+        store.department_slice(department, columns=['Employee_ID', 'Name']), highest_paid, hierarchy
+    )
+    options = proposal_options(hike is not None, len(potential_managers) > 0)
+    
+    if not options:
+        return {
+            "final_status": "no_proposal",
+            "final_message": f"No policy rule or reassignment applies to {highest_paid.name}",
+            "execution_log": state.get("execution_log", []) + ["No applicable proposal"]
+        }
+    
+    rng = random.Random(state['seed']) if state.get('seed') is not None else random
+    proposal_type = rng.choice(options)
     
     if proposal_type == 'salary_hike':
-        current_salary = highest_paid['Current_Salary']
-        proposed_salary = int(current_salary * 1.15)  # 15% hike
         proposal_details = {
-            'employee_id': highest_paid['Employee_ID'],
-            'employee_name': highest_paid['Name'],
-            'current_salary': current_salary,
-            'proposed_salary': proposed_salary,
-            'increase_percentage': 15,
-            'reason': f"Top performer in {state['department']} department"
+            'employee_id': highest_paid.employee_id,
+            'employee_name': highest_paid.name,
+            'current_salary': highest_paid.current_salary,
+            'proposed_salary': int(hike['proposed_salary']),
+            'increase_percentage': whole_percentage(hike['increase_percentage']),
+            'reason': hike['reason'],
+            'policy_rule': hike['rule']
         }
     else:  # manager_change
         # Suggest a new manager from the same department (excluding the employee)
-        potential_managers = [e for e in employees if e['Employee_ID'] != highest_paid['Employee_ID']]
-        if potential_managers:
-            new_manager = random.choice(potential_managers)
-            proposal_details = {
-                'employee_id': highest_paid['Employee_ID'],
-                'employee_name': highest_paid['Name'],
-                'current_manager': highest_paid['Manager'],
-                'proposed_manager': new_manager['Name'],
-                'reason': f"Reassignment for better team dynamics in {state['department']}"
-            }
-        else:
-            # Fall back to salary hike if no other employees
-            proposal_type = 'salary_hike'
-            current_salary = highest_paid['Current_Salary']
-            proposed_salary = int(current_salary * 1.15)
-            proposal_details = {
-                'employee_id': highest_paid['Employee_ID'],
-                'employee_name': highest_paid['Name'],
-                'current_salary': current_salary,
-                'proposed_salary': proposed_salary,
-                'increase_percentage': 15,
-                'reason': f"Top performer in {state['department']} department"
-            }
-    
-    log_entry = f"Identified highest-paid: {highest_paid['Name']} (₹{highest_paid['Current_Salary']:,}). Proposal: {proposal_type}"
+        new_manager = str(rng.choice(potential_managers))
+        proposal_details = {
+            'employee_id': highest_paid.employee_id,
+            'employee_name': highest_paid.name,
+            'current_manager': highest_paid.manager,
+            'proposed_manager': new_manager,
+            'current_manager_reports': hierarchy.report_count(highest_paid.manager),
+            'proposed_manager_reports': hierarchy.report_count(new_manager),
+            'reason': f"Reassignment for better team dynamics in {department}"
+        }
+    
+    # Track the proposal subject so data changes can flag this paused thread
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if thread_id:
+        store.watch(thread_id, proposal_details['employee_id'])
+        get_history_store().record_proposal({
+            "department": department,
+            "proposal_type": proposal_type,
+            "proposal_details": proposal_details,
+            "policy_version": policy.version,
+        }, thread_id=thread_id)
+        review_queue.enqueue(thread_id, department, proposal_type, proposal_details)
+    
+    log_entry = (
+        f"Identified highest-paid: {highest_paid.name} (₹{highest_paid.current_salary:,}). "
+        f"Proposal: {proposal_type} ({eligible} eligible under policy {policy.version})"
+    )
     
     return {
         "highest_paid": highest_paid,
         "proposal_type": proposal_type,
         "proposal_details": proposal_details,
+        "policy_version": policy.version,
         "execution_log": state.get("execution_log", []) + [log_entry]
     }
 
@@ -135,7 +341,33 @@ def process_approval_node(state: WorkflowState) -> Dict[str, Any]:
     }
 
 
-def process_rejection_node(state: WorkflowState) -> Dict[str, Any]:
+def record_decision_events(state: WorkflowState, config: RunnableConfig, status: str, message: str,
+                           changes: Optional[Dict[str, Any]] = None, version: Optional[str] = None):
+    """Queue the downstream side effects of a decision in the outbox."""
+    details = state['proposal_details']
+    event = {
+        'tenant': state.get('tenant'),
+        'department': state['department'],
+        'employee_id': details['employee_id'],
+        'employee_name': details['employee_name'],
+        'proposal_type': state['proposal_type'],
+        'status': status,
+        'message': message,
+        'effective_version': version,
+        'decided_at': time.time(),
+    }
+    events = [
+        {**event, 'topic': 'notification'},
+        {**event, 'topic': 'audit', 'proposal_details': details,
+         'modification_details': state.get('modification_details'), 'changes': changes},
+    ]
+    if changes and 'Current_Salary' in changes:
+        events.append({**event, 'topic': 'payroll', 'old_salary': details['current_salary'],
+                       'new_salary': changes['Current_Salary']})
+    get_outbox().enqueue(events, thread_id=config.get("configurable", {}).get("thread_id"))
+
+
+def process_rejection_node(state: WorkflowState, config: RunnableConfig) -> Dict[str, Any]:
     """Process a rejected proposal."""
     print("[Node] Processing rejection")
     
@@ -143,6 +375,7 @@ def process_rejection_node(state: WorkflowState) -> Dict[str, Any]:
     message = f"❌ REJECTED: Proposal for {proposal_details['employee_name']} was rejected"
     
     log_entry = f"Proposal rejected for {proposal_details['employee_name']}"
+    record_decision_events(state, config, "rejected", message)
     
     return {
         "final_status": "rejected",
@@ -181,3 +414,34 @@ def process_modification_node(state: WorkflowState) -> Dict[str, Any]:
         "final_message": message,
         "execution_log": state.get("execution_log", []) + [log_entry]
     }
+
+
+def apply_decision_node(state: WorkflowState, config: RunnableConfig) -> Dict[str, Any]:
+    """Write the approved or modified change back to the dataset."""
+    print("[Node] Applying decision to dataset")
+    
+    proposal_type = state['proposal_type']
+    proposal_details = state['proposal_details']
+    modification_details = state.get('modification_details') or {}
+    modified = state.get('final_status') == 'modified'
+    
+    if proposal_type == 'salary_hike':
+        salary = proposal_details['proposed_salary']
+        if modified:
+            salary = modification_details.get('modified_salary', salary)
+        changes = {'Current_Salary': int(salary)}
+    else:  # manager_change
+        manager = proposal_details['proposed_manager']
+        if modified:
+            manager = modification_details.get('modified_manager', manager)
+        changes = {'Manager': manager}
+    
+    thread_id = config.get("configurable", {}).get("thread_id")
+    version = get_store(state.get('tenant')).apply_changes(proposal_details['employee_id'], changes, thread_id=thread_id)
+    log_entry = f"Applied {', '.join(changes)} change for {proposal_details['employee_name']} (data version {version})"
+    record_decision_events(state, config, state['final_status'], state['final_message'],
+                           changes=changes, version=version)
+    
+    return {
+        "execution_log": state.get("execution_log", []) + [log_entry]
+    }
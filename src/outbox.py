@@ -0,0 +1,323 @@
+"""
+Durable outbox for side effects of decisions.
+
+Workflow nodes record what should happen downstream (payroll export,
+reviewer notification, audit trail) as outbox events: one SQLite insert
+per event in WAL mode, so a decision never waits on the side effect
+itself. A pool of background workers claims ready events in batches per
+topic, hands each batch to the topic's handler, and deletes the events
+once it succeeds. A failed batch is retried with exponential backoff;
+after ``MAX_ATTEMPTS`` its events are parked as dead for inspection.
+
+Delivery is at least once: a crash after a handler ran but before its
+events were deleted replays them, so every written record carries its
+event id for downstream de-duplication. While an event is pending, a
+re-run node cannot record a second one for the same thread and topic.
+
+Built-in handlers write under ``OUTBOX_DIR``:
+
+- ``payroll``: rows appended to ``payroll_changes.csv``
+- ``notification``: one JSON file per event in ``notifications/``
+- ``audit``: lines appended to ``audit.jsonl``
+
+Command line (drain pending events and print counts)::
+
+    python -m src.outbox
+"""
+import csv
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+OUTBOX_PATH = Path(__file__).parent.parent / "data" / "outbox.db"
+OUTBOX_DIR = Path(os.environ.get('HITL_OUTBOX_DIR', Path(__file__).parent.parent / "data" / "outbox"))
+WORKERS = int(os.environ.get('HITL_OUTBOX_WORKERS', 2))
+BATCH_SIZE = 100
+LEASE_SECONDS = 60
+POLL_SECONDS = 1.0
+MAX_ATTEMPTS = 8
+MAX_BACKOFF_SECONDS = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    dedupe_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    claimed_until REAL,
+    dead INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_ready ON outbox (dead, topic, available_at, id);
+"""
+
+Handler = Callable[[List[Dict[str, Any]]], None]
+
+
+class Outbox:
+    """SQLite-backed event queue drained by background worker threads."""
+
+    def __init__(self, path: Path = OUTBOX_PATH, workers: int = WORKERS,
+                 batch_size: int = BATCH_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.handlers: Dict[str, Handler] = {}
+        self.delivered = 0
+        self.failed_batches = 0
+        self._in_flight = 0  # batches being handled by this process
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def register(self, topic: str, handler: Handler):
+        """Deliver batches of ``topic`` events to ``handler``."""
+        self.handlers[topic] = handler
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+
+    def enqueue(self, events: List[Dict[str, Any]], thread_id: Optional[str] = None):
+        """
+        Record events (dicts with a ``topic``) in one transaction.
+
+        With a ``thread_id``, each topic is recorded once per thread.
+        """
+        now = time.time()
+        rows = [
+            (event['topic'], f"{event['topic']}:{thread_id}" if thread_id else None,
+             json.dumps({**event, 'thread_id': thread_id}, default=str), now, now)
+            for event in events
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (topic, dedupe_key, payload, available_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        self.start()
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        """Lease up to ``batch_size`` ready events of the topic with the oldest one."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT topic FROM outbox WHERE dead = 0 AND available_at <= ? "
+                "AND (claimed_until IS NULL OR claimed_until <= ?) ORDER BY id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return []
+            claimed = self._conn.execute(
+                "UPDATE outbox SET claimed_until = ? WHERE id IN ("
+                " SELECT id FROM outbox WHERE dead = 0 AND topic = ? AND available_at <= ?"
+                " AND (claimed_until IS NULL OR claimed_until <= ?) ORDER BY id LIMIT ?"
+                ") RETURNING id, topic, payload, attempts",
+                (now + LEASE_SECONDS, row[0], now, now, self.batch_size)
+            ).fetchall()
+        return [
+            {'id': id_, 'topic': topic, 'attempts': attempts, **json.loads(payload)}
+            for id_, topic, payload, attempts in sorted(claimed)
+        ]
+
+    def _finish(self, batch: List[Dict[str, Any]], error: Optional[str] = None):
+        with self._lock, self._conn:
+            if error is None:
+                self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(event['id'],) for event in batch])
+                self.delivered += len(batch)
+                return
+            self.failed_batches += 1
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, claimed_until = NULL, last_error = ?, "
+                "available_at = ?, dead = attempts + 1 >= ? WHERE id = ?",
+                [
+                    (error, now + min(2 ** (event['attempts'] + 1), MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0),
+                     MAX_ATTEMPTS, event['id'])
+                    for event in batch
+                ]
+            )
+
+    def process_batch(self) -> int:
+        """Deliver one batch; returns how many events it held."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            batch = self._claim()
+            if not batch:
+                return 0
+            handler = self.handlers.get(batch[0]['topic'])
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler for topic '{batch[0]['topic']}'")
+                handler(batch)
+            except Exception as e:
+                print(f"[Outbox] {batch[0]['topic']} batch of {len(batch)} failed: {e}")
+                self._finish(batch, error=str(e))
+            else:
+                self._finish(batch)
+            return len(batch)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _run(self):
+        while True:
+            try:
+                if self.process_batch():
+                    continue
+            except sqlite3.Error as e:
+                print(f"[Outbox] Worker error: {e}")
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+
+    def start(self):
+        """Start the worker threads once per process."""
+        if self._threads or self.workers <= 0:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"outbox-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """
+        Deliver ready events in the calling thread and wait for this
+        process's workers to finish theirs; True if none are left ready.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process_batch():
+                continue
+            with self._lock:
+                idle = not self._in_flight
+            if idle and not self._ready():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _ready(self) -> int:
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE dead = 0 AND available_at <= ? "
+                "AND (claimed_until IS NULL OR claimed_until <= ?)", (now, now)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            pending, retrying, dead, oldest = self._conn.execute(
+                "SELECT SUM(dead = 0 AND attempts = 0), SUM(dead = 0 AND attempts > 0), "
+                "SUM(dead), MIN(CASE WHEN dead = 0 THEN created_at END) FROM outbox"
+            ).fetchone()
+            by_topic = dict(self._conn.execute(
+                "SELECT topic, COUNT(*) FROM outbox WHERE dead = 0 GROUP BY topic"
+            ).fetchall())
+        return {
+            'pending': pending or 0,
+            'retrying': retrying or 0,
+            'dead': dead or 0,
+            'by_topic': by_topic,
+            'oldest_age_seconds': round(now - oldest, 1) if oldest else None,
+            'delivered': self.delivered,
+            'failed_batches': self.failed_batches,
+            'workers': len(self._threads),
+        }
+
+
+# ----------------------------------------------------------------------
+# Built-in handlers
+# ----------------------------------------------------------------------
+
+PAYROLL_COLUMNS = ['event_id', 'tenant', 'employee_id', 'employee_name', 'department',
+                   'old_salary', 'new_salary', 'effective_version', 'thread_id', 'decided_at']
+
+
+def _append_durably(path: Path, write: Callable):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_payroll(batch: List[Dict[str, Any]]):
+    """Append approved salary changes to the payroll export, one fsync per batch."""
+    path = OUTBOX_DIR / "payroll_changes.csv"
+    new_file = not path.exists()
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=PAYROLL_COLUMNS, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        for event in batch:
+            writer.writerow({**event, 'event_id': event['id']})
+    _append_durably(path, write)
+
+
+def write_notifications(batch: List[Dict[str, Any]]):
+    """One JSON file per notification, written atomically."""
+    directory = OUTBOX_DIR / "notifications"
+    directory.mkdir(parents=True, exist_ok=True)
+    for event in batch:
+        path = directory / f"{event['id']:012d}.json"
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(event, default=str, indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+
+
+def write_audit(batch: List[Dict[str, Any]]):
+    """Append decision records to the audit log, one fsync per batch."""
+    _append_durably(OUTBOX_DIR / "audit.jsonl", lambda f: f.writelines(
+        json.dumps(event, default=str) + "\n" for event in batch
+    ))
+
+
+_outbox: Optional[Outbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox with the built-in handlers registered."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox()
+            _outbox.register('payroll', write_payroll)
+            _outbox.register('notification', write_notifications)
+            _outbox.register('audit', write_audit)
+        return _outbox
+
+
+def main():
+    outbox = get_outbox()
+    drained = outbox.drain()
+    print(json.dumps(outbox.stats(), indent=2))
+    return 0 if drained else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
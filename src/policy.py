@@ -0,0 +1,178 @@
+"""
+Declarative salary hike policy evaluated over whole departments at once.
+
+A policy is an ordered list of rules. Each rule has a ``when`` block of
+conditions and the hike it grants; the first matching rule wins. For
+example, "10% if Join_Date < 2020 and below band midpoint" is::
+
+    {
+        "name": "loyal_below_mid",
+        "when": {"joined_before": "2020-01-01", "band_position": "below_midpoint"},
+        "increase_percentage": 10,
+        "reason": "Long-tenured and below the {position} band midpoint"
+    }
+
+Supported conditions: ``departments``, ``positions`` (lists), ``joined_before``,
+``joined_after`` (dates), ``min_tenure_years``, ``max_tenure_years``,
+``min_salary``, ``max_salary`` and ``band_position`` (one of ``below_min``,
+``below_midpoint``, ``above_midpoint``, ``above_max``). Reasons may use the
+``{department}`` and ``{position}`` placeholders.
+
+Rules are compiled once into functions returning boolean masks, so a
+whole frame is evaluated with a handful of vectorized operations.
+"""
+import hashlib
+import json
+import threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+from .bands import band_columns
+
+POLICY_PATH = Path(__file__).parent.parent / "data" / "policy.json"
+
+# Reproduces the original behaviour: a flat 15% for the department's top earner
+DEFAULT_RULES = [
+    {
+        'name': 'top_performer',
+        'when': {},
+        'increase_percentage': 15,
+        'reason': 'Top performer in {department} department',
+    },
+]
+
+Condition = Callable[[pd.DataFrame, Dict[str, pd.Series]], pd.Series]
+
+
+def _compile_condition(key: str, value) -> Condition:
+    if key == 'departments':
+        return lambda f, c: f['Department'].isin(value)
+    if key == 'positions':
+        return lambda f, c: f['Position'].isin(value)
+    if key == 'joined_before':
+        cutoff = pd.Timestamp(value)
+        return lambda f, c: c['joined'] < cutoff
+    if key == 'joined_after':
+        cutoff = pd.Timestamp(value)
+        return lambda f, c: c['joined'] > cutoff
+    if key == 'min_tenure_years':
+        return lambda f, c: c['tenure'] >= value
+    if key == 'max_tenure_years':
+        return lambda f, c: c['tenure'] <= value
+    if key == 'min_salary':
+        return lambda f, c: f['Current_Salary'] >= value
+    if key == 'max_salary':
+        return lambda f, c: f['Current_Salary'] <= value
+    if key == 'band_position':
+        column, op = {
+            'below_min': ('band_min', np.less),
+            'below_midpoint': ('band_mid', np.less),
+            'above_midpoint': ('band_mid', np.greater),
+            'above_max': ('band_max', np.greater),
+        }[value]
+        return lambda f, c: pd.Series(op(f['Current_Salary'], c[column]), index=f.index)
+    raise ValueError(f"Unknown policy condition: {key}")
+
+
+class ProposalPolicy:
+    """An ordered set of compiled hike rules with a stable version hash."""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.version = hashlib.sha1(
+            json.dumps(rules, sort_keys=True).encode()
+        ).hexdigest()[:12]
+        self._compiled = [
+            [_compile_condition(key, value) for key, value in rule.get('when', {}).items()]
+            for rule in rules
+        ]
+
+    def _context(self, frame: pd.DataFrame, as_of: pd.Timestamp) -> Dict[str, pd.Series]:
+        joined = pd.to_datetime(frame['Join_Date'])
+        context = {
+            'joined': joined,
+            'tenure': (as_of - joined).dt.days / 365.25,
+        }
+        context.update(band_columns(frame['Position']))
+        return context
+
+    def evaluate(self, frame: pd.DataFrame, as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Return a hike proposal for every employee matched by some rule.
+
+        The result is indexed like ``frame`` and has ``rule``,
+        ``increase_percentage``, ``current_salary``, ``proposed_salary``
+        and ``reason`` columns.
+        """
+        as_of = as_of or pd.Timestamp.now().normalize()
+        context = self._context(frame, as_of)
+        all_rows = pd.Series(True, index=frame.index)
+
+        masks = []
+        for conditions in self._compiled:
+            mask = all_rows
+            for condition in conditions:
+                mask = mask & condition(frame, context).fillna(False).astype(bool)
+            masks.append(mask.to_numpy())
+
+        # First matching rule wins; -1 means no rule matched
+        if masks:
+            rule_index = np.select(masks, np.arange(len(masks)), default=-1)
+        else:
+            rule_index = np.full(len(frame), -1)
+        matched = rule_index >= 0
+        subset = frame.loc[matched]
+        rule_index = rule_index[matched]
+
+        percentages = np.array([r['increase_percentage'] for r in self.rules], dtype=float)
+        pct = percentages[rule_index]
+        current = subset['Current_Salary'].to_numpy()
+        proposals = pd.DataFrame({
+            'rule': np.array([r['name'] for r in self.rules], dtype=object)[rule_index],
+            'increase_percentage': pct,
+            'current_salary': current,
+            'proposed_salary': np.floor(current * (1 + pct / 100)).astype('int64'),
+        }, index=subset.index)
+
+        # Format each (rule, department, position) reason once, not once per row
+        dept_codes, departments = pd.factorize(subset['Department'])
+        pos_codes, positions = pd.factorize(subset['Position'])
+        combined = (rule_index.astype('int64') * len(departments) + dept_codes) * len(positions) + pos_codes
+        combos, inverse = np.unique(combined, return_inverse=True)
+        reasons = np.empty(len(combos), dtype=object)
+        for i, combo in enumerate(combos):
+            rest, p = divmod(int(combo), len(positions))
+            r, d = divmod(rest, len(departments))
+            reasons[i] = self.rules[r].get('reason', '').format(
+                department=departments[d], position=positions[p]
+            )
+        proposals['reason'] = reasons[inverse]
+        return proposals
+
+
+def whole_percentage(value) -> float:
+    """Return a percentage as an int when it is whole (15 rather than 15.0)."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+_policy: Optional[ProposalPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def load_policy(path: Path = POLICY_PATH) -> ProposalPolicy:
+    """Load rules from a JSON file, falling back to the default policy."""
+    if Path(path).exists():
+        with open(path, encoding='utf-8') as f:
+            return ProposalPolicy(json.load(f))
+    return ProposalPolicy(DEFAULT_RULES)
+
+
+def get_policy() -> ProposalPolicy:
+    """Return the process-wide policy, loading it on first use."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = load_policy()
+        return _policy
@@ -0,0 +1,153 @@
+"""
+Opt-in profiling of single requests and CLI runs.
+
+A profiled run records a cProfile of the calling thread and a
+tracemalloc snapshot, and saves both as one zip artifact in
+``PROFILE_DIR``:
+
+- ``profile.prof``: raw stats, for ``snakeviz`` or ``python -m pstats``
+- ``profile.txt``: the top functions by cumulative and own time
+- ``memory.txt``: peak traced memory and the top allocating lines
+
+Requests are profiled when they carry ``X-Profile: <HITL_PROFILE_TOKEN>``
+or are picked by the ``HITL_PROFILE_RATE`` sample (0 to 1). With neither
+configured, the check is one dict lookup per request. Only one run is
+profiled at a time; others overlapping it run unprofiled.
+"""
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+PROFILE_DIR = Path(os.environ.get('HITL_PROFILE_DIR', Path(__file__).parent.parent / "data" / "profiles"))
+PROFILE_TOKEN = os.environ.get('HITL_PROFILE_TOKEN')
+PROFILE_RATE = float(os.environ.get('HITL_PROFILE_RATE', 0))
+MAX_ARTIFACTS = 50
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+_active = threading.Lock()
+
+
+def authorized(token: Optional[str]) -> bool:
+    """True if ``token`` matches the configured admin token."""
+    return bool(PROFILE_TOKEN and token) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def should_profile(headers) -> bool:
+    """Decide whether a request with these headers is profiled."""
+    if PROFILE_TOKEN and 'X-Profile' in headers:
+        return authorized(headers['X-Profile'])
+    return PROFILE_RATE > 0 and random.random() < PROFILE_RATE
+
+
+class ProfileRun:
+    """Handle on an in-progress profiled run; ``artifact_id`` is set once saved."""
+
+    __slots__ = ('name', 'artifact_id', 'path', 'seconds')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.artifact_id: Optional[str] = None
+        self.path: Optional[Path] = None
+        self.seconds = 0.0
+
+
+@contextmanager
+def profiled(name: str) -> Iterator[Optional[ProfileRun]]:
+    """
+    Profile the enclosed block and save an artifact.
+
+    Yields a ``ProfileRun``, or None when another run is already being
+    profiled, in which case the block simply runs unprofiled.
+    """
+    if not _active.acquire(blocking=False):
+        yield None
+        return
+    run = ProfileRun(name)
+    profiler = cProfile.Profile()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield run
+    finally:
+        profiler.disable()
+        run.seconds = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        try:
+            _save(run, profiler, snapshot, peak)
+        finally:
+            _active.release()
+
+
+def _save(run: ProfileRun, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, peak: int):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    run.artifact_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{run.name}-{uuid.uuid4().hex[:8]}"
+    run.path = PROFILE_DIR / f"{run.artifact_id}.zip"
+
+    text = io.StringIO()
+    text.write(f"{run.name}: {run.seconds:.3f}s wall\n\n")
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    stats.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    memory = io.StringIO()
+    memory.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB\n\n")
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        memory.write(f"{stat}\n")
+
+    with zipfile.ZipFile(run.path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('profile.prof', 'w') as raw:
+            raw.write(_dump(profiler))
+        archive.writestr('profile.txt', text.getvalue())
+        archive.writestr('memory.txt', memory.getvalue())
+
+    # Keep only the most recent artifacts
+    for old in sorted(PROFILE_DIR.glob('*.zip'))[:-MAX_ARTIFACTS]:
+        old.unlink(missing_ok=True)
+
+
+def _dump(profiler: cProfile.Profile) -> bytes:
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def list_artifacts() -> List[Dict[str, Any]]:
+    """Saved artifacts, newest first."""
+    if not PROFILE_DIR.exists():
+        return []
+    return [
+        {'id': path.stem, 'bytes': path.stat().st_size, 'created_at': path.stat().st_mtime}
+        for path in sorted(PROFILE_DIR.glob('*.zip'), reverse=True)
+    ]
+
+
+def artifact_path(artifact_id: str) -> Optional[Path]:
+    """Path of a saved artifact, or None for unknown or malformed ids."""
+    path = PROFILE_DIR / f"{artifact_id}.zip"
+    if path.parent != PROFILE_DIR or not path.is_file():
+        return None
+    return path
@@ -0,0 +1,118 @@
+"""
+Memoized department analysis keyed by data and policy version.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Tuple
+from .data_store import get_store
+from .policy import get_policy
+from .tenants import current_tenant, thread_tenant
+from .workflow import graph, start_paused_thread
+
+MAX_ENTRIES = 256
+
+# State produced by load_data/analyze_department that a new thread can reuse
+ANALYSIS_KEYS = (
+    'department', 'tenant', 'seed', 'employees', 'department_size', 'data_version', 'highest_paid', 'department_stats',
+    'proposal_type', 'proposal_details', 'policy_version', 'execution_log'
+)
+
+
+class ProposalCache:
+    """Size-bounded LRU of analysis results with hit/miss counters."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            values = self._entries.get(key)
+            if values is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return values
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Membership test that leaves the LRU order and counters alone."""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Hashable, values: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+
+proposal_cache = ProposalCache()
+
+
+def proposal_key(department: str, seed: Optional[int] = None, tenant: Optional[str] = None) -> Tuple:
+    """Cache key for an analysis of a tenant's current data under the current policy."""
+    tenant = tenant or current_tenant()
+    return (tenant, department, get_store(tenant).version, get_policy().version, seed)
+
+
+def run_analysis(thread_id: str, department: str,
+                 seed: Optional[int] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Analyze a department into a new paused thread, reusing cached proposals.
+
+    Returns ``(state, cached)``. On a hit the stored analysis is written to
+    the new thread directly and no graph node runs. The tenant whose data
+    is analyzed comes from the thread id.
+    """
+    tenant = thread_tenant(thread_id)
+    get_store(tenant).refresh()
+    key = proposal_key(department, seed, tenant)
+    cached = proposal_cache.get(key)
+    if cached is not None:
+        return adopt_analysis(thread_id, cached, f"Reused cached proposal for data version {key[2]}"), True
+
+    config = {"configurable": {"thread_id": thread_id}}
+    initial_state = {
+        "department": department,
+        "tenant": tenant,
+        "seed": seed,
+        "employees": [],
+        "execution_log": []
+    }
+    result = None
+    for event in graph.stream(initial_state, config, stream_mode="values"):
+        result = event
+
+    # Only cache real proposals computed against data that did not move mid-run
+    if result and result.get('proposal_details') and proposal_key(department, seed, tenant) == key:
+        proposal_cache.put(key, {k: result.get(k) for k in ANALYSIS_KEYS})
+    return result, False
+
+
+def adopt_analysis(thread_id: str, state: Dict[str, Any], note: str) -> Dict[str, Any]:
+    """
+    Start a new paused thread from another analysis' state without running the graph.
+
+    A state without a proposal is returned as is, since there is nothing to review.
+    """
+    if not state or not state.get('proposal_details'):
+        return state
+    values = {k: state.get(k) for k in ANALYSIS_KEYS}
+    values['execution_log'] = list(state.get('execution_log') or []) + [note]
+    return start_paused_thread(thread_id, values)
@@ -0,0 +1,267 @@
+"""
+Global work queue of workflow threads paused for human approval.
+
+Every paused proposal is enqueued with a due time: its enqueue time plus
+its department's SLA, pulled earlier by its salary impact (each
+``IMPACT_STEP`` rupees buys ``IMPACT_CREDIT_HOURS``, capped at
+``MAX_IMPACT_CREDIT_HOURS``). Reviewers claim the item due soonest and
+hold a lease on it until they decide, release it, or the lease expires.
+
+Each tenant's employee has at most one queued item per proposal type.
+Re-analyzing a department starts new threads for the same proposals, so
+an unclaimed item for the same subject is replaced by the newer thread,
+which keeps the original enqueue time and so its place in line. While
+the older item is leased, the newer thread is not queued; the reviewer
+holding the lease decides for that subject.
+
+Each tenant's department has its own min-heap, so claiming with or without a
+department filter costs O(log N) plus one peek per department. Entries
+are invalidated lazily: a claimed, completed or re-queued item leaves
+its old heap entry behind and it is skipped when it surfaces. Expired
+leases are found through a second heap ordered by expiry.
+"""
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from .tenants import thread_tenant
+
+DEFAULT_SLA_HOURS = 72
+LEASE_SECONDS = 15 * 60
+IMPACT_STEP = 1_000_000
+IMPACT_CREDIT_HOURS = 12
+MAX_IMPACT_CREDIT_HOURS = 48
+
+
+class QueueItem:
+    """A queued thread and its lease, if claimed."""
+
+    __slots__ = (
+        'thread_id', 'tenant', 'department', 'employee_id', 'employee_name', 'proposal_type',
+        'salary_impact', 'enqueued_at', 'due_at', 'priority',
+        'lease', 'reviewer', 'lease_expires', 'entry'
+    )
+
+    def __init__(self, thread_id: str, department: str, employee_id: Optional[int],
+                 employee_name: Optional[str], proposal_type: Optional[str],
+                 salary_impact: int, enqueued_at: float, due_at: float, priority: float):
+        self.thread_id = thread_id
+        self.tenant = thread_tenant(thread_id)
+        self.department = department
+        self.employee_id = employee_id
+        self.employee_name = employee_name
+        self.proposal_type = proposal_type
+        self.salary_impact = salary_impact
+        self.enqueued_at = enqueued_at
+        self.due_at = due_at
+        self.priority = priority
+        self.lease: Optional[str] = None
+        self.reviewer: Optional[str] = None
+        self.lease_expires: Optional[float] = None
+        self.entry = 0  # id of the live heap entry
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'thread_id': self.thread_id,
+            'tenant': self.tenant,
+            'department': self.department,
+            'employee_id': self.employee_id,
+            'employee_name': self.employee_name,
+            'proposal_type': self.proposal_type,
+            'salary_impact': self.salary_impact,
+            'enqueued_at': self.enqueued_at,
+            'due_at': self.due_at,
+            'overdue': time.time() > self.due_at,
+            'reviewer': self.reviewer,
+            'lease_expires': self.lease_expires,
+        }
+
+
+class LeaseError(Exception):
+    """Raised when a lease is missing, expired or held by someone else."""
+
+
+class ReviewQueue:
+    """Priority queue of pending approvals with reviewer leases."""
+
+    def __init__(self, sla_hours: Optional[Dict[str, float]] = None,
+                 default_sla_hours: float = DEFAULT_SLA_HOURS,
+                 lease_seconds: float = LEASE_SECONDS):
+        self.sla_hours = dict(sla_hours or {})
+        self.default_sla_hours = default_sla_hours
+        self.lease_seconds = lease_seconds
+        self._items: Dict[str, QueueItem] = {}
+        self._subjects: Dict[Tuple[str, Any, Optional[str]], str] = {}  # (tenant, employee, type) -> thread
+        self._heaps: Dict[Tuple[str, str], List] = {}  # by (tenant, department)
+        self._leases: List = []  # (expires, thread_id, lease)
+        self._entries = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _push(self, item: QueueItem):
+        item.entry = next(self._entries)
+        heapq.heappush(self._heaps.setdefault((item.tenant, item.department), []),
+                       (item.priority, item.entry, item.thread_id))
+
+    def _reclaim_expired(self, now: float):
+        while self._leases and self._leases[0][0] <= now:
+            _, thread_id, lease = heapq.heappop(self._leases)
+            item = self._items.get(thread_id)
+            if item is not None and item.lease == lease and item.lease_expires <= now:
+                item.lease = item.reviewer = item.lease_expires = None
+                self._push(item)
+
+    def _peek(self, key: Tuple[str, str]) -> Optional[QueueItem]:
+        heap = self._heaps.get(key)
+        while heap:
+            _, entry, thread_id = heap[0]
+            item = self._items.get(thread_id)
+            if item is not None and item.entry == entry and item.lease is None:
+                return item
+            heapq.heappop(heap)
+        return None
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+
+    def enqueue(self, thread_id: str, department: str, proposal_type: Optional[str],
+                details: Dict[str, Any], now: Optional[float] = None) -> QueueItem:
+        """Add a paused thread; re-enqueueing a known thread keeps its place."""
+        now = now or time.time()
+        impact = 0
+        if proposal_type == 'salary_hike':
+            impact = int(details.get('proposed_salary') or 0) - int(details.get('current_salary') or 0)
+        sla = self.sla_hours.get(department, self.default_sla_hours)
+        credit = min(max(impact, 0) / IMPACT_STEP * IMPACT_CREDIT_HOURS, MAX_IMPACT_CREDIT_HOURS)
+        tenant = thread_tenant(thread_id)
+        subject = (tenant, details.get('employee_id'), proposal_type)
+        with self._lock:
+            if thread_id in self._items:
+                return self._items[thread_id]
+            queued = self._items.get(self._subjects.get(subject)) if subject[1] is not None else None
+            if queued is not None:
+                if queued.lease is not None and queued.lease_expires > now:
+                    return queued
+                # Superseded; its heap entry is skipped when it surfaces
+                del self._items[queued.thread_id]
+                now = queued.enqueued_at
+            due_at = now + sla * 3600
+            item = QueueItem(
+                thread_id=thread_id,
+                department=department,
+                employee_id=details.get('employee_id'),
+                employee_name=details.get('employee_name'),
+                proposal_type=proposal_type,
+                salary_impact=impact,
+                enqueued_at=now,
+                due_at=due_at,
+                priority=due_at - credit * 3600,
+            )
+            self._items[thread_id] = item
+            if subject[1] is not None:
+                self._subjects[subject] = thread_id
+            self._push(item)
+            return item
+
+    def complete(self, thread_id: str):
+        """Drop a thread that has been decided."""
+        with self._lock:
+            item = self._items.pop(thread_id, None)
+            if item is not None:
+                subject = (item.tenant, item.employee_id, item.proposal_type)
+                if self._subjects.get(subject) == thread_id:
+                    del self._subjects[subject]
+
+    # ------------------------------------------------------------------
+    # Reviewers
+    # ------------------------------------------------------------------
+
+    def claim(self, reviewer: Optional[str] = None, department: Optional[str] = None,
+              now: Optional[float] = None, tenant: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the most urgent unclaimed item, optionally within one tenant
+        and department.
+
+        Returns the item with its ``lease`` token, or None if nothing is waiting.
+        """
+        now = now or time.time()
+        with self._lock:
+            self._reclaim_expired(now)
+            keys = [key for key in self._heaps
+                    if (tenant is None or key[0] == tenant) and (department is None or key[1] == department)]
+            best = None
+            for key in keys:
+                item = self._peek(key)
+                if item is not None and (best is None or item.priority < best.priority):
+                    best = item
+            if best is None:
+                return None
+            heapq.heappop(self._heaps[(best.tenant, best.department)])
+            best.lease = uuid.uuid4().hex
+            best.reviewer = reviewer
+            best.lease_expires = now + self.lease_seconds
+            heapq.heappush(self._leases, (best.lease_expires, best.thread_id, best.lease))
+            return {**best.to_dict(), 'lease': best.lease}
+
+    def release(self, thread_id: str, lease: str):
+        """Give a claimed item back to the queue undecided."""
+        with self._lock:
+            item = self._check(thread_id, lease, time.time())
+            item.lease = item.reviewer = item.lease_expires = None
+            self._push(item)
+
+    def renew(self, thread_id: str, lease: str) -> float:
+        """Extend a lease; returns the new expiry time."""
+        now = time.time()
+        with self._lock:
+            item = self._check(thread_id, lease, now)
+            item.lease_expires = now + self.lease_seconds
+            heapq.heappush(self._leases, (item.lease_expires, thread_id, lease))
+            return item.lease_expires
+
+    def _check(self, thread_id: str, lease: Optional[str], now: float) -> QueueItem:
+        item = self._items.get(thread_id)
+        if item is None:
+            raise LeaseError("Item is no longer queued")
+        if item.lease is None or item.lease_expires <= now:
+            raise LeaseError("Lease has expired")
+        if item.lease != lease:
+            raise LeaseError("Item is claimed by another reviewer")
+        return item
+
+    def check_decision(self, thread_id: str, lease: Optional[str] = None):
+        """Refuse a decision on an item someone else currently holds."""
+        now = time.time()
+        with self._lock:
+            item = self._items.get(thread_id)
+            if item is None or item.lease is None or item.lease_expires <= now:
+                return
+            if item.lease != lease:
+                raise LeaseError(
+                    f"Item is claimed by {item.reviewer or 'another reviewer'} until "
+                    f"{time.strftime('%H:%M:%S', time.localtime(item.lease_expires))}"
+                )
+
+    def stats(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._reclaim_expired(now)
+            items = [i for i in self._items.values() if tenant is None or i.tenant == tenant]
+            leased = sum(1 for i in items if i.lease is not None)
+            by_department: Dict[str, int] = {}
+            for item in items:
+                by_department[item.department] = by_department.get(item.department, 0) + 1
+            oldest = min((i.enqueued_at for i in items), default=None)
+            return {
+                'pending': len(items) - leased,
+                'leased': leased,
+                'overdue': sum(1 for i in items if i.due_at < now),
+                'by_department': by_department,
+                'oldest_age_seconds': round(now - oldest, 1) if oldest else None,
+            }
+
+
+# Shared instance used by the workflow and the UIs
+review_queue = ReviewQueue()
@@ -0,0 +1,169 @@
+"""
+Schema validation and type normalization of the salary workbook at ingest.
+
+Every column is checked and coerced in one vectorized pass:
+
+- ``Employee_ID``: positive whole number, unique → int64
+- ``Current_Salary``: non-negative number; "₹12,00,000"-style text is
+  accepted and amounts are rounded to the rupee → int64
+- ``Department``, ``Position``: non-blank text → category
+- ``Manager``: text, blank for the top of a chain → category
+- ``Name``: non-blank text
+- ``Join_Date``: any date pandas can parse → datetime64
+
+Rows that fail a check are dropped and listed in one issue report, so
+the store and everything downstream work on typed columns with no
+per-row checks. A workbook missing a column altogether is rejected.
+
+Command line::
+
+    python -m src.schema data/salary_data.xlsx
+"""
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+from typing import Any, List, Tuple
+from .employee import COLUMNS
+from .tenants import DEFAULT_TENANT, tenant_source
+
+CATEGORY_COLUMNS = ('Department', 'Position', 'Manager')
+ISSUE_COLUMNS = ['row', 'Employee_ID', 'column', 'value', 'problem']
+HEADER_ROWS = 1  # spreadsheet rows above the first record
+
+
+class SchemaError(ValueError):
+    """Raised for a workbook that cannot be used at all."""
+
+
+def _text(column: pd.Series) -> pd.Series:
+    """Stripped strings with blanks as missing."""
+    text = column.astype('string').str.strip()
+    return text.mask(text == '')
+
+
+def _numbers(column: pd.Series) -> pd.Series:
+    """Floats from numeric cells or text like "₹1,200,000"; NaN where unparseable."""
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype('float64')
+    cleaned = column.astype('string').str.replace(r'[₹,\s]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+
+def _dates(column: pd.Series) -> pd.Series:
+    """datetime64 from date cells or text; ISO text takes the fast path, the rest is parsed per value."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.tz_localize(None) if column.dt.tz is not None else column
+    parsed = pd.to_datetime(column, errors='coerce', format='ISO8601')
+    retry = parsed.isna() & column.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(column[retry].astype(str), errors='coerce', format='mixed')
+    return parsed
+
+
+def normalize(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Validate and coerce a raw workbook frame.
+
+    Returns ``(frame, issues)``: the valid rows with typed columns, and
+    one ``ISSUE_COLUMNS`` row per failed check (a row can fail several).
+    """
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise SchemaError(f"Workbook is missing column(s): {', '.join(missing)}")
+    df = df.reset_index(drop=True)
+
+    ids = _numbers(df['Employee_ID'])
+    salary = _numbers(df['Current_Salary']).round()
+    joined = _dates(df['Join_Date'])
+    text = {c: _text(df[c]) for c in ('Name',) + CATEGORY_COLUMNS}
+
+    bad_id = ids.isna() | (ids <= 0) | (ids % 1 != 0)
+    checks = [
+        ('Employee_ID', bad_id, 'not a positive whole number'),
+        ('Employee_ID', ~bad_id & ids.duplicated(), 'duplicate Employee_ID'),
+        ('Current_Salary', salary.isna() | np.isinf(salary), 'not a number'),
+        ('Current_Salary', salary < 0, 'negative salary'),
+        ('Join_Date', joined.isna(), 'not a date'),
+        ('Name', text['Name'].isna(), 'blank'),
+        ('Department', text['Department'].isna(), 'blank'),
+        ('Position', text['Position'].isna(), 'blank'),
+    ]
+
+    reports: List[pd.DataFrame] = []
+    bad = np.zeros(len(df), dtype=bool)
+    for column, mask, problem in checks:
+        mask = mask.to_numpy(dtype=bool)
+        if not mask.any():
+            continue
+        bad |= mask
+        rows = np.flatnonzero(mask)
+        reports.append(pd.DataFrame({
+            'row': rows + HEADER_ROWS + 1,
+            'Employee_ID': df['Employee_ID'].iloc[rows].astype('string').to_numpy(),
+            'column': column,
+            'value': df[column].iloc[rows].astype('string').to_numpy(),
+            'problem': problem,
+        }))
+    issues = (pd.concat(reports, ignore_index=True).sort_values(['row', 'column'], ignore_index=True)
+              if reports else pd.DataFrame(columns=ISSUE_COLUMNS))
+
+    keep = ~bad
+    frame = pd.DataFrame({
+        'Employee_ID': ids[keep].astype('int64'),
+        'Name': text['Name'][keep].astype(object),
+        'Department': text['Department'][keep].astype('category'),
+        'Position': text['Position'][keep].astype('category'),
+        'Current_Salary': salary[keep].astype('int64'),
+        'Manager': text['Manager'][keep].astype(object).astype('category'),
+        'Join_Date': joined[keep].astype('datetime64[ns]'),
+    })
+    extra = [c for c in df.columns if c not in COLUMNS]
+    if extra:
+        frame = frame.join(df.loc[keep, extra])
+    return frame.reset_index(drop=True), issues
+
+
+def assign(frame: pd.DataFrame, index: Any, column: str, value: Any):
+    """``frame.at[index, column] = value`` that also accepts new categories and date strings."""
+    dtype = frame[column].dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        if value is not None and value not in dtype.categories:
+            frame[column] = frame[column].cat.add_categories([value])
+    elif pd.api.types.is_datetime64_dtype(dtype):
+        value = pd.Timestamp(value)
+    frame.at[index, column] = value
+
+
+def summarize(issues: pd.DataFrame) -> str:
+    """One line per problem type with its count."""
+    if issues.empty:
+        return "No issues"
+    counts = issues.groupby(['column', 'problem'], sort=True).size()
+    return "\n".join(f"{column} {problem}: {count}" for (column, problem), count in counts.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a salary workbook")
+    parser.add_argument('path', nargs='?', help="workbook (default: the default tenant's)")
+    parser.add_argument('--limit', type=int, default=50, help="issue rows to print")
+    args = parser.parse_args(argv)
+
+    path = args.path or tenant_source(DEFAULT_TENANT)
+    try:
+        frame, issues = normalize(pd.read_excel(path))
+    except SchemaError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"{len(frame):,} valid rows, {issues['row'].nunique():,} rejected")
+    print(summarize(issues))
+    if not issues.empty:
+        print()
+        print(issues.head(args.limit).to_string(index=False))
+    print()
+    print(frame.dtypes.to_string())
+    return 1 if len(issues) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Prefix search over employee names, positions and ids.
+
+Names and positions are lowercased and indexed under every word start,
+so "sha" finds "Anjali Sharma" and "eng" finds "Senior Engineer". Each
+distinct key is stored once in a sorted list with a CSR array of the
+employees carrying it; a query is two bisects plus a walk over just as
+many keys as it takes to fill ``limit`` results. Ids are matched by
+numeric range on a sorted id array, one range per id length.
+
+Indexes are built once per data version, in the background: as soon
+as a tenant's store loads, and again after its data changes. Building
+takes about 0.4 s for 60k employees with distinct names, 8 s for a
+million, and much less when names repeat. Each tenant's index lives in
+its store's cache and is dropped with it.
+"""
+import bisect
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+from .data_store import get_store, stores
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+RESULT_COLUMNS = ['Employee_ID', 'Name', 'Department', 'Position', 'Manager']
+
+
+class _PrefixIndex:
+    """Sorted distinct keys, each pointing at the employee ids that carry it."""
+
+    def __init__(self, values: pd.Series, ids: np.ndarray):
+        codes, uniques = pd.factorize(values.str.lower())
+        # Every word start of every distinct value, e.g. "anjali sharma" and "sharma"
+        groups: Dict[str, List[int]] = {}
+        for code, value in enumerate(uniques.tolist()):
+            if not isinstance(value, str):
+                continue
+            words = value.split()
+            for i in range(len(words)):
+                groups.setdefault(" ".join(words[i:]), []).append(code)
+        self.keys = sorted(groups)
+        self._key_values = [groups[key] for key in self.keys]
+
+        # CSR: employee ids grouped by value code
+        valid = codes >= 0
+        by_value = np.argsort(codes[valid], kind='stable')
+        self._ids = ids[valid][by_value]
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(codes[valid], minlength=len(uniques)))))
+
+    def matches(self, prefix: str, limit: int, seen: set) -> List[int]:
+        """Up to ``limit`` new employee ids whose value has a word starting with ``prefix``."""
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        found = []
+        for k in range(lo, hi):
+            for value in self._key_values[k]:
+                start, stop = self._offsets[value], self._offsets[value + 1]
+                # At most len(seen) of these can be skipped as duplicates
+                for employee_id in self._ids[start:min(stop, start + limit + len(seen))].tolist():
+                    if employee_id not in seen:
+                        seen.add(employee_id)
+                        found.append(employee_id)
+                        if len(found) >= limit:
+                            return found
+        return found
+
+
+class SearchIndex:
+    """Name, position and id prefix indexes over one version of the dataset."""
+
+    def __init__(self, frame: pd.DataFrame):
+        ids = frame['Employee_ID'].to_numpy(dtype='int64')
+        self.names = _PrefixIndex(frame['Name'], ids)
+        self.positions = _PrefixIndex(frame['Position'], ids)
+        self._sorted_ids = np.sort(ids)
+
+    def _id_matches(self, digits: str, limit: int, seen: set) -> List[int]:
+        """Ids whose decimal form starts with ``digits``, shortest ids first."""
+        found = []
+        if not self._sorted_ids.size:
+            return found
+        prefix = int(digits)
+        if str(prefix) != digits:  # ids have no leading zeros
+            return found
+        longest = len(str(int(self._sorted_ids[-1])))
+        for length in range(len(digits), longest + 1):
+            scale = 10 ** (length - len(digits))
+            lo, hi = np.searchsorted(self._sorted_ids, [prefix * scale, (prefix + 1) * scale])
+            for employee_id in self._sorted_ids[lo:min(hi, lo + limit)].tolist():
+                if employee_id not in seen and len(str(employee_id)) == length:
+                    seen.add(employee_id)
+                    found.append(employee_id)
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[int]:
+        """Employee ids matching ``query``: id matches first, then names, then positions."""
+        query = " ".join(query.lower().split())
+        if not query or limit <= 0:
+            return []
+        seen: set = set()
+        found = []
+        if query.isdigit():
+            found += self._id_matches(query, limit, seen)
+        if len(found) < limit:
+            found += self.names.matches(query, limit - len(found), seen)
+        if len(found) < limit:
+            found += self.positions.matches(query, limit - len(found), seen)
+        return found
+
+
+_cache_lock = threading.Lock()
+
+
+def _rebuild(cache: Dict[str, Any], frame: pd.DataFrame, version: str, built: threading.Event):
+    try:
+        index = SearchIndex(frame)
+        with _cache_lock:
+            cache['search_version'], cache['search_index'] = version, index
+    except Exception as e:
+        print(f"[Search] Index build failed: {e}")
+    finally:
+        with _cache_lock:
+            if cache.get('search_building') == version:
+                cache.pop('search_building')
+        built.set()
+
+
+def _start_build(store) -> threading.Event:
+    """Build the index of the store's current version in the background, once; call with the lock held."""
+    cache, version = store.cache, store.version
+    if cache.get('search_building') != version:
+        cache['search_building'], cache['search_built'] = version, threading.Event()
+        threading.Thread(target=_rebuild, args=(cache, store.frame, version, cache['search_built']),
+                         name="search-index-builder", daemon=True).start()
+    return cache['search_built']
+
+
+def _build_on_load(store):
+    with _cache_lock:
+        _start_build(store)
+
+
+stores.on_load(_build_on_load)
+
+
+def get_search_index() -> SearchIndex:
+    """
+    Search index for the current data.
+
+    After a data change the previous index keeps answering while the new
+    one is built in the background; its hits are looked up in the current
+    data, so only matching lags. A request only waits when no index has
+    been built for the tenant yet, and then only for the build already
+    started when its store loaded.
+    """
+    store = get_store()
+    with _cache_lock:
+        index = store.cache.get('search_index')
+        if store.cache.get('search_version') == store.version:
+            return index
+        built = _start_build(store)
+    if index is not None:
+        return index
+    built.wait()
+    index = store.cache.get('search_index')
+    if index is None:
+        raise RuntimeError("Search index build failed")
+    return index
+
+
+def search_employees(query: str, limit: int = DEFAULT_LIMIT) -> pd.DataFrame:
+    """Top matches for ``query`` as rows of ``RESULT_COLUMNS``, best first."""
+    limit = max(0, min(limit, MAX_LIMIT))
+    ids = get_search_index().search(query, limit)
+    frame = get_store().frame
+    ids = [i for i in ids if i in frame.index]
+    return frame.loc[ids, RESULT_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,206 @@
+"""
+Compact checkpoint serializer for the workflow state.
+
+LangGraph serializes every channel of ``WorkflowState`` it writes. The
+largest of these is ``employees``, a list of ``Employee`` records, which
+the default serializer cannot store at all. This serializer stores such
+lists as one msgpack array per field, read with C-level attribute
+getters and written in a single ormsgpack call; loading maps ``Employee``
+over the columns. ormsgpack is told to reject every value it would not
+restore as the same type (tuples, subclasses, dates, enums, ints beyond
+64 bits; numpy scalars it rejects anyway), and a rejected list goes
+through the plain path, which pickles what msgpack cannot represent.
+The one conversion msgpack makes silently is bytearray and memoryview
+to bytes. Everything else goes through LangGraph's default serializer.
+
+Lists of dicts are left to the default serializer: packing them
+column-wise in Python was slower both ways than its C encoder.
+
+Compression is off by default, since it only costs time with the
+in-memory checkpointer. Pass ``compress_threshold`` to compress payloads
+of that many bytes or more with zstd or lz4 when installed, otherwise
+zlib, e.g. for a checkpointer that writes to disk.
+
+Run ``python -m src.serde`` for a size/time comparison with the default.
+"""
+import statistics
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+import ormsgpack
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from .employee import Employee, FIELDS
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:  # optional
+    lz4 = None
+
+EMPLOYEES_TYPE = "compact-employees"
+EMPLOYEE_TYPE = "employee"
+# Raise instead of converting anything msgpack would not restore as the same type
+EXACT = (ormsgpack.OPT_PASSTHROUGH_BIG_INT | ormsgpack.OPT_PASSTHROUGH_DATACLASS
+         | ormsgpack.OPT_PASSTHROUGH_DATETIME | ormsgpack.OPT_PASSTHROUGH_ENUM
+         | ormsgpack.OPT_PASSTHROUGH_SUBCLASS | ormsgpack.OPT_PASSTHROUGH_TUPLE
+         | ormsgpack.OPT_PASSTHROUGH_UUID)
+
+_getters = [attrgetter(f) for f in FIELDS]
+_zstd = threading.local()
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    # zstd contexts are not thread-safe; LangGraph writes checkpoints from a thread pool
+    if not hasattr(_zstd, 'compressor'):
+        _zstd.compressor = zstandard.ZstdCompressor(level=1)
+    return _zstd.compressor.compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if not hasattr(_zstd, 'decompressor'):
+        _zstd.decompressor = zstandard.ZstdDecompressor()
+    return _zstd.decompressor.decompress(data)
+
+
+def _compressor():
+    if zstandard is not None:
+        return "zstd", _zstd_compress, _zstd_decompress
+    if lz4 is not None:
+        return "lz4", lz4.frame.compress, lz4.frame.decompress
+    return "zlib", lambda b: zlib.compress(b, 1), zlib.decompress
+
+
+def _is_employees(obj: Any) -> bool:
+    return isinstance(obj, list) and bool(obj) and all(type(e) is Employee for e in obj)
+
+
+def _packb_exact(values: Any) -> Optional[bytes]:
+    """msgpack of ``values`` if every item round-trips as the same type, else None."""
+    try:
+        return ormsgpack.packb(values, option=EXACT)
+    except ormsgpack.MsgpackEncodeError:
+        return None
+
+
+class CompactSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer with column-packed employee lists and optional compression."""
+
+    def __init__(self, compress_threshold: Optional[int] = None, **kwargs):
+        kwargs.setdefault('pickle_fallback', True)  # checkpoints never leave the process
+        super().__init__(**kwargs)
+        self.compress_threshold = compress_threshold
+        self.codec, self._compress, self._decompress = _compressor()
+
+    def _dump_employees(self, employees: List[Employee]) -> Optional[bytes]:
+        return _packb_exact([list(map(getter, employees)) for getter in _getters])
+
+    def _load_employees(self, payload: bytes) -> List[Employee]:
+        return list(map(Employee, *ormsgpack.unpackb(payload)))
+
+    # ------------------------------------------------------------------
+    # SerializerProtocol
+    # ------------------------------------------------------------------
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        payload = None
+        if type(obj) is Employee:
+            # values() is a tuple; the fields inside it are what must round-trip
+            type_, payload = EMPLOYEE_TYPE, _packb_exact(list(obj.values()))
+        elif _is_employees(obj):
+            type_, payload = EMPLOYEES_TYPE, self._dump_employees(obj)
+        if payload is None:
+            type_, payload = super().dumps_typed(obj)
+        if self.compress_threshold is not None and len(payload) >= self.compress_threshold:
+            # Prefix the uncompressed length so loads can sanity-check it
+            compressed = self._compress(payload)
+            if len(compressed) < len(payload):
+                return f"{type_}+{self.codec}", struct.pack('<I', len(payload)) + compressed
+        return type_, payload
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        base, _, codec = type_.partition('+')
+        if codec:
+            if codec != self.codec:
+                raise ValueError(f"Checkpoint compressed with unavailable codec '{codec}'")
+            (size,) = struct.unpack('<I', payload[:4])
+            payload = self._decompress(payload[4:])
+            if len(payload) != size:
+                raise ValueError("Corrupt compressed checkpoint payload")
+        if base == EMPLOYEE_TYPE:
+            return Employee(*ormsgpack.unpackb(payload))
+        if base == EMPLOYEES_TYPE:
+            return self._load_employees(payload)
+        return super().loads_typed((base, payload))
+
+
+def sample_frame(rows: int, seed: int = 0):
+    """A salary frame of ``rows`` distinct employees, for benchmarks."""
+    import pandas as pd
+    from .bands import SALARY_RANGES
+
+    rng = np.random.default_rng(seed)
+    departments = sorted(SALARY_RANGES)
+    return pd.DataFrame({
+        'Employee_ID': np.arange(100_001, 100_001 + rows),
+        'Name': [f"Employee {i:07d}" for i in rng.permutation(rows)],
+        'Department': pd.Categorical(rng.choice(departments, rows)),
+        'Position': pd.Categorical(rng.choice([f"Level {i}" for i in range(12)], rows)),
+        'Current_Salary': rng.integers(300_000, 12_000_000, rows),
+        'Manager': pd.Categorical([f"Manager {i}" for i in rng.integers(0, max(rows // 25, 1), rows)]),
+        'Join_Date': pd.Timestamp('2010-01-01') + pd.to_timedelta(rng.integers(0, 5000, rows), unit='D'),
+    })
+
+
+def benchmark(rows: int = 12_000, steps: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Compare checkpoint bytes and median serde time for one employee list
+    of ``rows`` distinct records.
+
+    ``default`` is the default serializer on the dicts the state used to
+    carry, ``default+pickle`` the same serializer on the records, which it
+    can only pickle.
+    """
+    from .employee import employees_from_frame
+
+    sample = sample_frame(rows)
+    # The default serializer refuses to load Timestamps; the old dicts carried date strings
+    records = sample.assign(Join_Date=sample['Join_Date'].dt.strftime('%Y-%m-%d')).to_dict('records')
+    employees = employees_from_frame(sample)
+
+    legs = [
+        ("default", JsonPlusSerializer(), records),
+        ("default+pickle", JsonPlusSerializer(pickle_fallback=True), employees),
+        ("compact", CompactSerializer(), employees),
+        (f"compact+{_compressor()[0]}", CompactSerializer(compress_threshold=0), employees),
+    ]
+    results = {}
+    for name, serde, value in legs:
+        dump_times, load_times = [], []
+        for _ in range(steps):
+            start = time.perf_counter()
+            dumped = serde.dumps_typed(value)
+            dump_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            loaded = serde.loads_typed(dumped)
+            load_times.append(time.perf_counter() - start)
+        assert loaded == value
+        results[name] = {
+            'bytes': len(dumped[1]),
+            'dump_ms': round(statistics.median(dump_times) * 1000, 3),
+            'load_ms': round(statistics.median(load_times) * 1000, 3),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for name, stats in benchmark().items():
+        print(f"{name:>14}: {stats['bytes']:>9,} bytes  dump {stats['dump_ms']:.2f} ms  load {stats['load_ms']:.2f} ms")
@@ -0,0 +1,237 @@
+"""
+What-if simulation of the analysis stage over many seeded scenarios.
+
+A scenario analyzes every department, each with its own seed, exactly
+as ``/analyze`` with that seed would, but without pausing for review: the
+seed decides between a salary hike and a manager change wherever both
+apply. A hike costs the top earner's raise, a manager change nothing.
+Department ``d`` (in alphabetical order) of scenario ``s`` uses seed
+``seed + s * departments + d``.
+
+Everything about a department's analysis except that choice is
+deterministic, so it is computed once up front. Worker processes then
+replay only the seeded choices for their share of the seeds and write
+costs straight into a shared-memory matrix of shape
+``(hike percentages, scenarios, departments)``, which the parent
+summarizes without copying.
+
+Command line::
+
+    python -m src.simulation --scenarios 100000 --hike 10 15 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence
+from .data_store import get_store
+from .nodes import eligible_managers, proposal_options
+from .policy import get_policy
+
+MAX_SCENARIOS = 1_000_000
+MAX_PERCENTAGES = 10
+# Bound on the shared cost matrix: hike settings x scenarios x departments x 8 bytes
+MAX_MATRIX_BYTES = 256 * 2 ** 20
+CHUNK_SCENARIOS = 10_000
+PERCENTILES = (5, 50, 95)
+
+# Which proposal types a department can produce
+HIKE_ONLY, MANAGER_ONLY, BOTH, NEITHER = 0, 1, 2, 3
+
+
+def scenario_inputs(hike_percentages: Sequence[Optional[float]]) -> Dict[str, Any]:
+    """
+    The deterministic part of every department's analysis.
+
+    ``hike_cost[p, d]`` is the raise the top earner of department ``d``
+    gets under hike percentage ``p`` (None means whatever the policy
+    proposes); ``kinds[d]`` says which proposal types are possible.
+    """
+    store = get_store()
+    store.refresh()
+    policy = get_policy()
+    hierarchy = store.hierarchy()
+    departments, top_earners, kinds, costs = [], [], [], []
+    for department in store.departments():
+        top = store.top_earner(department)
+        if top is None:
+            continue
+        hikes = policy.evaluate(store.department_employees(department))
+        hike = hikes.loc[top.employee_id] if top.employee_id in hikes.index else None
+        managers = eligible_managers(store.department_slice(department, columns=['Employee_ID', 'Name']),
+                                     top, hierarchy)
+        options = proposal_options(hike is not None, len(managers) > 0)
+        kinds.append({
+            ('salary_hike', 'manager_change'): BOTH,
+            ('salary_hike',): HIKE_ONLY,
+            ('manager_change',): MANAGER_ONLY,
+        }.get(tuple(options), NEITHER))
+        departments.append(department)
+        top_earners.append(top.name)
+        row = []
+        for pct in hike_percentages:
+            if hike is None:
+                row.append(0)
+            elif pct is None:
+                row.append(int(hike['proposed_salary']) - top.current_salary)
+            else:
+                row.append(int(round(top.current_salary * pct / 100)))
+        costs.append(row)
+    return {
+        'departments': departments,
+        'top_earners': top_earners,
+        'kinds': np.asarray(kinds, dtype='int8'),
+        'hike_cost': np.asarray(costs, dtype='int64').reshape(len(departments), len(hike_percentages)).T,
+        'data_version': store.version,
+        'policy_version': policy.version,
+    }
+
+
+def _run_chunk(shm_name: str, shape: tuple, hike_cost: np.ndarray, kinds: np.ndarray,
+               seed: int, start: int, stop: int):
+    """Replay the seeded choices for scenarios ``start:stop`` into the shared matrix."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype='int64', buffer=shm.buf)
+        # Same draw as ``rng.choice(options)`` in analyze_department_node: index 0 is the hike.
+        # Only departments where both types apply need one.
+        both = np.flatnonzero(kinds == BOTH).tolist()
+        picks_hike = np.zeros((stop - start, len(kinds)), dtype=bool)
+        for i in range(start, stop):
+            base = seed + i * len(kinds)
+            for d in both:
+                picks_hike[i - start, d] = random.Random(base + d).choice((True, False))
+        hiked = (kinds == HIKE_ONLY)[None, :] | picks_hike
+        out[:, start:stop, :] = hike_cost[:, None, :] * hiked[None, :, :]
+        del out
+    finally:
+        shm.close()
+
+
+def _summary(values: np.ndarray) -> Dict[str, Any]:
+    low, median, high = np.percentile(values, PERCENTILES)
+    return {
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2),
+        'min': int(values.min()),
+        'p5': float(low),
+        'p50': float(median),
+        'p95': float(high),
+        'max': int(values.max()),
+    }
+
+
+def simulate(scenarios: int = 10_000, hike_percentages: Optional[Sequence[float]] = None,
+             seed: int = 0, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run ``scenarios`` seeded analyses of every department per hike
+    percentage and summarize the cost distributions.
+
+    Each department's proposal in a scenario is what ``/analyze`` with
+    the same seed would propose, so any scenario can be reproduced.
+    """
+    if not 0 < scenarios <= MAX_SCENARIOS:
+        raise ValueError(f"scenarios must be between 1 and {MAX_SCENARIOS:,}")
+    percentages: List[Optional[float]] = list(hike_percentages) if hike_percentages else [None]
+    if len(percentages) > MAX_PERCENTAGES:
+        raise ValueError(f"at most {MAX_PERCENTAGES} hike percentages can be compared")
+    if any(p is not None and not 0 <= p <= 100 for p in percentages):
+        raise ValueError("hike percentages must be between 0 and 100")
+    workers = max(1, min(workers or os.cpu_count() or 1, -(-scenarios // CHUNK_SCENARIOS)))
+
+    inputs = scenario_inputs(percentages)
+    hike_cost, kinds = inputs['hike_cost'], inputs['kinds']
+    shape = (len(percentages), scenarios, len(kinds))
+    if int(np.prod(shape)) * 8 > MAX_MATRIX_BYTES:
+        raise ValueError(f"{scenarios:,} scenarios x {len(percentages)} hike settings x "
+                         f"{len(kinds)} departments is too large; run fewer scenarios")
+    started = time.perf_counter()
+    shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    try:
+        chunks = [(start, min(start + CHUNK_SCENARIOS, scenarios))
+                  for start in range(0, scenarios, CHUNK_SCENARIOS)]
+        if workers == 1:
+            for start, stop in chunks:
+                _run_chunk(shm.name, shape, hike_cost, kinds, seed, start, stop)
+        else:
+            # forkserver: forking a multi-threaded server could copy a held lock into the workers
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("forkserver")) as pool:
+                futures = [pool.submit(_run_chunk, shm.name, shape, hike_cost, kinds, seed, start, stop)
+                           for start, stop in chunks]
+                for future in futures:
+                    future.result()
+        elapsed = time.perf_counter() - started
+
+        costs = np.ndarray(shape, dtype='int64', buffer=shm.buf)
+        results = []
+        for p, pct in enumerate(percentages):
+            matrix = costs[p]
+            results.append({
+                'hike_percentage': pct,
+                'total_cost': _summary(matrix.sum(axis=1)),
+                'departments': [
+                    {
+                        'department': department,
+                        'top_earner': inputs['top_earners'][d],
+                        'hike_cost': int(hike_cost[p, d]),
+                        'hike_share': round(float((matrix[:, d] > 0).mean()), 4),
+                        'cost': _summary(matrix[:, d]),
+                    }
+                    for d, department in enumerate(inputs['departments'])
+                ],
+            })
+        del costs, matrix
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return {
+        'scenarios': scenarios,
+        'seed': seed,
+        'workers': workers,
+        'data_version': inputs['data_version'],
+        'policy_version': inputs['policy_version'],
+        'elapsed_seconds': round(elapsed, 3),
+        'scenarios_per_second': round(scenarios * len(percentages) / elapsed) if elapsed else None,
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate proposal cost distributions")
+    parser.add_argument('--scenarios', '-n', type=int, default=10_000)
+    parser.add_argument('--hike', type=float, nargs='+', metavar='PCT',
+                        help="hike percentages to compare (default: the policy's own)")
+    parser.add_argument('--seed', type=int, default=0, help="first scenario seed")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--json', action='store_true', help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = simulate(args.scenarios, args.hike, seed=args.seed, workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['scenarios']:,} scenarios x {len(report['results'])} hike settings in "
+          f"{report['elapsed_seconds']}s on {report['workers']} workers "
+          f"({report['scenarios_per_second']:,} scenarios/s)")
+    for result in report['results']:
+        label = 'policy' if result['hike_percentage'] is None else f"{result['hike_percentage']:g}%"
+        total = result['total_cost']
+        print(f"\nHike {label}: total cost mean ₹{total['mean']:,.0f}, "
+              f"p5 ₹{total['p5']:,.0f}, p50 ₹{total['p50']:,.0f}, p95 ₹{total['p95']:,.0f}")
+        for dept in result['departments']:
+            print(f"  {dept['department']:<15} hike ₹{dept['hike_cost']:>12,} "
+                  f"chosen {dept['hike_share']:>6.1%}  mean ₹{dept['cost']['mean']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
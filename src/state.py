@@ -1,7 +1,9 @@
 """
 State schema for the HITL salary management workflow.
 """
-from typing import TypedDict, Optional, List, Dict, Any
+import operator
+from typing import Annotated, TypedDict, Optional, List, Dict, Any
+from .employee import Employee
 
 
 class WorkflowState(TypedDict):
@@ -9,14 +11,23 @@ class WorkflowState(TypedDict):
     
     # Input
     department: str
+    tenant: Optional[str]  # dataset the department belongs to (None: default)
+    seed: Optional[int]  # makes the proposal choice reproducible
     
     # Data
-    employees: List[Dict[str, Any]]
-    highest_paid: Optional[Dict[str, Any]]
+    employees: List[Employee]  # empty for sharded departments, which are read from the store
+    department_size: Optional[int]
+    data_version: Optional[str]  # store version the employees were loaded at
+    highest_paid: Optional[Employee]
+    
+    # Sharded analysis of large departments (shards append their results)
+    shard_results: Annotated[List[Dict[str, Any]], operator.add]
+    department_stats: Optional[Dict[str, Any]]
     
     # Proposal
     proposal_type: Optional[str]  # 'salary_hike' or 'manager_change'
     proposal_details: Optional[Dict[str, Any]]
+    policy_version: Optional[str]
     
     # Human decision
     human_decision: Optional[str]  # 'approve', 'reject', or 'modify'
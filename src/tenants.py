@@ -0,0 +1,117 @@
+"""
+Tenants: independent datasets served by one process.
+
+Each tenant (a business unit) has its own workbook. The ``default``
+tenant uses ``data/salary_data.xlsx``; others are listed in
+``data/tenants.json`` as ``{"tenant_id": "path/to/workbook.xlsx"}``, with
+relative paths resolved against ``data/``. The file is re-read when it
+changes, so units can be added without a restart.
+
+Workflow thread ids carry their tenant as a ``tenant:`` prefix (none for
+the default tenant), so a decision always reaches the dataset its
+proposal came from. Code outside a workflow, such as a web request,
+uses the tenant bound with ``use_tenant``.
+"""
+import contextvars
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_TENANT = 'default'
+TENANTS_PATH = Path(os.environ.get('HITL_TENANTS_FILE', DATA_DIR / "tenants.json"))
+TENANT_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+_current: contextvars.ContextVar = contextvars.ContextVar('tenant', default=DEFAULT_TENANT)
+_sources: Dict[str, Path] = {}
+_sources_stamp = None
+_sources_lock = threading.Lock()
+
+
+class UnknownTenant(KeyError):
+    """Raised for a tenant id with no configured dataset."""
+
+
+def _load_sources() -> Dict[str, Path]:
+    global _sources, _sources_stamp
+    with _sources_lock:
+        try:
+            stat = TENANTS_PATH.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != _sources_stamp:
+            configured = json.loads(TENANTS_PATH.read_text(encoding='utf-8')) if stamp else {}
+            _sources = {
+                tenant: DATA_DIR / path
+                for tenant, path in configured.items()
+                if TENANT_PATTERN.match(tenant) and tenant != DEFAULT_TENANT
+            }
+            _sources_stamp = stamp
+        return _sources
+
+
+def tenant_ids() -> List[str]:
+    """Every configured tenant, default first."""
+    return [DEFAULT_TENANT] + sorted(_load_sources())
+
+
+def tenant_source(tenant: str) -> Path:
+    """Workbook path of a tenant."""
+    if tenant == DEFAULT_TENANT:
+        return DATA_DIR / "salary_data.xlsx"
+    source = _load_sources().get(tenant)
+    if source is None:
+        raise UnknownTenant(f"Unknown tenant: {tenant}")
+    return source
+
+
+def current_tenant() -> str:
+    """Tenant bound to the current request or run."""
+    return _current.get()
+
+
+def bind_tenant(tenant: Optional[str]) -> contextvars.Token:
+    """Bind ``tenant`` (validated) until ``unbind_tenant`` is called with the returned token."""
+    tenant = tenant or DEFAULT_TENANT
+    tenant_source(tenant)
+    return _current.set(tenant)
+
+
+def unbind_tenant(token: contextvars.Token):
+    _current.reset(token)
+
+
+@contextmanager
+def use_tenant(tenant: Optional[str]) -> Iterator[str]:
+    """Bind ``tenant`` (validated) for the enclosed block."""
+    token = bind_tenant(tenant)
+    try:
+        yield current_tenant()
+    finally:
+        unbind_tenant(token)
+
+
+def set_tenant(tenant: Optional[str]) -> str:
+    """Bind ``tenant`` for the rest of the current context, e.g. a Streamlit run."""
+    tenant = tenant or DEFAULT_TENANT
+    tenant_source(tenant)
+    _current.set(tenant)
+    return tenant
+
+
+def tenant_thread_id(thread_id: str, tenant: Optional[str] = None) -> str:
+    """Namespace a thread id under ``tenant`` (the current one by default)."""
+    tenant = tenant or current_tenant()
+    return thread_id if tenant == DEFAULT_TENANT else f"{tenant}:{thread_id}"
+
+
+def thread_tenant(thread_id: Optional[str]) -> str:
+    """Tenant a namespaced thread id belongs to."""
+    if thread_id and ':' in thread_id:
+        return thread_id.split(':', 1)[0]
+    return DEFAULT_TENANT
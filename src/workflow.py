@@ -1,9 +1,16 @@
 """
 LangGraph workflow definition for HITL salary management.
 """
+from typing import Dict, Any
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langgraph.checkpoint.memory import MemorySaver
+from .serde import CompactSerializer
 from .state import WorkflowState
+from .data_store import get_store
+from .tenants import thread_tenant
+from .history import get_history_store
+from .review_queue import review_queue
 from . import nodes
 
 
@@ -15,15 +22,29 @@ def create_workflow():
     
     # Add nodes
     workflow.add_node("load_data", nodes.load_data_node)
+    workflow.add_node("analyze_shard", nodes.analyze_shard_node)
+    workflow.add_node("reduce_shards", nodes.reduce_shards_node)
     workflow.add_node("analyze_department", nodes.analyze_department_node)
     workflow.add_node("human_approval", nodes.human_approval_node)
     workflow.add_node("process_approval", nodes.process_approval_node)
     workflow.add_node("process_rejection", nodes.process_rejection_node)
     workflow.add_node("process_modification", nodes.process_modification_node)
+    workflow.add_node("apply_decision", nodes.apply_decision_node)
     
     # Define edges
     workflow.set_entry_point("load_data")
-    workflow.add_edge("load_data", "analyze_department")
+    
+    # Large departments fan out to parallel shard nodes, then reduce
+    def route_analysis(state: WorkflowState):
+        """Send one task per shard, or analyze small departments directly."""
+        size = state.get("department_size") or 0
+        if size < nodes.SHARD_THRESHOLD:
+            return "analyze_department"
+        return [Send("analyze_shard", shard) for shard in nodes.plan_shards(state["department"], size, state.get("tenant"))]
+    
+    workflow.add_conditional_edges("load_data", route_analysis, ["analyze_department", "analyze_shard"])
+    workflow.add_edge("analyze_shard", "reduce_shards")
+    workflow.add_edge("reduce_shards", "analyze_department")
     workflow.add_edge("analyze_department", "human_approval")
     
     # Conditional routing after human approval
@@ -52,13 +73,14 @@ def create_workflow():
         }
     )
     
-    # All processing nodes lead to END
-    workflow.add_edge("process_approval", END)
+    # Approved and modified proposals are written back before finishing
+    workflow.add_edge("process_approval", "apply_decision")
+    workflow.add_edge("process_modification", "apply_decision")
+    workflow.add_edge("apply_decision", END)
     workflow.add_edge("process_rejection", END)
-    workflow.add_edge("process_modification", END)
     
     # Compile with memory saver for checkpointing
-    memory = MemorySaver()
+    memory = MemorySaver(serde=CompactSerializer())
     compiled_workflow = workflow.compile(
         checkpointer=memory,
         interrupt_before=["human_approval"]  # HITL interrupt
@@ -69,3 +91,19 @@ def create_workflow():
 
 # Create a singleton instance
 graph = create_workflow()
+
+
+def start_paused_thread(thread_id: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create a thread paused for human approval from precomputed analysis.
+
+    The values are written as if ``analyze_department`` had produced them,
+    so the thread resumes exactly like one that ran the analysis itself.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    graph.update_state(config, values, as_node="analyze_department")
+    get_store(values.get('tenant') or thread_tenant(thread_id)).watch(thread_id, values['proposal_details']['employee_id'])
+    get_history_store().record_proposal(values, thread_id=thread_id)
+    review_queue.enqueue(thread_id, values['department'], values['proposal_type'],
+                         values['proposal_details'])
+    return graph.get_state(config).values
@@ -0,0 +1,42 @@
+"""Admission control of /analyze."""
+import threading
+import time
+import web_app
+from src.admission import AdmissionController
+
+
+def test_coalesced_requests_do_not_rerun_the_graph(monkeypatch):
+    runs = []
+    release = threading.Event()
+
+    def run_analysis(thread_id, department, seed=None):
+        runs.append(thread_id)
+        release.wait(5)
+        # No proposal, so nothing is cached for the followers to reuse
+        return {'department': department, 'execution_log': []}, False
+
+    admission = AdmissionController(max_concurrent=1, max_waiting=0, wait_timeout=5)
+    monkeypatch.setattr(web_app, 'analysis_admission', admission)
+    monkeypatch.setattr(web_app, 'run_analysis', run_analysis)
+    monkeypatch.setattr(web_app, 'proposal_key', lambda department, seed=None: ('default', department))
+
+    results = {}
+
+    def request(thread_id):
+        results[thread_id] = web_app.admitted_analysis(thread_id, 'Finance')
+
+    threads = [threading.Thread(target=request, args=(f"web_{i}",)) for i in range(4)]
+    threads[0].start()
+    while not runs:
+        time.sleep(0.01)
+    for thread in threads[1:]:
+        thread.start()
+    while admission.stats()['coalesced'] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert runs == ['web_0']
+    assert results['web_0'][1] is False
+    assert all(results[f"web_{i}"] == ({'department': 'Finance', 'execution_log': []}, True) for i in (1, 2, 3))
@@ -0,0 +1,48 @@
+"""Budget allocation of raises."""
+import pandas as pd
+from src.allocation import allocate_raises
+
+
+class FixedRaises:
+    """Policy stand-in proposing a fixed raise per employee."""
+
+    def __init__(self, raises):
+        self.raises = raises
+
+    def evaluate(self, frame):
+        current = frame['Current_Salary']
+        proposed = current + frame['Employee_ID'].map(self.raises)
+        return pd.DataFrame({
+            'current_salary': current,
+            'proposed_salary': proposed,
+            'increase_percentage': (proposed - current) / current * 100,
+            'reason': 'test',
+        })
+
+
+def _frame(rows):
+    return pd.DataFrame([
+        {'Employee_ID': i, 'Name': f"E{i}", 'Department': department, 'Position': 'Tech Lead',
+         'Current_Salary': 5_000_000, 'Manager': 'M', 'Join_Date': pd.Timestamp(join_date)}
+        for i, department, join_date in rows
+    ])
+
+
+def test_unaffordable_candidate_is_skipped_not_a_stop():
+    # Longest tenure ranks first but costs more than the whole budget
+    frame = _frame([(1, 'Sales', '2001-01-01'), (2, 'Sales', '2010-01-01'), (3, 'Sales', '2011-01-01')])
+    policy = FixedRaises({1: 750_500, 2: 749_076, 3: 749_577})
+    funded = allocate_raises(frame, 749_999, score='tenure', policy=policy)
+    assert funded['Employee_ID'].tolist() == [2]
+    assert funded['rank'].tolist() == [1]
+
+
+def test_department_cap_skips_to_cheaper_candidates():
+    # Ranked 1, 2, 3 within Sales; the second would take Sales past its cap
+    frame = _frame([(1, 'Sales', '2001-01-01'), (2, 'Sales', '2011-01-01'),
+                    (3, 'Sales', '2020-01-01'), (4, 'HR', '2012-01-01')])
+    policy = FixedRaises({1: 60_000, 2: 50_000, 3: 30_000, 4: 200_000})
+    funded = allocate_raises(frame, 1_000_000, department_caps={'Sales': 100_000},
+                             score='tenure', policy=policy)
+    assert sorted(funded['Employee_ID']) == [1, 3, 4]
+    assert funded.loc[funded['Department'] == 'Sales', 'cost'].sum() == 90_000
@@ -0,0 +1,55 @@
+"""Batch decisions from a file keep going past failing rows."""
+import io
+import json
+from types import SimpleNamespace
+import cli_demo
+
+
+class FakeGraph:
+    def get_state(self, config):
+        thread_id = config['configurable']['thread_id']
+        employee_id = int(thread_id.rsplit('_', 1)[1])
+        return SimpleNamespace(values={
+            'department': 'Finance', 'proposal_type': 'salary_hike',
+            'proposal_details': {'employee_id': employee_id},
+        })
+
+
+class FakeDecisions:
+    def submit(self, thread_id, decision, modification=None, idempotency_key=None):
+        if thread_id == 't_2':
+            raise KeyError(2)  # employee deleted by a reload
+        return {'department': 'Finance', 'proposal_type': 'salary_hike', 'final_status': 'approved',
+                'proposal_details': {'employee_id': int(thread_id[2:])}}, False
+
+
+class History:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, state, thread_id=None, reviewer=None):
+        if thread_id == 't_3':
+            raise OSError("disk full")
+        self.recorded.append(thread_id)
+
+
+def test_a_failing_decision_does_not_abort_the_batch(tmp_path, monkeypatch):
+    history = History()
+    monkeypatch.setattr(cli_demo, 'graph', FakeGraph())
+    monkeypatch.setattr(cli_demo, 'decision_service', FakeDecisions())
+    monkeypatch.setattr(cli_demo, 'get_history_store', lambda: history)
+    source = tmp_path / "decisions.jsonl"
+    source.write_text(''.join(
+        json.dumps({'thread_id': f"t_{i}", 'decision': 'approve'}) + "\n" for i in range(1, 5)
+    ))
+
+    out = io.StringIO()
+    failures = cli_demo.run_batch(str(source), workers=1, out=out)
+
+    results = {r['thread_id']: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert failures == 2
+    assert set(results) == {'t_1', 't_2', 't_3', 't_4'}
+    assert results['t_2']['success'] is False and 'KeyError' in results['t_2']['error']
+    assert results['t_3']['success'] is False and results['t_3']['status'] == 'approved'
+    assert results['t_1']['success'] and results['t_4']['success']
+    assert history.recorded == ['t_1', 't_4']
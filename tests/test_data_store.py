@@ -0,0 +1,70 @@
+"""Write-back of approved changes to the salary workbook."""
+import gc
+import shutil
+import threading
+from pathlib import Path
+import pandas as pd
+from src import data_store
+from src.data_store import SalaryDataStore
+
+WORKBOOK = Path(__file__).parent.parent / "data" / "salary_data.xlsx"
+
+
+def _store(tmp_path, threshold):
+    path = tmp_path / "salary_data.xlsx"
+    shutil.copy(WORKBOOK, path)
+    return SalaryDataStore(path, compact_threshold=threshold)
+
+
+def test_compaction_runs_off_the_request_path_and_keeps_later_changes(tmp_path, monkeypatch):
+    store = _store(tmp_path, threshold=2)
+    ids = store.frame['Employee_ID'].tolist()[:3]
+
+    started, release = threading.Event(), threading.Event()
+    to_excel = pd.DataFrame.to_excel
+
+    def slow_to_excel(self, *args, **kwargs):
+        started.set()
+        release.wait(5)
+        return to_excel(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, 'to_excel', slow_to_excel)
+    store.apply_changes(ids[0], {'Current_Salary': 111})
+    store.apply_changes(ids[1], {'Current_Salary': 222})  # crosses the threshold
+    assert started.wait(5)
+    # The store stays usable while the workbook is being written
+    store.apply_changes(ids[2], {'Current_Salary': 333})
+    assert store.employee(ids[2]).current_salary == 333
+    release.set()
+    store._compactor.join(10)
+
+    assert len(store.delta_path.read_text().splitlines()) == 1
+    reloaded = SalaryDataStore(store.path)
+    assert [reloaded.employee(i).current_salary for i in ids] == [111, 222, 333]
+    assert pd.read_excel(store.path).set_index('Employee_ID').loc[ids[2], 'Current_Salary'] != 333
+
+
+def test_an_evicted_store_still_in_use_is_taken_back(tmp_path, monkeypatch):
+    sources = {}
+    for tenant in ('acme', 'globex'):
+        sources[tenant] = tmp_path / f"{tenant}.xlsx"
+        shutil.copy(WORKBOOK, sources[tenant])
+    monkeypatch.setattr(data_store, 'tenant_source', sources.__getitem__)
+    registry = data_store.StoreRegistry(max_stores=1)
+
+    acme = registry.get('acme')  # e.g. held by a /decide mid-write
+    registry.get('globex')
+    assert registry.stats()['evictions'] == 1
+    employee_id = acme.frame['Employee_ID'].iloc[0]
+    acme.apply_changes(employee_id, {'Current_Salary': 123})
+
+    assert registry.get('acme') is acme
+    assert registry.loads == 2
+
+    del acme
+    gc.collect()
+    registry.get('globex')  # evicts acme again, this time with no one holding it
+    gc.collect()
+    reloaded = registry.get('acme')
+    assert registry.loads == 4
+    assert reloaded.employee(employee_id).current_salary == 123
@@ -0,0 +1,88 @@
+"""Idempotent, compare-and-set decision submission."""
+import operator
+import threading
+from typing import Annotated, List, Optional, TypedDict
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+from src.decisions import DecisionConflict, DecisionService, WorkflowNotFound
+
+
+class State(TypedDict, total=False):
+    department: str
+    human_decision: Optional[str]
+    modification_details: Optional[dict]
+    final_status: Optional[str]
+    runs: Annotated[List[str], operator.add]
+
+
+def _graph():
+    """analyze_department -> (pause) human_approval -> finish, like the real workflow."""
+    workflow = StateGraph(State)
+    workflow.add_node("analyze_department", lambda state: {})
+    workflow.add_node("human_approval", lambda state: {})
+    workflow.add_node("finish", lambda state: {'final_status': state['human_decision'],
+                                               'runs': [state['human_decision']]})
+    workflow.set_entry_point("analyze_department")
+    workflow.add_edge("analyze_department", "human_approval")
+    workflow.add_edge("human_approval", "finish")
+    workflow.add_edge("finish", END)
+    return workflow.compile(checkpointer=MemorySaver(), interrupt_before=["human_approval"])
+
+
+@pytest.fixture
+def service():
+    graph = _graph()
+    graph.invoke({'department': 'Finance', 'runs': []}, {"configurable": {"thread_id": "web_1"}})
+    return DecisionService(graph=graph)
+
+
+def test_a_repeated_idempotency_key_replays_without_resuming(service):
+    first, replayed = service.submit('web_1', 'approve', idempotency_key='k1')
+    assert (first['final_status'], replayed) == ('approve', False)
+
+    again, replayed = service.submit('web_1', 'approve', idempotency_key='k1')
+    assert replayed and again == first
+    assert again['runs'] == ['approve']
+
+
+def test_a_stale_checkpoint_is_refused(service):
+    seen = service.checkpoint_id('web_1')
+    with pytest.raises(DecisionConflict, match="changed since"):
+        service.submit('web_1', 'approve', expected_checkpoint='an-older-checkpoint')
+    result, replayed = service.submit('web_1', 'approve', expected_checkpoint=seen)
+    assert not replayed and result['runs'] == ['approve']
+
+
+def test_concurrent_submissions_resume_the_graph_once(service):
+    seen = service.checkpoint_id('web_1')
+    results, errors = [], []
+
+    def submit(i):
+        try:
+            results.append(service.submit('web_1', 'approve', idempotency_key=f"k{i}",
+                                          expected_checkpoint=seen))
+        except DecisionConflict as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert not errors
+    assert sum(1 for _, replayed in results if not replayed) == 1
+    assert all(state['runs'] == ['approve'] for state, _ in results)
+
+
+def test_a_different_decision_on_a_decided_thread_conflicts(service):
+    service.submit('web_1', 'approve')
+    with pytest.raises(DecisionConflict, match="already decided") as conflict:
+        service.submit('web_1', 'reject')
+    assert conflict.value.state['final_status'] == 'approve'
+
+
+def test_unknown_threads_are_reported(service):
+    with pytest.raises(WorkflowNotFound):
+        service.submit('web_missing', 'approve')
@@ -0,0 +1,36 @@
+"""Checks for the response JSON encoder."""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src import encoding
+from src.encoding import Fragment, dumps
+
+PAYLOAD = {
+    'count': np.int64(3),
+    'mean': np.float64('nan'),
+    'joined': pd.Timestamp('2020-01-02'),
+    'missing': pd.NaT,
+    'salaries': np.array([1, 2]),
+    'rows': pd.DataFrame({'Join_Date': pd.to_datetime(['2021-05-06']), 'Salary': [1.5]}),
+    'cached': Fragment(b'[{"a":1}]'),
+}
+EXPECTED = {
+    'count': 3, 'mean': None, 'joined': '2020-01-02T00:00:00', 'missing': None,
+    'salaries': [1, 2], 'rows': [{'Join_Date': '2021-05-06', 'Salary': 1.5}],
+    'cached': [{'a': 1}],
+}
+
+
+@pytest.mark.skipif(not encoding.NATIVE_FRAGMENTS, reason="needs orjson with Fragment")
+def test_orjson_path_does_not_walk_the_payload(monkeypatch):
+    def walk(obj):
+        raise AssertionError("payload walked")
+    monkeypatch.setattr(encoding, '_has_fragment', walk)
+    assert json.loads(dumps(PAYLOAD)) == EXPECTED
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(encoding, 'orjson', None)
+    monkeypatch.setattr(encoding, 'NATIVE_FRAGMENTS', False)
+    assert json.loads(dumps(PAYLOAD)) == EXPECTED
@@ -0,0 +1,86 @@
+"""Pay-equity metrics against a straightforward per-group computation."""
+import numpy as np
+import pandas as pd
+from src import equity
+from src.equity import equity_metrics
+
+AS_OF = pd.Timestamp('2025-01-01')
+POSITIONS = ['Software Engineer', 'Tech Lead', 'HR Manager', 'Unlisted Role']
+
+
+def _frame(n=400, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Employee_ID': np.arange(1, n + 1),
+        'Name': [f"E{i}" for i in range(n)],
+        'Department': rng.choice(['Engineering', 'HR', 'Sales'], size=n),
+        'Position': rng.choice(POSITIONS, size=n, p=[0.45, 0.45, 0.09, 0.01]),
+        'Current_Salary': rng.integers(4_000_000, 13_000_000, size=n),
+        'Join_Date': AS_OF - pd.to_timedelta(rng.integers(30, 6000, size=n), unit='D'),
+    })
+
+
+def test_employee_metrics_match_a_per_group_computation():
+    frame = _frame()
+    employees, _ = equity_metrics(frame, as_of=AS_OF)
+
+    grouped = frame.groupby(['Department', 'Position'])['Current_Salary']
+    size = grouped.transform('size')
+    expected_z = (frame['Current_Salary'] - grouped.transform('mean')) / grouped.transform('std')
+    expected_z[size < equity.MIN_GROUP_SIZE] = np.nan
+    np.testing.assert_allclose(employees['z_score'], expected_z.round(3), atol=1e-3)
+    np.testing.assert_allclose(employees['percentile'], grouped.rank(pct=True).round(4))
+
+    tenure = (AS_OF - frame['Join_Date']).dt.days / 365.25
+    for (_, _), rows in frame.groupby(['Department', 'Position']).groups.items():
+        if len(rows) < equity.MIN_GROUP_SIZE:
+            assert employees.loc[rows, 'tenure_adjusted_z'].isna().all()
+            continue
+        slope, intercept = np.polyfit(tenure[rows], frame.loc[rows, 'Current_Salary'], 1)
+        residual = frame.loc[rows, 'Current_Salary'] - (slope * tenure[rows] + intercept)
+        np.testing.assert_allclose(employees.loc[rows, 'tenure_adjusted_z'],
+                                   (residual / residual.std()).round(3), atol=2e-3)
+
+
+def test_band_flags_and_group_table():
+    frame = pd.DataFrame({
+        'Employee_ID': [1, 2, 3, 4, 5],
+        'Name': list('ABCDE'),
+        'Department': ['Engineering'] * 4 + ['HR'],
+        'Position': ['Tech Lead'] * 4 + ['Unlisted Role'],
+        # Tech Lead band is ₹1.04Cr-₹1.25Cr
+        'Current_Salary': [10_000_000, 11_000_000, 11_100_000, 13_000_000, 5_000_000],
+        'Join_Date': pd.to_datetime(['2010-01-01', '2015-01-01', '2018-01-01', '2024-01-01', '2020-01-01']),
+    })
+    employees, groups = equity_metrics(frame, as_of=AS_OF)
+
+    assert employees['band_flag'].tolist() == ['below_band', 'within_band', 'within_band', 'above_band', 'unbanded']
+    assert employees['outlier'].tolist()[:4] == [True, False, False, True]
+    assert employees.loc[0, 'compa_ratio'] == round(10_000_000 / 11_450_000, 3)
+
+    tech_lead = groups.set_index('Position').loc['Tech Lead']
+    assert tech_lead['employees'] == 4
+    assert (tech_lead['below_band'], tech_lead['above_band']) == (1, 1)
+    assert tech_lead['spread_ratio'] == round(3_000_000 / 2_100_000, 3)
+    # Salary falls as tenure rises: compressed despite the wide spread
+    assert tech_lead['tenure_slope'] < 0 and tech_lead['compressed']
+    assert not groups.set_index('Position').loc['Unlisted Role', 'compressed']
+
+
+def test_candidates_close_the_gap_to_band_or_peers(monkeypatch):
+    frame = _frame()
+    monkeypatch.setattr(equity, 'get_equity', lambda: equity_metrics(frame, as_of=AS_OF))
+    employees, _ = equity_metrics(frame, as_of=AS_OF)
+    candidates = equity.equity_candidates()
+
+    assert len(candidates) and (candidates['gap'] > 0).all()
+    assert candidates['gap'].is_monotonic_decreasing
+    below_band = candidates[candidates['rule'] == 'equity_below_band']
+    assert (below_band['band_flag'] == 'below_band').all()
+    assert (below_band['proposed_salary'] == below_band['Position'].map(
+        {'Software Engineer': 5_800_000, 'Tech Lead': 10_400_000, 'HR Manager': 6_200_000})).all()
+    below_peers = candidates[candidates['rule'] == 'equity_below_peers']
+    assert (below_peers['tenure_adjusted_z'] <= -equity.Z_THRESHOLD).all()
+    expected = employees.loc[below_peers.index, 'expected_salary'].astype('int64')
+    assert (below_peers['proposed_salary'] == expected).all()
+    assert (equity.equity_candidates('HR')['Department'] == 'HR').all()
@@ -0,0 +1,49 @@
+"""Streaming CSV and XLSX encoders."""
+import csv
+import io
+from openpyxl import load_workbook
+from src import export
+from src.export import iter_csv, iter_xlsx
+
+COLUMNS = ['id', 'department', 'decided_at']
+
+
+def _rows(n):
+    return ([i, 'Finance', 1_700_000_000 + i] for i in range(1, n + 1))
+
+
+def test_csv_is_yielded_in_row_chunks_as_rows_arrive(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_ROWS', 2)
+
+    def rows():
+        yield from _rows(2)
+        raise AssertionError("read past the first chunk")
+
+    assert next(iter_csv(COLUMNS, rows())).splitlines() == [
+        'id,department,decided_at',
+        '1,Finance,2023-11-14T22:13:21+00:00',
+        '2,Finance,2023-11-14T22:13:22+00:00',
+    ]
+    chunks = list(iter_csv(COLUMNS, _rows(5)))
+    assert len(chunks) == 3
+    assert [r[0] for r in csv.reader(io.StringIO(''.join(chunks)))] == ['id', '1', '2', '3', '4', '5']
+    assert ''.join(iter_csv(COLUMNS, [])) == 'id,department,decided_at\r\n'
+
+
+def test_xlsx_continues_on_a_new_sheet_at_the_row_limit(monkeypatch):
+    monkeypatch.setattr(export, 'SHEET_MAX_ROWS', 3)
+    monkeypatch.setattr(export, 'CHUNK_BYTES', 1024)
+
+    chunks = list(iter_xlsx(COLUMNS, _rows(5), title='Decisions'))
+    assert len(chunks) > 1
+    workbook = load_workbook(io.BytesIO(b''.join(chunks)), read_only=True)
+    assert workbook.sheetnames == ['Decisions', 'Decisions 2', 'Decisions 3']
+    sheets = [[list(row) for row in workbook[name].iter_rows(values_only=True)] for name in workbook.sheetnames]
+    assert all(sheet[0] == COLUMNS for sheet in sheets)
+    assert [row[0] for sheet in sheets for row in sheet[1:]] == [1, 2, 3, 4, 5]
+    assert sheets[0][1][2] == '2023-11-14T22:13:21+00:00'
+
+
+def test_an_empty_xlsx_export_still_has_its_header():
+    workbook = load_workbook(io.BytesIO(b''.join(iter_xlsx(COLUMNS, []))), read_only=True)
+    assert [list(r) for r in workbook['Export'].iter_rows(values_only=True)] == [COLUMNS]
@@ -0,0 +1,54 @@
+"""Incremental hierarchy updates against a full rebuild."""
+import numpy as np
+import pandas as pd
+from src.hierarchy import HierarchyIndex
+
+
+def _frame(n=150, seed=3):
+    rng = np.random.default_rng(seed)
+    managers = ['Board' if i < 3 else f"E{rng.integers(0, i)}" for i in range(n)]
+    return pd.DataFrame({'Employee_ID': np.arange(1, n + 1), 'Name': [f"E{i}" for i in range(n)],
+                         'Manager': managers})
+
+
+def _snapshot(index, names):
+    return {
+        name: (index.report_count(name), index.total_reports(name), index.depth(name),
+               sorted(index.direct_reports(name)), index.subordinates(name))
+        for name in names
+    }
+
+
+def test_moves_match_a_rebuild():
+    frame = _frame()
+    index = HierarchyIndex(frame)
+    names = frame['Name'].tolist() + ['Board']
+    rng = np.random.default_rng(11)
+
+    applied = 0
+    for _ in range(300):
+        row = int(rng.integers(len(frame)))
+        manager = names[int(rng.integers(len(names)))]
+        employee_id = int(frame.at[row, 'Employee_ID'])
+        if index.move(employee_id, manager):
+            frame.at[row, 'Manager'] = manager
+            applied += 1
+
+    assert applied > 100
+    rebuilt = HierarchyIndex(frame)
+    assert _snapshot(index, names) == _snapshot(rebuilt, names)
+    assert all(index.chain(i) == rebuilt.chain(i) for i in frame['Employee_ID'])
+    assert index.span_of_control(10) == rebuilt.span_of_control(10)
+
+
+def test_moves_that_need_a_rebuild_are_refused():
+    frame = pd.DataFrame({'Employee_ID': [1, 2, 3], 'Name': ['A', 'B', 'C'], 'Manager': ['Board', 'A', 'B']})
+    index = HierarchyIndex(frame)
+
+    assert not index.move(1, 'C')          # A under its own report: a cycle
+    assert not index.move(1, 'A')          # under itself
+    assert not index.move(3, 'Newcomer')   # a name the index has never seen
+    assert index.total_reports('A') == 2 and index.chain(3) == ['B', 'A', 'Board']
+
+    assert index.move(3, 'A')
+    assert index.direct_reports('A') == [2, 3] and index.depth('C') == 2
@@ -0,0 +1,45 @@
+"""Tenant isolation of the decision and proposal history."""
+import pytest
+from src import export, history
+from src.history import HistoryStore
+
+
+def _state(tenant, department='Finance', employee_id=1001):
+    return {
+        'tenant': tenant, 'department': department, 'proposal_type': 'salary_hike',
+        'proposal_details': {'employee_id': employee_id, 'employee_name': 'Asha', 'current_salary': 100,
+                             'proposed_salary': 110, 'increase_percentage': 10.0},
+        'human_decision': 'approve', 'final_status': 'approved', 'final_message': 'ok',
+    }
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = HistoryStore(tmp_path / "history.db")
+    monkeypatch.setattr(history, 'get_history_store', lambda: store)
+    monkeypatch.setattr(export, 'get_history_store', lambda: store)
+    return store
+
+
+def test_tenants_do_not_see_each_others_decisions(store):
+    store.record(_state('default'), thread_id='web_1')
+    store.record(_state('acme'), thread_id='acme:web_2')
+    store.record(_state('acme', department='HR'), thread_id='acme:web_3')
+
+    assert [r['thread_id'] for r in store.query()['items']] == ['web_1']
+    assert [r['thread_id'] for r in store.query(tenant='acme')['items']] == ['acme:web_3', 'acme:web_2']
+    assert [r['thread_id'] for r in store.query(department='Finance', tenant='acme')['items']] == ['acme:web_2']
+    assert store.count(status='approved') == 1
+    assert store.count(status='approved', tenant='acme') == 2
+    assert store.query(tenant='globex')['items'] == []
+
+
+def test_exports_are_per_tenant(store):
+    store.record_proposal(_state('default'), thread_id='web_1')
+    store.record_proposal(_state('acme', employee_id=2002), thread_id='acme:web_2')
+
+    default_csv = ''.join(export.export_chunks('proposals'))
+    acme_csv = ''.join(export.export_chunks('proposals', tenant='acme'))
+    assert 'web_1' in default_csv and 'acme:web_2' not in default_csv
+    assert 'acme:web_2' in acme_csv and 'web_1' not in acme_csv
+
@@ -0,0 +1,94 @@
+"""Delivery, retry and dead-lettering of outbox events."""
+import csv
+import time
+import pytest
+from src import outbox as outbox_module
+from src.outbox import Outbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(tmp_path / "outbox.db", workers=0, batch_size=10)
+
+
+def _rows(outbox):
+    return outbox._conn.execute(
+        "SELECT topic, attempts, available_at, dead, last_error FROM outbox ORDER BY id"
+    ).fetchall()
+
+
+def _elapse_backoff(outbox):
+    with outbox._conn:
+        outbox._conn.execute("UPDATE outbox SET available_at = ?", (time.time() - 1,))
+
+
+def test_events_are_batched_by_topic_and_deleted_once_delivered(outbox):
+    seen = []
+    outbox.register('audit', lambda batch: seen.append([e['n'] for e in batch]))
+    outbox.register('payroll', lambda batch: seen.append([e['n'] for e in batch]))
+    outbox.enqueue([{'topic': 'audit', 'n': 1}, {'topic': 'payroll', 'n': 2}])
+    outbox.enqueue([{'topic': 'audit', 'n': 3}])
+
+    assert outbox.drain(timeout=5)
+    assert seen == [[1, 3], [2]]
+    assert _rows(outbox) == [] and outbox.stats()['delivered'] == 3
+
+
+def test_a_thread_records_each_topic_once(outbox):
+    outbox.enqueue([{'topic': 'audit', 'n': 1}], thread_id='web_1')
+    outbox.enqueue([{'topic': 'audit', 'n': 2}], thread_id='web_1')
+    outbox.enqueue([{'topic': 'audit', 'n': 3}], thread_id='web_2')
+    assert outbox.stats()['pending'] == 2
+
+
+def test_failed_batches_back_off_then_succeed(outbox, monkeypatch):
+    monkeypatch.setattr(outbox_module.random, 'uniform', lambda a, b: 1.0)
+    failures = iter([RuntimeError("payroll down")])
+
+    def flaky(batch):
+        error = next(failures, None)
+        if error:
+            raise error
+    outbox.register('payroll', flaky)
+    outbox.enqueue([{'topic': 'payroll'}])
+
+    before = time.time()
+    assert outbox.process_batch() == 1
+    [(_, attempts, available_at, dead, last_error)] = _rows(outbox)
+    assert (attempts, dead, last_error) == (1, 0, "payroll down")
+    assert before + 2 <= available_at <= time.time() + 2
+    assert outbox.process_batch() == 0  # still backing off
+    assert outbox.stats()['retrying'] == 1
+
+    _elapse_backoff(outbox)
+    assert outbox.process_batch() == 1
+    assert _rows(outbox) == []
+
+
+def test_events_are_parked_as_dead_after_max_attempts(outbox, monkeypatch):
+    monkeypatch.setattr(outbox_module, 'MAX_ATTEMPTS', 3)
+    outbox.enqueue([{'topic': 'nobody_listens'}])
+
+    for _ in range(3):
+        _elapse_backoff(outbox)
+        assert outbox.process_batch() == 1
+
+    [(_, attempts, _, dead, last_error)] = _rows(outbox)
+    assert (attempts, dead) == (3, 1)
+    assert "No handler" in last_error
+    _elapse_backoff(outbox)
+    assert outbox.process_batch() == 0
+    assert outbox.stats()['dead'] == 1 and outbox.drain(timeout=1)
+
+
+def test_payroll_rows_carry_the_event_id(outbox, tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_module, 'OUTBOX_DIR', tmp_path / "out")
+    outbox.register('payroll', outbox_module.write_payroll)
+    outbox.enqueue([{'topic': 'payroll', 'employee_id': 7, 'new_salary': 100}])
+    outbox.drain(timeout=5)
+    outbox.enqueue([{'topic': 'payroll', 'employee_id': 8, 'new_salary': 200}])
+    outbox.drain(timeout=5)
+
+    with open(tmp_path / "out" / "payroll_changes.csv", newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [(r['event_id'], r['employee_id']) for r in rows] == [('1', '7'), ('2', '8')]
@@ -0,0 +1,70 @@
+"""Declarative hike policy evaluation."""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src.policy import DEFAULT_RULES, ProposalPolicy, load_policy
+
+AS_OF = pd.Timestamp('2025-01-01')
+
+
+def _frame(rows):
+    return pd.DataFrame(
+        [{'Employee_ID': i, 'Name': f"E{i}", 'Department': department, 'Position': position,
+          'Current_Salary': salary, 'Manager': 'M', 'Join_Date': pd.Timestamp(join_date)}
+         for i, department, position, salary, join_date in rows]
+    ).set_index('Employee_ID', drop=False)
+
+
+def test_default_policy_matches_the_old_flat_fifteen_percent():
+    rng = np.random.default_rng(7)
+    salaries = rng.integers(4_000_000, 17_000_000, size=500)
+    frame = _frame([(i, 'Sales' if i % 2 else 'Engineering', 'Tech Lead', int(s), '2015-06-01')
+                    for i, s in enumerate(salaries)])
+
+    proposals = ProposalPolicy(DEFAULT_RULES).evaluate(frame, as_of=AS_OF)
+
+    assert proposals.index.tolist() == frame.index.tolist()
+    assert proposals['proposed_salary'].tolist() == [int(s * 1.15) for s in frame['Current_Salary']]
+    assert (proposals['increase_percentage'] == 15).all()
+    assert proposals.loc[0, 'reason'] == "Top performer in Engineering department"
+    assert proposals.loc[1, 'reason'] == "Top performer in Sales department"
+
+
+def test_first_matching_rule_wins_and_unmatched_rows_are_left_out():
+    policy = ProposalPolicy([
+        {'name': 'loyal_below_mid', 'when': {'joined_before': '2020-01-01', 'band_position': 'below_midpoint'},
+         'increase_percentage': 10, 'reason': 'Below the {position} midpoint'},
+        {'name': 'finance', 'when': {'departments': ['Finance'], 'min_tenure_years': 2},
+         'increase_percentage': 5, 'reason': 'Finance'},
+    ])
+    # Tech Lead band is ₹1.04Cr-₹1.25Cr, midpoint ₹1.145Cr
+    frame = _frame([
+        (1, 'Finance', 'Tech Lead', 10_500_000, '2018-01-01'),  # both rules, first wins
+        (2, 'Finance', 'Tech Lead', 12_000_000, '2018-01-01'),  # above midpoint: second rule
+        (3, 'Finance', 'Tech Lead', 10_500_000, '2024-06-01'),  # too recent for either
+        (4, 'Sales', 'Unknown Role', 1_000_000, '2010-01-01'),  # no band, not Finance
+    ])
+
+    proposals = policy.evaluate(frame, as_of=AS_OF)
+
+    assert proposals.index.tolist() == [1, 2]
+    assert proposals['rule'].tolist() == ['loyal_below_mid', 'finance']
+    assert proposals['proposed_salary'].tolist() == [11_550_000, 12_600_000]
+    assert proposals.loc[1, 'reason'] == 'Below the Tech Lead midpoint'
+
+
+def test_version_follows_the_rules_and_unknown_conditions_fail():
+    assert ProposalPolicy(DEFAULT_RULES).version == ProposalPolicy(json.loads(json.dumps(DEFAULT_RULES))).version
+    assert ProposalPolicy([{**DEFAULT_RULES[0], 'increase_percentage': 12}]).version != \
+        ProposalPolicy(DEFAULT_RULES).version
+    with pytest.raises(ValueError, match='Unknown policy condition'):
+        ProposalPolicy([{'name': 'x', 'when': {'grade': 'A'}, 'increase_percentage': 1}])
+
+
+def test_load_policy_reads_the_file_or_falls_back(tmp_path):
+    assert load_policy(tmp_path / 'missing.json').rules == DEFAULT_RULES
+    path = tmp_path / 'policy.json'
+    rules = [{'name': 'all', 'when': {}, 'increase_percentage': 3}]
+    path.write_text(json.dumps(rules), encoding='utf-8')
+    assert load_policy(path).rules == rules
@@ -0,0 +1,64 @@
+"""Ordering, leases and de-duplication of the reviewer queue."""
+import time
+import pytest
+from src.review_queue import LeaseError, ReviewQueue
+
+
+def _hike(employee_id, raise_by=0):
+    return {'employee_id': employee_id, 'employee_name': f"E{employee_id}",
+            'current_salary': 1_000_000, 'proposed_salary': 1_000_000 + raise_by}
+
+
+def test_claims_follow_sla_and_salary_impact():
+    queue = ReviewQueue(sla_hours={'HR': 24})
+    now = time.time()
+    queue.enqueue('web_a', 'Finance', 'salary_hike', _hike(1), now=now)
+    queue.enqueue('web_b', 'HR', 'salary_hike', _hike(2), now=now)
+    queue.enqueue('web_c', 'Finance', 'salary_hike', _hike(3, raise_by=4_000_000), now=now)
+
+    # HR's 24h SLA beats Finance's 72h; a ₹40L raise is pulled 48h earlier
+    assert [queue.claim(now=now)['thread_id'] for _ in range(3)] == ['web_c', 'web_b', 'web_a']
+    assert queue.claim(now=now) is None
+
+
+def test_an_item_cannot_be_claimed_twice_until_its_lease_expires():
+    queue = ReviewQueue(lease_seconds=60)
+    now = time.time()
+    queue.enqueue('web_a', 'Finance', 'salary_hike', _hike(1), now=now)
+
+    first = queue.claim(reviewer='asha', now=now)
+    assert queue.claim(reviewer='ravi', now=now + 30) is None
+    with pytest.raises(LeaseError, match='asha'):
+        queue.check_decision('web_a', lease='not-the-lease')
+    queue.check_decision('web_a', lease=first['lease'])
+
+    second = queue.claim(reviewer='ravi', now=now + 61)
+    assert second['thread_id'] == 'web_a' and second['lease'] != first['lease']
+    with pytest.raises(LeaseError):
+        queue.release('web_a', first['lease'])
+
+
+def test_reanalysis_replaces_the_queued_item_and_keeps_its_place():
+    queue = ReviewQueue()
+    now = time.time()
+    queue.enqueue('web_a', 'Finance', 'salary_hike', _hike(1), now=now)
+    queue.enqueue('web_b', 'Finance', 'salary_hike', _hike(2), now=now + 10)
+    queue.enqueue('web_a2', 'Finance', 'salary_hike', _hike(1), now=now + 3600)
+    queue.enqueue('web_a3', 'Finance', 'manager_change', {'employee_id': 1}, now=now + 3600)
+
+    assert queue.stats()['pending'] == 3
+    claimed = queue.claim(now=now + 3600)
+    assert claimed['thread_id'] == 'web_a2' and claimed['enqueued_at'] == now
+
+
+def test_a_leased_subject_is_not_queued_again():
+    queue = ReviewQueue()
+    now = time.time()
+    queue.enqueue('web_a', 'Finance', 'salary_hike', _hike(1), now=now)
+    queue.claim(reviewer='asha', now=now)
+
+    assert queue.enqueue('web_a2', 'Finance', 'salary_hike', _hike(1), now=now + 1).thread_id == 'web_a'
+    queue.complete('web_a')
+    assert queue.stats()['pending'] == 0
+    queue.enqueue('web_a3', 'Finance', 'salary_hike', _hike(1), now=now + 2)
+    assert queue.claim(now=now + 2)['thread_id'] == 'web_a3'
@@ -0,0 +1,51 @@
+"""Ingest validation and issue reporting."""
+import pandas as pd
+import pytest
+from src.schema import ISSUE_COLUMNS, SchemaError, normalize, summarize
+
+
+def _raw(rows):
+    return pd.DataFrame(rows, columns=['Employee_ID', 'Name', 'Department', 'Position',
+                                       'Current_Salary', 'Manager', 'Join_Date'])
+
+
+def test_valid_rows_are_coerced_to_typed_columns():
+    frame, issues = normalize(_raw([
+        ['1', ' Asha ', 'Finance', 'CFO', '₹1,25,00,000', None, '2018-04-01'],
+        [2.0, 'Ravi', 'Finance', 'Senior Analyst', 8_000_000.4, 'Asha', '03/15/2020'],
+    ]))
+
+    assert issues.empty and list(issues.columns) == ISSUE_COLUMNS
+    assert frame['Employee_ID'].tolist() == [1, 2]
+    assert frame['Name'].tolist() == ['Asha', 'Ravi']
+    assert frame['Current_Salary'].tolist() == [12_500_000, 8_000_000]
+    assert frame['Join_Date'].tolist() == [pd.Timestamp('2018-04-01'), pd.Timestamp('2020-03-15')]
+    assert str(frame['Department'].dtype) == 'category' and pd.isna(frame.loc[0, 'Manager'])
+
+
+def test_bad_rows_are_dropped_and_every_failed_check_reported():
+    frame, issues = normalize(_raw([
+        [1, 'Asha', 'Finance', 'CFO', 12_500_000, None, '2018-04-01'],
+        [1, 'Dup', 'Finance', 'CFO', 1, None, '2018-04-01'],
+        [-3, '  ', 'Finance', 'CFO', 'lots', None, 'someday'],
+        [4, 'Meera', '', 'CFO', -5, None, '2019-01-01'],
+    ]))
+
+    assert frame['Employee_ID'].tolist() == [1]
+    # Spreadsheet rows: the header is row 1, so the first record is row 2
+    assert issues[['row', 'column', 'problem']].values.tolist() == [
+        [3, 'Employee_ID', 'duplicate Employee_ID'],
+        [4, 'Current_Salary', 'not a number'],
+        [4, 'Employee_ID', 'not a positive whole number'],
+        [4, 'Join_Date', 'not a date'],
+        [4, 'Name', 'blank'],
+        [5, 'Current_Salary', 'negative salary'],
+        [5, 'Department', 'blank'],
+    ]
+    assert issues.loc[issues['column'] == 'Join_Date', 'value'].tolist() == ['someday']
+    assert summarize(issues).splitlines()[0] == "Current_Salary negative salary: 1"
+
+
+def test_a_missing_column_rejects_the_workbook():
+    with pytest.raises(SchemaError, match='Join_Date'):
+        normalize(_raw([]).drop(columns=['Join_Date']))
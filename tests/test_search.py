@@ -0,0 +1,31 @@
+"""Employee prefix search."""
+import threading
+from src import search
+from src.data_store import get_store
+
+
+def test_index_is_built_off_the_request_thread(monkeypatch):
+    built_on = []
+    build = search.SearchIndex
+
+    def recording_index(frame):
+        built_on.append(threading.current_thread().name)
+        return build(frame)
+
+    monkeypatch.setattr(search, 'SearchIndex', recording_index)
+    store = get_store()
+    for key in ('search_index', 'search_version', 'search_building', 'search_built'):
+        store.cache.pop(key, None)
+
+    results = search.search_employees(store.frame['Name'].iloc[0].split()[0])
+    assert not results.empty
+    assert built_on == ['search-index-builder']
+
+
+def test_ids_names_and_positions_match_by_prefix():
+    store = get_store()
+    row = store.frame.iloc[0]
+    index = search.SearchIndex(store.frame)
+    assert index.search(str(row['Employee_ID']))[0] == row['Employee_ID']
+    assert row['Employee_ID'] in index.search(row['Name'].split()[-1][:3], limit=200)
+    assert row['Employee_ID'] in index.search(row['Position'][:4], limit=200)
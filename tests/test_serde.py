@@ -0,0 +1,80 @@
+"""Round-trip checks for the checkpoint serializer."""
+import datetime
+import numpy as np
+import pytest
+from src import serde
+from src.employee import Employee
+from src.serde import CompactSerializer
+
+
+def _employees(n=3, **overrides):
+    return [
+        Employee(**{
+            'employee_id': 1000 + i, 'name': f"E{i}", 'department': 'Engineering',
+            'position': 'Tech Lead', 'current_salary': 1_500_000 + i, 'manager': None,
+            'join_date': '2020-01-01', **overrides,
+        })
+        for i in range(n)
+    ]
+
+
+def _round_trip(serializer, value):
+    loaded = serializer.loads_typed(serializer.dumps_typed(value))
+    assert loaded == value
+    return loaded
+
+
+@pytest.mark.parametrize('compress_threshold', [None, 0])
+def test_employee_lists_round_trip(compress_threshold):
+    serializer = CompactSerializer(compress_threshold=compress_threshold)
+    employees = _employees(50)
+    type_, _ = serializer.dumps_typed(employees)
+    assert type_.startswith(serde.EMPLOYEES_TYPE)
+    loaded = _round_trip(serializer, employees)
+    assert all(type(e.current_salary) is int for e in loaded)
+
+
+class Name(str):
+    pass
+
+
+def test_msgpack_native_types_stay_packed():
+    serializer = CompactSerializer()
+    employees = _employees(current_salary=True, manager=b'raw')
+    assert serializer.dumps_typed(employees)[0] == serde.EMPLOYEES_TYPE
+    loaded = _round_trip(serializer, employees)
+    assert type(loaded[0].current_salary) is bool and type(loaded[0].manager) is bytes
+
+
+@pytest.mark.parametrize('overrides', [
+    {'current_salary': 2 ** 70},
+    {'current_salary': -(2 ** 63) - 1},
+    {'current_salary': np.float32(1.5)},
+    {'current_salary': np.int64(7)},
+    {'manager': ('Asha', 'Ravi')},
+    {'manager': Name('Asha')},
+    {'join_date': datetime.date(2020, 1, 1)},
+])
+def test_columns_that_do_not_fit_use_the_plain_path(overrides):
+    serializer = CompactSerializer()
+    employees = _employees(**overrides)
+    assert not serializer.dumps_typed(employees)[0].startswith(serde.EMPLOYEES_TYPE)
+    loaded = _round_trip(serializer, employees)
+    for field, value in overrides.items():
+        assert type(getattr(loaded[0], field)) is type(value)
+    single = _round_trip(serializer, employees[0])
+    assert type(getattr(single, field)) is type(value)
+
+
+def test_record_lists_use_the_default_serializer():
+    serializer = CompactSerializer()
+    records = [{'Employee_ID': i, 'Name': f"E{i}", 'Score': np.int64(i)} for i in range(3)]
+    _round_trip(serializer, records)
+    plain = [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+    assert serializer.dumps_typed(plain) == serde.JsonPlusSerializer().dumps_typed(plain)
+
+
+def test_benchmark_round_trips():
+    results = serde.benchmark(rows=500, steps=1)
+    assert set(results) >= {'default', 'compact'}
+    assert results['compact']['bytes'] < results['default']['bytes']
@@ -0,0 +1,54 @@
+"""Sharded analysis of large departments matches the single pass."""
+import os
+import pytest
+from src import nodes
+from src.data_store import get_store
+
+
+def _analyze(seed, sharded):
+    state = {'department': 'Engineering', 'tenant': None, 'seed': seed, 'execution_log': []}
+    state.update(nodes.load_data_node(state))
+    if sharded:
+        shards = nodes.plan_shards(state['department'], state['department_size'])
+        state['shard_results'] = [r for s in shards for r in nodes.analyze_shard_node(s)['shard_results']]
+        state.update(nodes.reduce_shards_node(state))
+    return state, nodes.analyze_department_node(state, {})
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 3)
+    monkeypatch.setattr(nodes, 'MIN_SHARD_ROWS', 2)
+
+
+def test_sharded_proposals_match_the_single_pass(monkeypatch, small_shards):
+    direct = [_analyze(seed, sharded=False)[1] for seed in range(8)]
+    monkeypatch.setattr(nodes, 'SHARD_THRESHOLD', 1)
+    sharded = [_analyze(seed, sharded=True) for seed in range(8)]
+
+    for (state, result), expected in zip(sharded, direct):
+        assert state['employees'] == []  # no records are built for sharded departments
+        assert state['department_stats']['shards'] == 3
+        assert result['proposal_details'] == expected['proposal_details']
+    assert {r['proposal_type'] for r in direct} == {'salary_hike', 'manager_change'}
+
+
+def test_process_backend_matches_the_thread_backend(monkeypatch, small_shards):
+    monkeypatch.setattr(nodes, 'SHARD_THRESHOLD', 1)
+    threaded = _analyze(3, sharded=True)[0]['department_stats']
+    monkeypatch.setattr(nodes, 'SHARD_BACKEND', 'process')
+    assert _analyze(3, sharded=True)[0]['department_stats'] == threaded
+
+
+def test_eligible_managers_exclude_the_employee_and_their_reports():
+    store = get_store()
+    frame = store.department_employees('Engineering')
+    hierarchy = store.hierarchy()
+    employee = store.top_earner('Engineering')
+    below = hierarchy.subordinates(employee.name)
+
+    names = nodes.eligible_managers(frame, employee, hierarchy).tolist()
+    expected = [e.name for e in store.department_records('Engineering')
+                if e.employee_id != employee.employee_id and e.name not in below]
+    assert names == expected
+    assert employee.name not in names
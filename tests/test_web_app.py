@@ -0,0 +1,34 @@
+"""Request validation of the Flask endpoints."""
+import pytest
+import web_app
+
+
+@pytest.fixture
+def client():
+    return web_app.app.test_client()
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/allocate', {'budget': 1000, 'max_threads': 'ten'}),
+    ('/allocate', {'budget': 1000, 'department_caps': {'Sales': 'lots'}}),
+    ('/allocate', {'budget': 1000, 'department_caps': ['Sales']}),
+    ('/allocate', {'budget': 'all of it'}),
+    ('/equity/proposals', {'max_threads': 'ten'}),
+    ('/equity/proposals', {'max_threads': None}),
+])
+def test_non_numeric_parameters_are_rejected(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('body', [
+    {'scenarios': 10 ** 9},
+    {'scenarios': 0},
+    {'scenarios': 10, 'hike_percentages': list(range(11))},
+])
+def test_oversized_simulations_are_rejected(client, monkeypatch, body):
+    monkeypatch.setattr(web_app, 'simulate', lambda *args, **kwargs: pytest.fail("simulation ran"))
+    response = client.post('/simulate', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
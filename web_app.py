@@ -2,97 +2,192 @@
 Flask web server for HITL Salary Management System
 A lightweight alternative to Streamlit
 """
-from flask import Flask, render_template, request, jsonify, session
+from flask import (Flask, render_template, request, jsonify, session, Response, stream_with_context,
+                   make_response, send_file, g)
+from flask.json.provider import JSONProvider
+import functools
 import sys
 from pathlib import Path
-import pandas as pd
 import json
+import os
+import uuid
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.workflow import graph
+from src.nodes import state_employees
 from src.state import WorkflowState
+from src.history import get_history_store
+from src.outbox import get_outbox
+from src.data_store import get_store, start_polling, stores
+from src.tenants import (UnknownTenant, bind_tenant, current_tenant, tenant_ids, tenant_thread_id,
+                         unbind_tenant)
+from src.decisions import decision_service, DecisionConflict, WorkflowNotFound
+from src.allocation import allocate_raises, seed_proposals
+from src.proposal_cache import adopt_analysis, proposal_cache, proposal_key, run_analysis
+from src.admission import Saturated, analysis_admission
+from src.profiling import artifact_path, authorized, list_artifacts, profiled, should_profile
+from src.export import MIME_TYPES, export_chunks
+from src.equity import equity_report, seed_equity_proposals
+from src.encoding import dumps, employees_fragment, loads
+from src.search import DEFAULT_LIMIT, search_employees
+from src.simulation import MAX_PERCENTAGES, MAX_SCENARIOS, simulate
+from src.review_queue import LeaseError, review_queue
+
+class FastJSONProvider(JSONProvider):
+    """jsonify through ``src.encoding``: numpy/pandas values, orjson when installed, cached fragments."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        return self._app.response_class(dumps(self._prepare_response_obj(args, kwargs)),
+                                        mimetype='application/json')
+
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.secret_key = 'hitl-demo-secret-key-change-in-production'
 
-# Global store for workflow states
-workflow_states = {}
 
+@app.before_request
+def select_tenant():
+    """Serve the tenant named by ``X-Tenant`` or ``?tenant=``, else the session's."""
+    requested = request.headers.get('X-Tenant') or request.args.get('tenant')
+    try:
+        g.tenant_token = bind_tenant(requested or session.get('tenant'))
+    except UnknownTenant:
+        if requested:
+            return jsonify({'success': False, 'error': f"Unknown tenant '{requested}'"}), 404
+        # The session's tenant was removed from the configuration
+        session.pop('tenant', None)
+        g.tenant_token = bind_tenant(None)
+    if requested and session.get('tenant') != requested:
+        session['tenant'] = requested
+        session.pop('thread_id', None)
+        session.pop('lease', None)
 
-def load_salary_data():
-    """Load salary data from Excel."""
-    data_path = Path(__file__).parent / "data" / "salary_data.xlsx"
-    return pd.read_excel(data_path)
+
+@app.teardown_request
+def release_tenant(exc=None):
+    token = g.pop('tenant_token', None)
+    if token is not None:
+        unbind_tenant(token)
 
 
 @app.route('/')
 def index():
     """Render main page."""
-    df = load_salary_data()
-    departments = sorted(df['Department'].unique())
+    summary = get_store().summary()
     
-    # Get department stats
-    dept_stats = []
-    for dept in departments:
-        dept_df = df[df['Department'] == dept]
-        dept_stats.append({
-            'name': dept,
-            'count': len(dept_df),
-            'avg_salary': int(dept_df['Current_Salary'].mean())
-        })
+    # Get department stats from the store's incrementally maintained aggregates
+    dept_stats = [
+        {
+            'name': row['Department'],
+            'count': int(row['Employees']),
+            'avg_salary': int(row['Avg Salary'])
+        }
+        for row in summary.to_dict('records')
+    ]
     
-    return render_template('index.html', departments=dept_stats)
+    return render_template('index.html', departments=dept_stats,
+                           tenants=tenant_ids(), tenant=current_tenant())
+
+
+def profile_view(name: str):
+    """Profile a view, serialization included, when the request opts in."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not should_profile(request.headers):
+                return view(*args, **kwargs)
+            with profiled(name) as run:
+                response = make_response(view(*args, **kwargs))
+            if run is not None:
+                response.headers['X-Profile-Id'] = run.artifact_id
+            return response
+        return wrapper
+    return decorator
+
+
+def proposal_payload(thread_id: str, result: dict) -> dict:
+    """Proposal data the page needs to show a paused thread."""
+    employees = state_employees(result)
+    store = get_store(result.get('tenant'))
+    payload = {
+        'success': True,
+        'highest_paid': {
+            'name': result['highest_paid'].name,
+            'position': result['highest_paid'].position,
+            'salary': result['highest_paid'].current_salary,
+            'manager': result['highest_paid'].manager,
+            'department': result['highest_paid'].department
+        },
+        'proposal': {
+            'type': result['proposal_type'],
+            'details': result['proposal_details']
+        },
+        'employees': employees_fragment(store, result['department'], employees,
+                                        result.get('data_version')),
+        'checkpoint_id': decision_service.checkpoint_id(thread_id)
+    }
+    if result['proposal_type'] == 'manager_change':
+        payload['manager_options'] = store.hierarchy().manager_options(employees, result['highest_paid'])
+    return payload
+
+
+def admitted_analysis(thread_id: str, department: str, seed=None):
+    """
+    ``run_analysis`` behind admission control.
+
+    Cached proposals are served without taking a slot. Concurrent requests
+    for the same department and data version share one graph execution,
+    then copy its resulting state into their own threads, so a coalesced
+    request never runs the graph itself.
+    """
+    get_store().refresh()
+    key = proposal_key(department, seed)
+    if key in proposal_cache:
+        return run_analysis(thread_id, department, seed=seed)
+    result, shared = analysis_admission.run(key, lambda: run_analysis(thread_id, department, seed=seed))
+    if shared:
+        return adopt_analysis(thread_id, result[0], "Shared a concurrent identical analysis"), True
+    return result
 
 
 @app.route('/analyze', methods=['POST'])
+@profile_view('analyze')
 def analyze_department():
     """Analyze department and generate proposal."""
     data = request.json
     department = data.get('department')
     
     # Create unique thread ID
-    thread_id = f"web_{id(department)}"
+    thread_id = tenant_thread_id(f"web_{uuid.uuid4().hex}")
     session['thread_id'] = thread_id
+    session.pop('lease', None)
     
-    # Run workflow until HITL interrupt
-    config = {"configurable": {"thread_id": thread_id}}
-    initial_state = {
-        "department": department,
-        "employees": [],
-        "execution_log": []
-    }
-    
-    result = None
-    for event in graph.stream(initial_state, config, stream_mode="values"):
-        result = event
-    
-    # Store state for later
-    workflow_states[thread_id] = result
+    # Run workflow until HITL interrupt (or reuse an identical earlier analysis)
+    try:
+        result, cached = admitted_analysis(thread_id, department, seed=data.get('seed'))
+    except Saturated as e:
+        response = jsonify({'success': False, 'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
     
     # Return proposal data
     if result and result.get('proposal_details'):
-        return jsonify({
-            'success': True,
-            'highest_paid': {
-                'name': result['highest_paid']['Name'],
-                'position': result['highest_paid']['Position'],
-                'salary': result['highest_paid']['Current_Salary'],
-                'manager': result['highest_paid']['Manager'],
-                'department': result['highest_paid']['Department']
-            },
-            'proposal': {
-                'type': result['proposal_type'],
-                'details': result['proposal_details']
-            },
-            'employees': result.get('employees', [])
-        })
+        return jsonify({**proposal_payload(thread_id, result), 'cached': cached})
     else:
         return jsonify({'success': False, 'error': 'No data found'}), 400
 
 
 @app.route('/decide', methods=['POST'])
+@profile_view('decide')
 def process_decision():
     """Process human decision."""
     data = request.json
@@ -103,36 +198,332 @@ def process_decision():
     if not thread_id:
         return jsonify({'success': False, 'error': 'No active workflow'}), 400
     
-    config = {"configurable": {"thread_id": thread_id}}
-    
-    # Update state with decision
-    update_data = {"human_decision": decision}
-    if modification:
-        update_data["modification_details"] = modification
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
     
-    graph.update_state(config, update_data)
-    
-    # Resume workflow
-    final_result = None
-    for event in graph.stream(None, config, stream_mode="values"):
-        final_result = event
+    try:
+        final_result, replayed = decision_service.submit(
+            thread_id,
+            decision,
+            modification,
+            idempotency_key=idempotency_key,
+            expected_checkpoint=data.get('checkpoint_id'),
+            lease=session.get('lease') or data.get('lease')
+        )
+    except WorkflowNotFound:
+        return jsonify({'success': False, 'error': 'No active workflow'}), 400
+    except DecisionConflict as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'status': e.state.get('final_status'),
+            'message': e.state.get('final_message')
+        }), 409
     
     # Return result
     if final_result:
+        if not replayed:
+            reviewer = data.get('reviewer') or request.headers.get('X-Reviewer')
+            get_history_store().record(final_result, thread_id=thread_id, reviewer=reviewer)
         return jsonify({
             'success': True,
             'status': final_result.get('final_status'),
             'message': final_result.get('final_message'),
-            'log': final_result.get('execution_log', [])
+            'log': final_result.get('execution_log', []),
+            'replayed': replayed
         })
     else:
         return jsonify({'success': False, 'error': 'Workflow failed'}), 500
 
 
+@app.route('/queue/next', methods=['POST'])
+def claim_next():
+    """Lease the most urgent paused proposal, optionally within one department."""
+    data = request.json or {}
+    reviewer = data.get('reviewer') or request.headers.get('X-Reviewer')
+    while True:
+        item = review_queue.claim(reviewer=reviewer, department=data.get('department'),
+                                  tenant=current_tenant())
+        if item is None:
+            return jsonify({'success': False, 'error': 'Review queue is empty'}), 404
+        snapshot = graph.get_state({"configurable": {"thread_id": item['thread_id']}})
+        if "human_approval" in snapshot.next:
+            break
+        # Decided or lost elsewhere; drop it and try the next one
+        review_queue.complete(item['thread_id'])
+
+    session['thread_id'] = item['thread_id']
+    session['lease'] = item['lease']
+    return jsonify({**proposal_payload(item['thread_id'], snapshot.values), 'queue_item': item})
+
+
+@app.route('/queue/release', methods=['POST'])
+def release_claim():
+    """Return the session's leased proposal to the queue undecided."""
+    thread_id, lease = session.get('thread_id'), session.pop('lease', None)
+    if not lease:
+        return jsonify({'success': False, 'error': 'No leased proposal'}), 400
+    try:
+        review_queue.release(thread_id, lease)
+    except LeaseError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    return jsonify({'success': True})
+
+
+@app.route('/queue', methods=['GET'])
+def queue_stats():
+    """Pending, leased and overdue counts of the tenant's review queue."""
+    return jsonify(review_queue.stats(tenant=current_tenant()))
+
+
+@app.route('/allocate', methods=['POST'])
+def allocate_budget():
+    """Distribute a raise budget and queue the top-ranked raises for review."""
+    data = request.json or {}
+    try:
+        budget = float(data['budget'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'A numeric budget is required'}), 400
+    try:
+        max_threads = int(data.get('max_threads', 100))
+        department_caps = {str(k): float(v) for k, v in (data.get('department_caps') or {}).items()}
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'max_threads and department_caps must be numbers'}), 400
+    
+    try:
+        ranked = allocate_raises(
+            get_store().frame,
+            budget,
+            department_caps=department_caps,
+            score=data.get('score', 'band_gap')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    thread_ids = seed_proposals(ranked, limit=max_threads)
+    top = ranked.head(len(thread_ids))
+    
+    return jsonify({
+        'success': True,
+        'funded': len(ranked),
+        'total_cost': int(ranked['cost'].sum()),
+        'by_department': {k: int(v) for k, v in ranked.groupby('Department', observed=True)['cost'].sum().items()},
+        'proposals': [
+            {
+                'thread_id': thread_id,
+                'rank': int(row['rank']),
+                'employee_id': int(row['Employee_ID']),
+                'name': row['Name'],
+                'department': row['Department'],
+                'current_salary': int(row['current_salary']),
+                'proposed_salary': int(row['proposed_salary']),
+                'score': float(row['score'])
+            }
+            for thread_id, row in zip(thread_ids, top.to_dict('records'))
+        ]
+    })
+
+
+@app.route('/simulate', methods=['POST'])
+def simulate_costs():
+    """Cost distribution of many seeded analyses, without pausing for review."""
+    data = request.json or {}
+    try:
+        scenarios = int(data.get('scenarios', 10000))
+        percentages = [float(p) for p in data.get('hike_percentages') or []]
+        seed = int(data.get('seed', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'scenarios, seed and hike_percentages must be numbers'}), 400
+    if not 0 < scenarios <= MAX_SCENARIOS or len(percentages) > MAX_PERCENTAGES:
+        return jsonify({
+            'success': False,
+            'error': f"scenarios must be between 1 and {MAX_SCENARIOS:,}, "
+                     f"with at most {MAX_PERCENTAGES} hike percentages"
+        }), 400
+    # Simulations share the analysis slots; identical concurrent requests share one run
+    key = ('simulate', current_tenant(), get_store().version, scenarios, tuple(percentages), seed)
+    try:
+        report, _ = analysis_admission.run(key, lambda: simulate(scenarios, percentages, seed=seed))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Saturated as e:
+        response = jsonify({'success': False, 'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    return jsonify({'success': True, **report})
+
+
+@app.route('/equity', methods=['GET'])
+def pay_equity():
+    """Peer-group equity metrics and the employees most out of line."""
+    args = request.args
+    try:
+        report = equity_report(
+            department=args.get('department') or None,
+            flag=args.get('flag') or None,
+            outliers_only=args.get('all') not in ('1', 'true'),
+            limit=args.get('limit', default=100, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'data_version': report['data_version'],
+        'matching': report['matching'],
+        'groups': report['groups'],
+        'employees': report['employees']
+    })
+
+
+@app.route('/equity/proposals', methods=['POST'])
+def equity_proposals():
+    """Queue raises that close the largest pay-equity gaps for review."""
+    data = request.json or {}
+    try:
+        max_threads = int(data.get('max_threads', 100))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'max_threads must be a number'}), 400
+    thread_ids = seed_equity_proposals(
+        department=data.get('department') or None,
+        limit=max_threads
+    )
+    return jsonify({'success': True, 'thread_ids': thread_ids})
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Employees whose name, position or id starts with ``q``."""
+    query = request.args.get('q', '')
+    results = search_employees(query, limit=request.args.get('limit', DEFAULT_LIMIT, type=int))
+    return jsonify({'success': True, 'query': query, 'items': results})
+
+
+@app.route('/hierarchy', methods=['GET'])
+def span_of_control():
+    """Managers with the widest span of control."""
+    limit = min(request.args.get('limit', 20, type=int), 500)
+    return jsonify({'success': True, 'items': get_store().hierarchy().span_of_control(limit)})
+
+
+@app.route('/hierarchy/<path:name>', methods=['GET'])
+def reporting_chain(name):
+    """Reports and reporting chain of one person."""
+    hierarchy = get_store().hierarchy()
+    employee_id = hierarchy.employee_id(name)
+    return jsonify({
+        'success': True,
+        'name': name,
+        'employee_id': employee_id,
+        'direct_reports': hierarchy.report_count(name),
+        'total_reports': hierarchy.total_reports(name),
+        'depth': hierarchy.depth(name),
+        'chain': hierarchy.chain(employee_id) if employee_id is not None else [],
+        'reports': hierarchy.direct_reports(name)[:500],
+    })
+
+
+@app.route('/data/issues', methods=['GET'])
+def data_issues():
+    """Workbook rows rejected by the schema checks at the last load."""
+    issues = get_store().issues
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    return jsonify({
+        'success': True,
+        'rejected_rows': int(issues['row'].nunique()),
+        'issues': issues.head(limit)
+    })
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Proposal cache hit/miss counters, for sizing the cache."""
+    return jsonify({'success': True, **proposal_cache.stats(), 'admission': analysis_admission.stats(),
+                    'stores': stores.stats()})
+
+
+@app.route('/outbox', methods=['GET'])
+def outbox_stats():
+    """Pending, retrying and dead side-effect events."""
+    return jsonify({'success': True, **get_outbox().stats()})
+
+
+@app.route('/tenants', methods=['GET'])
+def tenants():
+    """Configured tenants, the one this session uses, and which are loaded."""
+    return jsonify({'success': True, 'tenants': tenant_ids(), 'current': current_tenant(),
+                    **stores.stats()})
+
+
+@app.route('/history', methods=['GET'])
+def decision_history():
+    """Return one page of recorded decisions, newest first."""
+    args = request.args
+    page = get_history_store().query(
+        department=args.get('department') or None,
+        status=args.get('status') or None,
+        since=args.get('since', type=float),
+        until=args.get('until', type=float),
+        cursor=args.get('cursor', type=int),
+        limit=args.get('limit', default=20, type=int)
+    )
+    return jsonify({'success': True, **page})
+
+
+@app.route('/export/<table>', methods=['GET'])
+def export(table):
+    """Stream recorded proposals or decisions as CSV (default) or XLSX."""
+    if table not in ('proposals', 'decisions'):
+        return jsonify({'success': False, 'error': 'Unknown export'}), 404
+    args = request.args
+    fmt = args.get('format', 'csv')
+    try:
+        chunks = export_chunks(
+            table, fmt,
+            department=args.get('department') or None,
+            status=args.get('status') or None,
+            since=args.get('since', type=float),
+            until=args.get('until', type=float)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return Response(
+        stream_with_context(chunks),
+        mimetype=MIME_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename={table}.{fmt}'}
+    )
+
+
+@app.route('/profiles', methods=['GET'])
+def profiles():
+    """List saved profiling artifacts (admin token required)."""
+    if not authorized(request.headers.get('X-Profile') or request.args.get('token')):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    return jsonify({'success': True, 'items': list_artifacts()})
+
+
+@app.route('/profiles/<artifact_id>', methods=['GET'])
+def download_profile(artifact_id):
+    """Download one profiling artifact as a zip (admin token required)."""
+    if not authorized(request.headers.get('X-Profile') or request.args.get('token')):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    path = artifact_path(artifact_id)
+    if path is None:
+        return jsonify({'success': False, 'error': 'No such profile'}), 404
+    return send_file(path, mimetype='application/zip', as_attachment=True)
+
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("  HITL Salary Management System - Web UI")
     print("="*60)
+    # Pick up new workbook drops of loaded tenants without restarting (0 disables polling)
+    poll_interval = float(os.environ.get('HITL_DATA_POLL_SECONDS', '30'))
+    if poll_interval > 0:
+        start_polling(poll_interval)
+    # Deliver side effects left over from a previous run
+    get_outbox().start()
+    # Load the default dataset now; its search index builds in the background
+    get_store()
+    
     print("\n  🚀 Starting server at http://localhost:5000")
     print("  📝 Press Ctrl+C to stop\n")
     